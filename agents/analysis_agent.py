@@ -3,6 +3,7 @@
 # role: Analyzes the project structure using ProjectAnalyzer.
 
 from pathlib import Path
+from typing import List
 from aida.analysis import ProjectAnalyzer
 from aida.schemas import ProjectMetadata
 
@@ -40,4 +41,22 @@ class AnalysisAgent:
         )
         
         print("Analysis complete. Metadata generated.")
-        return metadata
\ No newline at end of file
+        return metadata
+
+    def refresh(self, metadata: ProjectMetadata, changed: List[str]) -> ProjectMetadata:
+        """
+        Updates metadata with files that changed since it was generated,
+        e.g. as reported by the workspace watcher, without a full analysis.
+
+        Args:
+            metadata: The metadata from a previous `run`.
+            changed: Paths relative to the project root that were created, modified or deleted.
+
+        Returns:
+            A new ProjectMetadata object with the updated file list.
+        """
+        analyzer = ProjectAnalyzer(project_path=metadata.root_dir)
+        return ProjectMetadata(
+            root_dir=metadata.root_dir,
+            files=analyzer.refresh_files(metadata.files, changed)
+        )
@@ -6,6 +6,7 @@ from typing import List
 from aida.agents.base_agent import BaseAgent
 from aida.schemas import ProjectMetadata, ArchitecturePlan
 from aida.llm_client import LLMClient
+from aida.services.context_packer import ContextPacker, PromptSection
 
 PROMPT_TEMPLATE = """
 You are an expert AI software architect. Your task is to design the file structure for a new software project based on the user's request.
@@ -40,8 +41,8 @@ If the existing file structure is sufficient, return an empty list: `{{"files":
 """
 
 class ArchitectureAgent(BaseAgent):
-    def __init__(self, llm_client: LLMClient):
-        super().__init__(llm_client)
+    def __init__(self, llm_client: LLMClient, context_packer: ContextPacker | None = None):
+        super().__init__(llm_client, context_packer)
 
     def run(
         self,
@@ -50,12 +51,13 @@ class ArchitectureAgent(BaseAgent):
     ) -> ArchitecturePlan | None:
         print(f"[ArchitectureAgent] Designing architecture for: '{goal}'")
 
-        prompt = PROMPT_TEMPLATE.format(
-            goal=goal,
-            file_list="\n".join(metadata.files),
-        )
+        packed = self.context_packer.pack("architecture", PROMPT_TEMPLATE, [
+            PromptSection.text("goal", goal, required=True),
+            PromptSection.file_list("file_list", metadata.files, priority=1),
+        ])
+        prompt = packed.prompt
 
-        response_model = self.llm_client.generate_json(prompt, output_schema=ArchitecturePlan)
+        response_model = self.llm_client.generate_json(prompt, output_schema=ArchitecturePlan, agent="architecture")
 
         if not response_model or not response_model.files:
             print("[ArchitectureAgent] No architectural changes were proposed.")
@@ -3,7 +3,8 @@
 # role: Defines the abstract base class for all agents that use the LLM.
 
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Optional
+from aida.services.context_packer import ContextPacker, TokenCounter
 
 # Use a forward reference for the type hint to avoid circular imports
 if 'LLMClient' not in globals():
@@ -15,16 +16,20 @@ if 'LLMClient' not in globals():
 class BaseAgent(ABC):
     """
     Abstract base class for all agents.
-    Ensures that each agent has an LLM client.
+    Ensures that each agent has an LLM client and a context packer
+    that keeps its prompts within the configured token budget.
     """
-    def __init__(self, llm_client: 'LLMClient'):
+    def __init__(self, llm_client: 'LLMClient', context_packer: Optional[ContextPacker] = None):
         """
         Initializes the agent with an LLM client.
 
         Args:
             llm_client (LLMClient): The client for interacting with the LLM.
+            context_packer (ContextPacker): Assembles prompts within a token budget.
+                A packer with default budgets is used if none is given.
         """
         self.llm_client = llm_client
+        self.context_packer = context_packer or ContextPacker(TokenCounter(getattr(llm_client, "model", "")))
 
     @abstractmethod
     def run(self, *args: Any, **kwargs: Any) -> Any:
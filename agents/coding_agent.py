@@ -4,29 +4,77 @@
 
 import os
 from pathlib import Path
-from typing import List
+from typing import Iterator, List
 from aida.agents.base_agent import BaseAgent
-from aida.schemas import CodeChange, ProjectMetadata, CodeChanges
+from aida.schemas import CodeChange, ProjectMetadata, CodeChanges, SearchHit
 from aida.llm_client import LLMClient
 from aida.rag import RetrievalAgent
+from aida.analysis import SymbolIndex
+from aida.services.context_packer import ContextPacker, PromptSection
+
+PROMPT_TEMPLATE = """
+You are an expert programmer. Your task is to generate code changes based on the user's request.
+The user wants to: '{task}'.
+
+Analyze the project structure and relevant context to provide the necessary code modifications.
+The output should be a JSON object representing a list of code changes wrapped in a root object.
+
+Project Structure:
+{file_list}
+
+Definitions of symbols named in the task:
+{definitions}
+
+Relevant Code from similar files (Context):
+{context}
+
+Respond with a JSON object that strictly adheres to the `CodeChanges` schema.
+The root object should have a single key "changes" which contains a list of `CodeChange` objects.
+A `CodeChange` object has the following format:
+{{
+    "file_path": "path/to/file.py",
+    "action": "create" | "update" | "delete",
+    "content": "the full content of the file for create/update, or empty for delete"
+}}
+
+IMPORTANT: The 'content' field must be a single-line JSON string. All newline characters within the code must be escaped as '\\n'.
+"""
 
 class CodingAgent(BaseAgent):
-    def __init__(self, llm_client: LLMClient, retrieval_agent: RetrievalAgent):
-        super().__init__(llm_client)
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        retrieval_agent: RetrievalAgent | None = None,
+        context_packer: ContextPacker | None = None,
+        symbol_index: SymbolIndex | None = None,
+    ):
+        super().__init__(llm_client, context_packer)
         self.retrieval_agent = retrieval_agent
+        self.symbol_index = symbol_index
 
     def run(self, task: str, metadata: ProjectMetadata) -> list[CodeChange]:
         print(f"[CodingAgent] Executing task: '{task}'")
         
-        context_list = self.retrieval_agent.run(task)
-        context_str = "\n---\n".join(context_list)
+        hits = self.retrieval_agent.run(task) if self.retrieval_agent else []
+        prompt = self._create_prompt(task, metadata, hits)
         
-        prompt = self._create_prompt(task, metadata, context_str)
-        
-        response_model = self.llm_client.generate_json(prompt, output_schema=CodeChanges)
+        response_model = self.llm_client.generate_json(prompt, output_schema=CodeChanges, agent="coding")
         print("[CodingAgent] Code generated successfully.")
         return response_model.changes if response_model else []
 
+    def run_stream(self, task: str, metadata: ProjectMetadata) -> Iterator[CodeChange]:
+        """
+        Streams the code changes for a task, yielding each file change as soon as it is complete.
+        """
+        print(f"[CodingAgent] Streaming task: '{task}'")
+
+        hits = self.retrieval_agent.run(task) if self.retrieval_agent else []
+        prompt = self._create_prompt(task, metadata, hits)
+        for change in self.llm_client.stream_json(prompt, output_schema=CodeChanges, agent="coding"):
+            # stream_json yields the validated items of the schema's list field, i.e. CodeChange objects.
+            if isinstance(change, CodeChange):
+                yield change
+
     def apply_code_to_sandbox(self, code_changes: list[CodeChange], sandbox_path: str):
         """
         Applies the generated code changes to the sandbox environment.
@@ -52,30 +100,15 @@ class CodingAgent(BaseAgent):
                     print(f"[CodingAgent] Deleting file: {target_path}")
                     target_path.unlink()
 
-    def _create_prompt(self, task: str, metadata: ProjectMetadata, context: str) -> str:
-        file_list_str = "\n".join(metadata.files) if metadata.files else "No files in the project."
-        
-        return f"""
-        You are an expert programmer. Your task is to generate code changes based on the user's request.
-        The user wants to: '{task}'.
-
-        Analyze the project structure and relevant context to provide the necessary code modifications.
-        The output should be a JSON object representing a list of code changes wrapped in a root object.
-
-        Project Structure:
-        {file_list_str}
-
-        Relevant Code from similar files (Context):
-        {context}
-        
-        Respond with a JSON object that strictly adheres to the `CodeChanges` schema.
-        The root object should have a single key "changes" which contains a list of `CodeChange` objects.
-        A `CodeChange` object has the following format:
-        {{
-            "file_path": "path/to/file.py",
-            "action": "create" | "update" | "delete",
-            "content": "the full content of the file for create/update, or empty for delete"
-        }}
-        
-        IMPORTANT: The 'content' field must be a single-line JSON string. All newline characters within the code must be escaped as '\\n'.
-        """
\ No newline at end of file
+    def _create_prompt(self, task: str, metadata: ProjectMetadata, hits: List[SearchHit]) -> str:
+        # Each chunk is labelled with its file and lines, so the model can tell where the code lives.
+        context = [f"# {hit.location}" + (f" ({hit.qualname})" if hit.qualname else "") + "\n" + hit.text for hit in hits]
+        # The exact definitions of the symbols the task names, looked up by name.
+        definitions = self.symbol_index.render(self.symbol_index.definitions_in(task)) if self.symbol_index else []
+        packed = self.context_packer.pack("coding", PROMPT_TEMPLATE, [
+            PromptSection.text("task", task, required=True),
+            PromptSection("definitions", definitions, priority=0, separator="\n---\n", truncate="head", empty="(none)"),
+            PromptSection("context", context, priority=1, separator="\n---\n", truncate="head", empty="(no relevant code found)"),
+            PromptSection.file_list("file_list", metadata.files, priority=2, empty="No files in the project."),
+        ])
+        return packed.prompt
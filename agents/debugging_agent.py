@@ -8,6 +8,8 @@ from aida.agents.base_agent import BaseAgent
 from aida.schemas import CodeChange, ProjectMetadata, CodeChanges
 from aida.llm_client import LLMClient
 from aida.rag import RetrievalAgent
+from aida.analysis import SymbolIndex
+from aida.services.context_packer import ContextPacker, PromptSection
 from aida.utils import clean_code
 
 PROMPT_TEMPLATE = """
@@ -29,6 +31,11 @@ You are an expert AI software engineer specializing in debugging. Your task is t
 {file_contents}
 </file_contents>
 
+**Definitions of Symbols in the Test Output:**
+<definitions>
+{definitions}
+</definitions>
+
 **Your Analysis & Task:**
 1.  **Analyze the Failure**: Carefully read the `<test_output>`. Identify the exact error message, the failing test function, and the file and line number where the error occurred.
 2.  **Identify Root Cause**: Based on the error, examine the relevant file contents in `<file_contents>`. The bug could be in the test code itself (e.g., incorrect assertion) or in the source code it's testing.
@@ -45,9 +52,16 @@ If you cannot find a fix, return an empty list: `{{"changes": []}}`.
 """
 
 class DebuggingAgent(BaseAgent):
-    def __init__(self, llm_client: LLMClient, retrieval_agent: RetrievalAgent):
-        super().__init__(llm_client)
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        retrieval_agent: RetrievalAgent | None = None,
+        context_packer: ContextPacker | None = None,
+        symbol_index: SymbolIndex | None = None,
+    ):
+        super().__init__(llm_client, context_packer)
         self.retrieval_agent = retrieval_agent
+        self.symbol_index = symbol_index
 
     def run(
         self,
@@ -58,26 +72,48 @@ class DebuggingAgent(BaseAgent):
     ) -> list[CodeChange]:
         print("[DebuggingAgent] Analyzing test failures to generate a fix...")
         
-        file_contents = ""
+        file_contents: List[str] = []
+        included_files = set()
         relevant_files = self._find_relevant_files(test_output, metadata.files)
+        # Stop reading once the files could no longer fit in the prompt anyway.
+        max_chars = self.context_packer.token_counter.chars_for(self.context_packer.budget_for("debugging"))
+        read_chars = 0
 
         for file_path_str in relevant_files:
+            if read_chars >= max_chars:
+                break
             try:
                 full_path = Path(sandbox_path) / file_path_str
                 with full_path.open('r', encoding='utf-8') as f:
                     content = f.read()
-                file_contents += f"\n--- {file_path_str} ---\n{content}\n"
+                file_contents.append(f"\n--- {file_path_str} ---\n{content}\n")
+                included_files.add(file_path_str)
+                read_chars += len(content)
             except (IOError, UnicodeDecodeError):
                 continue
 
-        prompt = PROMPT_TEMPLATE.format(
-            goal=goal,
-            file_list="\n".join(metadata.files),
-            test_output=test_output,
-            file_contents=file_contents,
-        )
+        # The exact definitions of the functions and classes named in the traceback,
+        # from files whose full content is not already included.
+        definitions = []
+        if self.symbol_index:
+            symbols = self.symbol_index.definitions_in(test_output)
+            definitions = self.symbol_index.render([s for s in symbols if s.path not in included_files])
+
+        packed = self.context_packer.pack("debugging", PROMPT_TEMPLATE, [
+            PromptSection.text("goal", goal, required=True),
+            PromptSection.text("test_output", test_output, priority=0, truncate="tail"),
+            # Fixes replace whole files, so a file is either shown in full or left out, never cut.
+            PromptSection("file_contents", file_contents, priority=1, separator=""),
+            PromptSection("definitions", definitions, priority=1, separator="\n---\n", truncate="head", empty="(none)"),
+            PromptSection.file_list("file_list", metadata.files, priority=2),
+        ])
+        prompt = packed.prompt
         
-        response_model = self.llm_client.generate_json(prompt, output_schema=CodeChanges)
+        # The agent only runs after tests failed, often on a prompt seen before (the same failure in a
+        # re-run task, or a fix that changed nothing), so a cached fix would just fail again.
+        response_model = self.llm_client.generate_json(
+            prompt, output_schema=CodeChanges, use_cache=False, agent="debugging"
+        )
         
         if not response_model or not response_model.changes:
             print("[DebuggingAgent] Could not generate a fix.")
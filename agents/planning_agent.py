@@ -2,10 +2,11 @@
 # title: Planning Agent
 # role: Generates a step-by-step plan to achieve a user's goal.
 
-from typing import List
+from typing import Generator, List
 from aida.llm_client import LLMClient
 from aida.schemas import ProjectMetadata, Action, Plan
 from aida.agents.base_agent import BaseAgent
+from aida.services.context_packer import ContextPacker, PromptSection
 
 PROMPT_TEMPLATE = """
 You are an expert AI project planner. Your job is to create a step-by-step plan in JSON format.
@@ -101,8 +102,8 @@ class PlanningAgent(BaseAgent):
     to achieve a user's goal.
     """
 
-    def __init__(self, llm_client: LLMClient):
-        super().__init__(llm_client)
+    def __init__(self, llm_client: LLMClient, context_packer: ContextPacker | None = None):
+        super().__init__(llm_client, context_packer)
         print("PlanningAgent initialized.")
 
     def run(self, goal: str, metadata: ProjectMetadata, history: List[str]) -> Plan | None:
@@ -111,19 +112,37 @@ class PlanningAgent(BaseAgent):
         """
         print(f"[PlanningAgent] Generating a plan for goal: '{goal}'")
 
-        file_list = metadata.files if hasattr(metadata, 'files') else []
-        file_list_str = "\n".join(file_list) if file_list else "(empty)"
-        history_str = "\n".join(history) if history else "(no history)"
-
-        prompt = PROMPT_TEMPLATE.format(
-            goal=goal,
-            file_list=file_list_str,
-            history=history_str,
-        )
-
-        plan = self.llm_client.generate_json(prompt, output_schema=Plan)
+        prompt = self._create_prompt(goal, metadata, history)
+        plan = self.llm_client.generate_json(prompt, output_schema=Plan, agent="planning")
         if plan:
             print(f"[PlanningAgent] Plan generated with {len(plan.steps)} steps.")
         else:
             print("[PlanningAgent] Failed to generate a plan.")
         return plan
+
+    def run_stream(self, goal: str, metadata: ProjectMetadata, history: List[str]) -> Generator[Action, None, None]:
+        """
+        Streams the plan, yielding each action as soon as the model has finished writing it.
+        This lets the caller start executing the first steps while later steps are still generated.
+        """
+        print(f"[PlanningAgent] Streaming a plan for goal: '{goal}'")
+
+        prompt = self._create_prompt(goal, metadata, history)
+        step_count = 0
+        for action in self.llm_client.stream_json(prompt, output_schema=Plan, agent="planning"):
+            # stream_json yields the validated items of the schema's list field, i.e. Actions.
+            if not isinstance(action, Action):
+                continue
+            step_count += 1
+            yield action
+        print(f"[PlanningAgent] Plan stream finished with {step_count} steps.")
+
+    def _create_prompt(self, goal: str, metadata: ProjectMetadata, history: List[str]) -> str:
+        file_list = metadata.files if hasattr(metadata, 'files') else []
+
+        packed = self.context_packer.pack("planning", PROMPT_TEMPLATE, [
+            PromptSection.text("goal", goal, required=True),
+            PromptSection.file_list("file_list", file_list, priority=1),
+            PromptSection("history", history or [], priority=2, keep="last", empty="(no history)"),
+        ])
+        return packed.prompt
@@ -7,6 +7,7 @@ from typing import List
 from aida.agents.base_agent import BaseAgent
 from aida.schemas import CodeChange, ProjectMetadata, CodeChanges
 from aida.llm_client import LLMClient
+from aida.services.context_packer import ContextPacker, PromptSection
 from aida.utils import clean_code
 
 PROMPT_TEMPLATE = """
@@ -44,8 +45,8 @@ If no refactoring is necessary, return an empty list: `{{"changes": []}}`.
 """
 
 class RefactoringAgent(BaseAgent):
-    def __init__(self, llm_client: LLMClient):
-        super().__init__(llm_client)
+    def __init__(self, llm_client: LLMClient, context_packer: ContextPacker | None = None):
+        super().__init__(llm_client, context_packer)
 
     def run(
         self,
@@ -66,13 +67,17 @@ class RefactoringAgent(BaseAgent):
             print(f"[RefactoringAgent] Error reading file {target_file}: {e}")
             return []
 
-        prompt = PROMPT_TEMPLATE.format(
-            file_path=file_path_str,
-            file_content=content,
-            file_list="\n".join(metadata.files),
-        )
+        # The file itself is never truncated: a partial file would be written back as the refactored version.
+        packed = self.context_packer.pack("refactoring", PROMPT_TEMPLATE, [
+            PromptSection.text("file_path", file_path_str, required=True),
+            PromptSection.text("file_content", content, required=True),
+            PromptSection.file_list("file_list", metadata.files, priority=1),
+        ])
+        if packed.tokens > packed.budget:
+            print(f"[RefactoringAgent] Warning: '{file_path_str}' alone exceeds the prompt budget ({packed.tokens}/{packed.budget} tokens).")
+        prompt = packed.prompt
         
-        response_model = self.llm_client.generate_json(prompt, output_schema=CodeChanges)
+        response_model = self.llm_client.generate_json(prompt, output_schema=CodeChanges, agent="refactoring")
         
         if not response_model or not response_model.changes:
             print("[RefactoringAgent] No refactoring suggestions were generated.")
@@ -2,5 +2,6 @@
 # role: Initializes the analysis package.
 
 from .project_analyzer import ProjectAnalyzer
+from .symbol_index import SymbolIndex, Symbol
 
-__all__ = ["ProjectAnalyzer"]
\ No newline at end of file
+__all__ = ["ProjectAnalyzer", "SymbolIndex", "Symbol"]
\ No newline at end of file
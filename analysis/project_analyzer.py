@@ -4,7 +4,10 @@
 
 import os
 from pathlib import Path
-from typing import List
+from typing import Iterable, List
+
+# Directories that are never part of the project (also skipped by the workspace watcher).
+IGNORE_DIRS = {'.venv', '__pycache__', '.git', '.idea', '.vscode', '.DS_Store'}
 
 class ProjectAnalyzer:
     """
@@ -32,11 +35,10 @@ class ProjectAnalyzer:
             A list of strings, where each string is a relative file path.
         """
         filepaths: List[str] = []
-        ignore_dirs = {'.venv', '__pycache__', '.git', '.idea', '.vscode', '.DS_Store'}
 
         for root, dirs, files in os.walk(self.project_root, topdown=True):
             # topdown=True allows us to modify dirs in-place to prune the search
-            dirs[:] = [d for d in dirs if d not in ignore_dirs]
+            dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
             
             for file in files:
                 full_path = Path(root) / file
@@ -45,6 +47,27 @@ class ProjectAnalyzer:
                 
         return filepaths
 
+    def refresh_files(self, files: List[str], changed: Iterable[str]) -> List[str]:
+        """
+        Updates a file list produced by `list_files` with a set of changed paths,
+        without walking the whole project: changed paths that are files now are
+        added, the others are removed.
+
+        Args:
+            files: The previous file list.
+            changed: Paths relative to the project root that were created, modified or deleted.
+
+        Returns:
+            The updated file list.
+        """
+        current = dict.fromkeys(files)
+        for rel_path in changed:
+            if (self.project_root / rel_path).is_file():
+                current[rel_path] = None
+            else:
+                current.pop(rel_path, None)
+        return list(current)
+
     def get_project_root(self) -> Path:
         """
         Returns the resolved, absolute path of the project root.
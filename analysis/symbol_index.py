@@ -0,0 +1,325 @@
+# path: aida/analysis/symbol_index.py
+# title: Symbol Index
+# role: A persistent table of the definitions, imports and call sites in the project's Python files.
+
+import ast
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bumped whenever the extracted symbols change, so older tables are rebuilt.
+SYMBOL_INDEX_VERSION = 1
+
+DEFINITION_KINDS = ("class", "function", "method", "variable")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*")
+
+
+@dataclass(frozen=True)
+class Symbol:
+    """
+    One occurrence of a name in a Python file.
+
+    Attributes:
+        name: The bare name (`run`).
+        kind: "class", "function", "method", "variable", "import" or "call".
+        path: The file, relative to the project root.
+        line: The first line (1-based).
+        end_line: The last line; for definitions, the end of the body.
+        qualname: For definitions, the dotted name within the module
+            (`Orchestrator.run_task`); for calls, the definition they occur in
+            (`<module>` at the top level); for imports, the imported object
+            (`aida.rag.VectorStore`).
+    """
+    name: str
+    kind: str
+    path: str
+    line: int
+    end_line: int
+    qualname: str
+
+    @property
+    def is_definition(self) -> bool:
+        return self.kind in DEFINITION_KINDS
+
+
+class _SymbolCollector(ast.NodeVisitor):
+    """Collects the symbols of one module."""
+    def __init__(self, path: str):
+        self.path = path
+        self.symbols: List[Symbol] = []
+        self._scope: List[Tuple[str, str]] = []  # (name, kind) of the enclosing definitions
+
+    def _qualname(self, name: str) -> str:
+        return ".".join([n for n, _ in self._scope] + [name])
+
+    def _add(self, name: str, kind: str, node: ast.AST, qualname: str) -> None:
+        # Definitions start at their first decorator.
+        line = min([getattr(node, "lineno", 1)] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        self.symbols.append(Symbol(name, kind, self.path, line, getattr(node, "end_lineno", None) or line, qualname))
+
+    def _visit_function(self, node) -> None:
+        kind = "method" if self._scope and self._scope[-1][1] == "class" else "function"
+        self._add(node.name, kind, node, self._qualname(node.name))
+        self._scope.append((node.name, kind))
+        self.generic_visit(node)
+        self._scope.pop()
+
+    visit_FunctionDef = _visit_function
+    visit_AsyncFunctionDef = _visit_function
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._add(node.name, "class", node, self._qualname(node.name))
+        self._scope.append((node.name, "class"))
+        self.generic_visit(node)
+        self._scope.pop()
+
+    def _visit_assignment(self, node, targets: Iterable[ast.AST]) -> None:
+        # Only module and class attributes; locals are not worth a lookup.
+        if not self._scope or self._scope[-1][1] == "class":
+            for target in targets:
+                for element in ast.walk(target):
+                    if isinstance(element, ast.Name):
+                        self._add(element.id, "variable", node, self._qualname(element.id))
+        self.generic_visit(node)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        self._visit_assignment(node, node.targets)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        self._visit_assignment(node, [node.target])
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            name = alias.asname or alias.name.split(".")[0]
+            self._add(name, "import", node, alias.name)
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        module = "." * node.level + (node.module or "")
+        for alias in node.names:
+            if alias.name != "*":
+                self._add(alias.asname or alias.name, "import", node, f"{module}.{alias.name}" if module else alias.name)
+
+    def visit_Call(self, node: ast.Call) -> None:
+        func = node.func
+        name = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else None
+        if name:
+            self._add(name, "call", node, ".".join(n for n, _ in self._scope) or "<module>")
+        self.generic_visit(node)
+
+
+def extract_symbols(source: str, path: str) -> Optional[List[Symbol]]:
+    """Returns the symbols of a Python module, or None if it does not parse."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    collector = _SymbolCollector(path)
+    collector.visit(tree)
+    return collector.symbols
+
+
+class SymbolIndex:
+    """
+    Maps names to where they are defined, imported and called in the project's
+    Python files, so agents can pull the exact definition of a symbol instead
+    of searching for it.
+
+    Lookups are dictionary accesses by bare name (`run_task`) or by qualified
+    name (`Orchestrator.run_task`). The table is kept per file: `update_files`
+    re-parses only files whose size or modification time changed and replaces
+    their symbols, and `sync` does the same for the whole project. The table is
+    saved as JSON and reloaded on the next start.
+    """
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: The JSON file the table is persisted to; None keeps it in memory only.
+        """
+        self.path = Path(path) if path else None
+        self.project_root: Optional[Path] = None
+        self._files: Dict[str, Tuple[int, int, List[Symbol]]] = {}
+        self._by_name: Dict[str, Dict[str, List[Symbol]]] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self.load()
+
+    # --- Persistence ---
+
+    def load(self) -> None:
+        """Reads the table from disk; a missing, corrupt or outdated file is treated as empty."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != SYMBOL_INDEX_VERSION:
+                return
+            with self._lock:
+                for rel_path, (size, mtime_ns, rows) in data["files"].items():
+                    self._set_file(rel_path, size, mtime_ns, [Symbol(*row) for row in rows])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[SymbolIndex] Could not read {self.path}, rebuilding the symbol table: {e}")
+            self._files.clear()
+            self._by_name.clear()
+        self._dirty = False
+
+    def save(self) -> None:
+        """Writes the table atomically if it changed."""
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            data = {
+                "version": SYMBOL_INDEX_VERSION,
+                "files": {
+                    rel_path: [size, mtime_ns, [
+                        [s.name, s.kind, s.path, s.line, s.end_line, s.qualname] for s in symbols
+                    ]]
+                    for rel_path, (size, mtime_ns, symbols) in self._files.items()
+                },
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    # --- Updates ---
+
+    def sync(self, project_root: str, file_paths: List[str]) -> None:
+        """
+        Brings the table up to date with the project's files: changed Python
+        files are re-parsed and files that are gone are dropped.
+        """
+        with self._lock:
+            self.project_root = Path(project_root)
+            current = {p for p in file_paths if p.endswith(".py")}
+            removed = [p for p in self._files if p not in current]
+            for rel_path in removed:
+                self._remove_file(rel_path)
+            parsed = sum(self._update_file(rel_path) for rel_path in sorted(current))
+            self.save()
+        print(f"[SymbolIndex] {len(self._files)} file(s) indexed: {parsed} parsed, {len(removed)} removed.")
+
+    def update_files(self, project_root: str, file_paths: Iterable[str]) -> None:
+        """Re-parses the given files if they changed, and drops those that no longer exist."""
+        with self._lock:
+            self.project_root = Path(project_root)
+            for rel_path in file_paths:
+                if rel_path.endswith(".py"):
+                    self._update_file(rel_path)
+            self.save()
+
+    def _update_file(self, rel_path: str) -> bool:
+        """Re-parses one file if its size or modification time changed; returns True if it was parsed."""
+        assert self.project_root is not None, "sync or update_files sets the project root first"
+        full_path = self.project_root / rel_path
+        try:
+            stat = full_path.stat()
+        except OSError:
+            self._remove_file(rel_path)
+            return False
+        known = self._files.get(rel_path)
+        if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return False
+        try:
+            source = full_path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            source = ""
+        # A file that does not parse (e.g. in the middle of an edit) has no symbols until it does.
+        symbols = extract_symbols(source, rel_path) or []
+        self._remove_file(rel_path)
+        self._set_file(rel_path, stat.st_size, stat.st_mtime_ns, symbols)
+        return True
+
+    def _set_file(self, rel_path: str, size: int, mtime_ns: int, symbols: List[Symbol]) -> None:
+        self._files[rel_path] = (size, mtime_ns, symbols)
+        for symbol in symbols:
+            keys = {symbol.name}
+            if symbol.is_definition:
+                keys.add(symbol.qualname)
+            for key in keys:
+                self._by_name.setdefault(key, {}).setdefault(rel_path, []).append(symbol)
+        self._dirty = True
+
+    def _remove_file(self, rel_path: str) -> None:
+        known = self._files.pop(rel_path, None)
+        if known is None:
+            return
+        for symbol in known[2]:
+            for key in (symbol.name, symbol.qualname):
+                by_path = self._by_name.get(key)
+                if by_path is not None and by_path.pop(rel_path, None) is not None and not by_path:
+                    del self._by_name[key]
+        self._dirty = True
+
+    # --- Lookups ---
+
+    def _lookup(self, name: str) -> List[Symbol]:
+        with self._lock:
+            return [symbol for symbols in self._by_name.get(name, {}).values() for symbol in symbols]
+
+    def definitions(self, name: str) -> List[Symbol]:
+        """Returns the classes, functions, methods and variables defined as `name` (bare or qualified)."""
+        return [s for s in self._lookup(name) if s.is_definition and name in (s.name, s.qualname)]
+
+    def references(self, name: str) -> List[Symbol]:
+        """Returns the imports and call sites of `name`."""
+        return [s for s in self._lookup(name) if not s.is_definition and s.name == name]
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def definitions_in(self, text: str, limit: int = 10, per_name: int = 3) -> List[Symbol]:
+        """
+        Returns the definitions of the symbols named in a text (e.g. a task or a
+        traceback), in the order the names first appear. Dotted names are looked
+        up whole (`VectorStore.search`) before falling back to their last part.
+
+        Args:
+            text: The text to scan for names.
+            limit: The maximum number of definitions returned.
+            per_name: Names defined in more places than this (e.g. `run`) are
+                too ambiguous to help and are skipped.
+        """
+        found: List[Symbol] = []
+        seen = set()
+        for match in _IDENTIFIER.finditer(text):
+            parts = match.group(0).split(".")
+            definitions: List[Symbol] = []
+            for candidate in dict.fromkeys([match.group(0), ".".join(parts[-2:]), parts[-1]]):
+                definitions = self.definitions(candidate)
+                if definitions:
+                    break
+            if len(definitions) > per_name:
+                continue
+            for definition in definitions:
+                if (definition.path, definition.qualname) in seen:
+                    continue
+                seen.add((definition.path, definition.qualname))
+                found.append(definition)
+                if len(found) >= limit:
+                    return found
+        return found
+
+    def source_of(self, symbol: Symbol) -> Optional[str]:
+        """Returns the source lines of a symbol, read from the project, or None if unreadable."""
+        if self.project_root is None:
+            return None
+        try:
+            with open(self.project_root / symbol.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except (OSError, UnicodeDecodeError):
+            return None
+        return "".join(lines[symbol.line - 1:symbol.end_line])
+
+    def render(self, symbols: List[Symbol]) -> List[str]:
+        """Formats definitions for a prompt: a `# path:start-end (qualname)` header and the source."""
+        rendered = []
+        for symbol in symbols:
+            source = self.source_of(symbol)
+            if source:
+                rendered.append(f"# {symbol.path}:{symbol.line}-{symbol.end_line} ({symbol.qualname})\n{source}")
+        return rendered
@@ -0,0 +1,136 @@
+# path: aida/benchmarks/json_extraction.py
+# title: JSON Extraction Benchmark
+# role: Compares the legacy first-brace/last-brace extractor with the tolerant extractor on a corpus of model outputs.
+
+"""
+Usage:
+    python benchmarks/json_extraction.py [--fuzz 200] [--seed 0]
+
+Runs every response in `benchmarks/data/json_responses.jsonl` through both
+extractors, then a seeded set of fuzzed variants (prose with brackets around the
+answer, decoy objects, code fences, trailing commas), and reports how many
+responses yield a schema-valid result and the extraction throughput.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Type
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from pydantic import BaseModel, ValidationError
+
+from aida.json_extract import best_json
+from aida.schemas import ArchitecturePlan, CodeChanges, Plan
+
+CORPUS_PATH = Path(__file__).parent / "data" / "json_responses.jsonl"
+SCHEMAS: Dict[str, Type[BaseModel]] = {"Plan": Plan, "CodeChanges": CodeChanges, "ArchitecturePlan": ArchitecturePlan}
+
+PROSE = [
+    "Here is the result:",
+    "Sure! I analysed the project structure {src/, tests/} first.",
+    "The list of files [a.py, b.py] was considered.",
+    'Remember that "quotes" and {braces} are common in prose.',
+    "Let me know if you need anything else [happy to help]!",
+    "Note: use {{double braces}} to escape format strings.",
+]
+DECOYS = ['{"note": "draft"}', '{"confidence": 0.8}', "[1, 2, 3]"]
+
+
+def legacy_extract(raw_response: str) -> str:
+    """The extraction used before the tolerant extractor: first opener to last closer."""
+    if "```json" in raw_response:
+        start_index = raw_response.find("```json") + len("```json")
+        end_index = raw_response.rfind("```")
+        if end_index > start_index:
+            raw_response = raw_response[start_index:end_index]
+    starts = [i for i in (raw_response.find("{"), raw_response.find("[")) if i != -1]
+    end_index = max(raw_response.rfind("}"), raw_response.rfind("]"))
+    if not starts or end_index <= min(starts):
+        return ""
+    return raw_response[min(starts):end_index + 1].strip()
+
+
+def legacy_parse(raw: str, schema: Type[BaseModel]) -> Optional[BaseModel]:
+    try:
+        return schema.model_validate(json.loads(legacy_extract(raw)))
+    except (json.JSONDecodeError, ValidationError):
+        return None
+
+
+def tolerant_parse(raw: str, schema: Type[BaseModel]) -> Optional[BaseModel]:
+    best = best_json(raw, schema)
+    return best.model if best else None
+
+
+def fuzz(raw: str, rng: random.Random) -> str:
+    """Wraps a valid response in noise that a robust extractor must see through."""
+    text = raw
+    if rng.random() < 0.4 and text.rstrip().endswith("}"):
+        stripped = text.rstrip()
+        text = stripped[:-1] + ",}"
+    if rng.random() < 0.3:
+        text = "```json\n" + text + "\n```"
+    if rng.random() < 0.6:
+        text = rng.choice(PROSE) + "\n" + text
+    if rng.random() < 0.3:
+        text = rng.choice(DECOYS) + "\n" + text
+    if rng.random() < 0.6:
+        text = text + "\n\n" + rng.choice(PROSE)
+    if rng.random() < 0.3:
+        text = text + "\n" + rng.choice(DECOYS)
+    return text
+
+
+def run(name: str, parse: Callable[[str, Type[BaseModel]], Optional[BaseModel]], cases: List[Dict]) -> Dict:
+    ok = 0
+    failures: List[str] = []
+    started = time.perf_counter()
+    for case in cases:
+        result = parse(case["raw"], SCHEMAS[case["schema"]])
+        if (result is not None) == (case["expect"] == "valid"):
+            ok += 1
+        else:
+            failures.append(case["name"])
+    elapsed = time.perf_counter() - started
+    size_mb = sum(len(c["raw"]) for c in cases) / 1e6
+    return {"extractor": name, "ok": ok, "total": len(cases), "seconds": elapsed,
+            "mb_per_s": size_mb / elapsed if elapsed else 0.0, "failures": failures}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fuzz", type=int, default=200, help="Number of fuzzed variants to generate.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = [json.loads(line) for line in CORPUS_PATH.read_text(encoding="utf-8").splitlines() if line.strip()]
+    rng = random.Random(args.seed)
+    # Truncated responses end at the cut-off, so they cannot be wrapped in trailing noise.
+    valid = [c for c in corpus if c["expect"] == "valid" and not c["name"].startswith("truncated")]
+    fuzzed = [
+        {**case, "name": f"fuzz:{case['name']}:{i}", "raw": fuzz(case["raw"], rng)}
+        for i, case in enumerate(rng.choice(valid) for _ in range(args.fuzz))
+    ]
+    large_changes = {"changes": [
+        {"file_path": f"pkg/module_{i}.py", "action": "create", "content": "def f(x):\n    return [x, {'k': x}]\n" * 20}
+        for i in range(300)
+    ]}
+    large = [{"name": "large", "schema": "CodeChanges", "expect": "valid",
+              "raw": "Here you go:\n" + json.dumps(large_changes) + "\nDone [1]."}] * 5
+
+    for title, cases in (("corpus", corpus), ("fuzzed", fuzzed), ("large responses", large)):
+        print(f"\n--- {title} ({len(cases)} responses) ---")
+        for name, parse in (("legacy", legacy_parse), ("tolerant", tolerant_parse)):
+            r = run(name, parse, cases)
+            print(f"{r['extractor']:<10} {r['ok']:>4}/{r['total']:<4} ok   {r['seconds'] * 1000:8.1f} ms   {r['mb_per_s']:7.1f} MB/s")
+            if r["failures"] and title == "corpus":
+                print(f"           failed: {', '.join(r['failures'])}")
+
+
+if __name__ == "__main__":
+    main()
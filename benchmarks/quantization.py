@@ -0,0 +1,93 @@
+# path: aida/benchmarks/quantization.py
+# title: Quantization Benchmark
+# role: Measures recall@k, latency and index memory of the NumPy backend at float32, float16 and int8.
+
+"""
+Usage:
+    python benchmarks/quantization.py [--size 100000] [--dim 768] [--queries 200]
+                                      [--k 10] [--rescore 1,4]
+
+Builds the NumPy vector backend once per quantization from the same seeded,
+clustered embeddings (see `benchmarks/vector_backends.py`) and reports, against
+the exact float32 results:
+
+    recall@k   the share of the exact top-k that is returned
+    scan MB    the size of the matrix every query scans (the index's working set)
+    p50 ms     the median query latency
+
+A rescore factor of 1 shows the quantized scores alone (the top-k are only
+re-ordered in float32); larger factors re-score more candidates.
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import numpy as np
+
+from aida.rag.backends.numpy_backend import NumpyBackend
+from vector_backends import N_CLUSTERS, build, exact_top_k
+
+
+def run_queries(backend: NumpyBackend, queries: np.ndarray, k: int, truth: List[Set[int]]):
+    latencies = []
+    recall = 0.0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        matches = backend.query(query, k)
+        latencies.append(time.perf_counter() - started)
+        recall += len({int(m.id) for m in matches} & expected) / len(expected)
+    latencies.sort()
+    return recall / len(queries), latencies[len(latencies) // 2] * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rescore", default="1,4", help="Comma-separated rescore factors to try.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((N_CLUSTERS, args.dim)).astype(np.float32)
+    queries = (centers[rng.integers(0, N_CLUSTERS, args.queries)]
+               + 0.35 * rng.standard_normal((args.queries, args.dim))).astype(np.float32)
+    truth = exact_top_k(args.size, args.dim, centers, args.seed, queries, args.k)
+    factors = [int(f) for f in args.rescore.split(",") if f]
+
+    workdir = Path(tempfile.mkdtemp(prefix="aida-quant-bench-"))
+    try:
+        print(f"{args.size} vectors x {args.dim} dims, top-{args.k}, {args.queries} queries")
+        header = f"{'storage':<9} {'rescore':>7} {'recall@k':>9} {'scan MB':>8} {'vs f32':>7} {'p50 ms':>8}"
+        print(header)
+        print("-" * len(header))
+        baseline = args.size * args.dim * 4
+        path = workdir / "index"
+        build(NumpyBackend(str(path)), args.size, args.dim, centers, args.seed)
+        for quantization in ("none", "float16", "int8"):
+            for factor in (factors if quantization != "none" else [1]):
+                # Reopening builds the quantized copy from the stored float32 matrix.
+                backend = NumpyBackend(str(path), quantization=quantization, rescore_factor=factor)
+                recall, p50 = run_queries(backend, queries, args.k, truth)
+                scanned = backend.scanned_bytes()
+                label = "float32" if quantization == "none" else quantization
+                print(f"{label:<9} {factor if quantization != 'none' else '-':>7} {recall:>9.3f} "
+                      f"{scanned / 1e6:>8.1f} {scanned / baseline:>6.0%} {p50:>8.2f}")
+                backend.persist()
+                del backend
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
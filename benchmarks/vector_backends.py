@@ -0,0 +1,171 @@
+# path: aida/benchmarks/vector_backends.py
+# title: Vector Backend Benchmark
+# role: Compares the Chroma and NumPy vector backends on build time, query latency, recall and disk size.
+
+"""
+Usage:
+    python benchmarks/vector_backends.py [--sizes 10000,100000,1000000] [--dim 384]
+                                         [--queries 200] [--k 10] [--chroma-max 100000]
+
+Builds each backend from the same seeded, clustered set of embeddings (written
+in batches, as the IndexingAgent does), reopens it from disk, and runs the same
+queries with and without a `source` filter. Recall@k is measured against an
+exact brute-force search. Chroma is skipped above `--chroma-max` chunks because
+building it takes very long at 1M; raise the limit to include it.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import numpy as np
+
+from aida.rag.backends import VectorBackend, create_backend
+
+BATCH_SIZE = 5000
+N_SOURCES = 1000
+N_CLUSTERS = 256
+
+
+def make_batch(start: int, count: int, dim: int, centers: np.ndarray, seed: int) -> np.ndarray:
+    """Returns the embeddings of rows [start, start + count), identical for every backend."""
+    rng = np.random.default_rng([seed, start])
+    labels = rng.integers(0, len(centers), size=count)
+    return (centers[labels] + 0.35 * rng.standard_normal((count, dim))).astype(np.float32)
+
+
+def source_of(row: int) -> str:
+    return f"pkg/module_{row % N_SOURCES}.py"
+
+
+def exact_top_k(size: int, dim: int, centers: np.ndarray, seed: int, queries: np.ndarray, k: int,
+                rows_filter: Optional[int] = None) -> List[Set[int]]:
+    """Brute-force cosine top-k, streamed over the batches so it runs at any size."""
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    best_scores = np.full((len(q), k), -np.inf, dtype=np.float32)
+    best_rows = np.full((len(q), k), -1, dtype=np.int64)
+    for start in range(0, size, BATCH_SIZE):
+        count = min(BATCH_SIZE, size - start)
+        batch = make_batch(start, count, dim, centers, seed)
+        batch /= np.linalg.norm(batch, axis=1, keepdims=True)
+        scores = q @ batch.T
+        rows = np.arange(start, start + count)
+        if rows_filter is not None:
+            keep = rows % N_SOURCES == rows_filter
+            scores, rows = scores[:, keep], rows[keep]
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_rows = np.concatenate([best_rows, np.broadcast_to(rows, scores.shape)], axis=1)
+        top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, top, axis=1)
+        best_rows = np.take_along_axis(merged_rows, top, axis=1)
+    # With a filter, fewer than k rows may match; drop the padding so recall is
+    # measured against the rows that exist.
+    return [
+        set(rows[np.isfinite(scores) & (rows >= 0)].tolist())
+        for rows, scores in zip(best_rows, best_scores)
+    ]
+
+
+def build(backend: VectorBackend, size: int, dim: int, centers: np.ndarray, seed: int) -> float:
+    started = time.perf_counter()
+    for start in range(0, size, BATCH_SIZE):
+        count = min(BATCH_SIZE, size - start)
+        rows = range(start, start + count)
+        backend.upsert(
+            ids=[str(r) for r in rows],
+            documents=[f"chunk {r}" for r in rows],
+            metadatas=[{"source": source_of(r), "start_line": r % 500} for r in rows],
+            embeddings=list(make_batch(start, count, dim, centers, seed)),
+        )
+    backend.persist()
+    return time.perf_counter() - started
+
+
+def measure_queries(backend: VectorBackend, queries: np.ndarray, k: int, truth: List[Set[int]],
+                    where: Optional[Dict] = None) -> Dict[str, float]:
+    latencies = []
+    recall = 0.0
+    backend.query(queries[0], k, where=where)  # warm-up
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        matches = backend.query(query, k, where=where)
+        latencies.append(time.perf_counter() - started)
+        recall += len({int(m.id) for m in matches} & expected) / max(1, len(expected))
+    latencies.sort()
+    return {
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "recall": recall / len(queries),
+    }
+
+
+def directory_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+def import_time(module: str) -> float:
+    """Seconds to import a module, with everything it pulls in, in a fresh interpreter."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [sys.path[0], os.environ.get("PYTHONPATH")]))}
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env).stdout
+    return float(output.strip())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated numbers of chunks.")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--chroma-max", type=int, default=100_000, help="Largest size Chroma is built at.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="Where the indexes are built (default: a temporary directory).")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    rng = np.random.default_rng(args.seed)
+    centers = rng.standard_normal((N_CLUSTERS, args.dim)).astype(np.float32)
+    queries = (centers[rng.integers(0, N_CLUSTERS, args.queries)]
+               + 0.35 * rng.standard_normal((args.queries, args.dim))).astype(np.float32)
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="aida-vector-bench-"))
+
+    print(f"import time: chroma backend {import_time('aida.rag.backends.chroma_backend'):.2f}s, "
+          f"numpy backend {import_time('aida.rag.backends.numpy_backend'):.2f}s")
+    header = f"{'backend':<8} {'chunks':>9} {'build s':>9} {'open s':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7} " \
+             f"{'filt p50':>9} {'filt rec':>9} {'disk MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for size in sizes:
+        truth = exact_top_k(size, args.dim, centers, args.seed, queries, args.k)
+        filtered_truth = exact_top_k(size, args.dim, centers, args.seed, queries, args.k, rows_filter=7)
+        for name in ("numpy", "chroma"):
+            if name == "chroma" and size > args.chroma_max:
+                print(f"{name:<8} {size:>9} skipped (raise --chroma-max to include)")
+                continue
+            path = workdir / f"{name}-{size}"
+            shutil.rmtree(path, ignore_errors=True)
+            build_seconds = build(create_backend(name, str(path)), size, args.dim, centers, args.seed)
+            started = time.perf_counter()
+            backend = create_backend(name, str(path))
+            open_seconds = time.perf_counter() - started
+            plain = measure_queries(backend, queries, args.k, truth)
+            filtered = measure_queries(backend, queries, args.k, filtered_truth, where={"source": source_of(7)})
+            print(f"{name:<8} {size:>9} {build_seconds:>9.2f} {open_seconds:>8.3f} {plain['p50_ms']:>8.2f} "
+                  f"{plain['p95_ms']:>8.2f} {plain['recall']:>7.3f} {filtered['p50_ms']:>9.2f} "
+                  f"{filtered['recall']:>9.3f} {directory_size(path) / 1e6:>8.1f}")
+            del backend
+            shutil.rmtree(path, ignore_errors=True)
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,10 @@
 
 from dependency_injector import containers, providers
 from pathlib import Path
-# 修正: ChromaDBネイティブのOllama埋め込み関数をインポート
-from chromadb.utils.embedding_functions import OllamaEmbeddingFunction
 from aida.llm_client import LLMClient
-from aida.rag import VectorStore, RetrievalAgent, IndexingAgent
+from aida.llm_pool import OllamaHostPool
+from aida.services import DiskCache, ContextPacker, TokenCounter, Telemetry, ModelWarmer, WorkspaceWatcher
+from aida.rag import RetrievalAgent, IndexingAgent, QueryCache, ProjectIndexRegistry
 from aida.agents import (
     PlanningAgent,
     CodingAgent,
@@ -18,9 +18,23 @@ from aida.agents import (
     ExecutionAgent,
     WebSearchAgent,
     GitAgent, # GitAgentをインポート
+    RefactoringAgent,
+    ArchitectureAgent,
 )
 from aida.orchestrator import Orchestrator
 
+
+# chromadb is slow to import, so it is loaded only when an embedding function is created.
+def _ollama_embedding_function(model_name: str, url: str):
+    from chromadb.utils.embedding_functions import OllamaEmbeddingFunction
+    return OllamaEmbeddingFunction(model_name=model_name, url=url)
+
+
+def _cached_embedding_function(**kwargs):
+    from aida.rag.embedding_cache import CachedEmbeddingFunction
+    return CachedEmbeddingFunction(**kwargs)
+
+
 class Container(containers.DeclarativeContainer):
     """
     The main dependency injection container for the AIDA application.
@@ -32,36 +46,158 @@ class Container(containers.DeclarativeContainer):
     )
 
     # --- LLM Client ---
-    llm_client = providers.Singleton(
+    llm_cache_path = providers.Object(str(Path(__file__).parent / "aida_cache" / "llm_responses.sqlite3"))
+    llm_cache = providers.Singleton(
+        DiskCache,
+        path=llm_cache_path,
+        max_entries=config.llm.cache.max_entries,
+        max_size_mb=config.llm.cache.max_size_mb,
+    )
+
+    metrics_dir = providers.Object(str(Path(__file__).parent / "aida_cache" / "metrics"))
+    telemetry = providers.Singleton(
+        Telemetry,
+        metrics_dir=metrics_dir,
+        enabled=config.telemetry.enabled,
+    )
+
+    token_counter = providers.Singleton(
+        TokenCounter,
+        model=config.llm.model,
+        chars_per_token=config.context.chars_per_token,
+    )
+
+    llm_pool = providers.Singleton(
+        OllamaHostPool.from_config,
+        llm_config=config.llm,
+    )
+
+    # One client per model tier; all tiers share the host pool and the response cache.
+    llm_client_large = providers.Singleton(
+        LLMClient,
+        llm_config=config.llm,
+        pool=llm_pool,
+        cache=llm_cache,
+        telemetry=telemetry,
+        token_counter=token_counter,
+        tier="large",
+    )
+
+    llm_client_small = providers.Singleton(
         LLMClient,
         llm_config=config.llm,
+        pool=llm_pool,
+        cache=llm_cache,
+        telemetry=telemetry,
+        token_counter=token_counter,
+        tier="small",
+        fallback=llm_client_large, # スキーマ検証に失敗したら大きいモデルで1回だけ再試行
+    )
+
+    # Each agent's client is chosen by its tier name in llm.agents.
+    planning_llm = providers.Selector(config.llm.agents.planning, small=llm_client_small, large=llm_client_large)
+    coding_llm = providers.Selector(config.llm.agents.coding, small=llm_client_small, large=llm_client_large)
+    debugging_llm = providers.Selector(config.llm.agents.debugging, small=llm_client_small, large=llm_client_large)
+    refactoring_llm = providers.Selector(config.llm.agents.refactoring, small=llm_client_small, large=llm_client_large)
+    architecture_llm = providers.Selector(config.llm.agents.architecture, small=llm_client_small, large=llm_client_large)
+
+    model_warmer = providers.Singleton(
+        ModelWarmer,
+        pool=llm_pool,
+        llm_config=config.llm,
+        embedding_model=config.rag.embedding_model,
+        embedding_host=config.llm.host,
+        enabled=config.warmup.enabled,
+        timeout=config.warmup.timeout,
+    )
+
+    # Started by the orchestrator once the project is set up.
+    workspace_watcher = providers.Singleton(
+        WorkspaceWatcher,
+        enabled=config.watcher.enabled,
+        mode=config.watcher.mode,
+        debounce=config.watcher.debounce,
+        max_delay=config.watcher.max_delay,
+        poll_interval=config.watcher.poll_interval,
+    )
+
+    # --- Prompt Assembly ---
+
+    context_packer = providers.Singleton(
+        ContextPacker,
+        token_counter=token_counter,
+        budgets=config.context.budgets,
+        default_budget=config.context.default_budget,
     )
 
     # --- RAG Components ---
     # 修正: ChromaDBのOllamaEmbeddingFunctionを使用して、互換性の問題を解決
-    embedding_function = providers.Singleton(
-        OllamaEmbeddingFunction,
+    ollama_embedding_function = providers.Singleton(
+        _ollama_embedding_function,
         model_name=config.rag.embedding_model,
         url=config.llm.host,
     )
 
-    vector_store_path = providers.Object(str(Path(__file__).parent / "aida_vectordb"))
-    vector_store = providers.Singleton(
-        VectorStore,
-        db_path=vector_store_path,
-        embedding_function=embedding_function, # Inject the embedding function
+    embedding_cache = providers.Singleton(
+        DiskCache,
+        path=providers.Object(str(Path(__file__).parent / "aida_cache" / "embeddings.sqlite3")),
+        max_entries=config.rag.embedding_cache.max_entries,
+        max_size_mb=config.rag.embedding_cache.max_size_mb,
     )
-    
+
+    # Identical chunk texts are embedded once and served from disk afterwards.
+    embedding_function = providers.Singleton(
+        _cached_embedding_function,
+        embedding_function=ollama_embedding_function,
+        cache=embedding_cache,
+        model_name=config.rag.embedding_model,
+        enabled=config.rag.embedding_cache.enabled,
+    )
+
+    # Shared by every RetrievalAgent, so agents of one task reuse each other's results.
+    query_cache = providers.Singleton(
+        QueryCache,
+        max_entries=config.rag.query_cache.max_entries,
+        enabled=config.rag.query_cache.enabled,
+    )
+
+    # Created per project by the registry, which passes the project's vector store, manifest and lexical index.
     retrieval_agent = providers.Factory(
         RetrievalAgent,
-        vector_store=vector_store
+        hybrid=config.rag.hybrid,
+        query_cache=query_cache,
+        mmr=config.rag.mmr,
     )
     
     indexing_agent = providers.Factory(
         IndexingAgent,
-        vector_store=vector_store,
         chunk_size=config.rag.chunk_size,
         chunk_overlap=config.rag.chunk_overlap,
+        pipeline=config.rag.indexing,
+        code_chunking=config.rag.code_chunking,
+        compaction=config.rag.compaction,
+    )
+
+    # One index per project root (a namespaced collection, manifest, lexical index and symbol table),
+    # persisted across runs; the most recently used ones stay loaded so switching projects is instant.
+    vector_store_path = providers.Object(str(Path(__file__).parent / "aida_vectordb"))
+    project_registry = providers.Singleton(
+        ProjectIndexRegistry,
+        db_path=vector_store_path,
+        embedding_function=embedding_function, # Inject the embedding function
+        indexing_agent_factory=indexing_agent.provider,
+        retrieval_agent_factory=retrieval_agent.provider,
+        backend=config.rag.vector_store.backend,
+        backend_options=config.rag.vector_store.options,
+        manifest_settings=providers.Dict(
+            embedding_model=config.rag.embedding_model,
+            chunk_size=config.rag.chunk_size,
+            chunk_overlap=config.rag.chunk_overlap,
+            code_chunking=config.rag.code_chunking,
+            vector_store_backend=config.rag.vector_store.backend,
+        ),
+        max_loaded=config.projects.max_loaded,
+        max_memory_mb=config.projects.max_memory_mb,
     )
 
     # --- Core Agents ---
@@ -74,19 +210,32 @@ class Container(containers.DeclarativeContainer):
 
     debugging_agent = providers.Factory(
         DebuggingAgent,
-        llm_client=llm_client,
-        retrieval_agent=retrieval_agent,
+        llm_client=debugging_llm,
+        context_packer=context_packer, # The orchestrator binds the project's retrieval agent and symbol index.
     )
 
     coding_agent = providers.Factory(
         CodingAgent,
-        llm_client=llm_client,
-        retrieval_agent=retrieval_agent,
+        llm_client=coding_llm,
+        context_packer=context_packer, # The orchestrator binds the project's retrieval agent and symbol index.
     )
 
     planning_agent = providers.Factory(
         PlanningAgent,
-        llm_client=llm_client
+        llm_client=planning_llm,
+        context_packer=context_packer,
+    )
+
+    refactoring_agent = providers.Factory(
+        RefactoringAgent,
+        llm_client=refactoring_llm,
+        context_packer=context_packer,
+    )
+
+    architecture_agent = providers.Factory(
+        ArchitectureAgent,
+        llm_client=architecture_llm,
+        context_packer=context_packer,
     )
 
     # --- Orchestrator ---
@@ -95,12 +244,15 @@ class Container(containers.DeclarativeContainer):
         planning_agent=planning_agent,
         coding_agent=coding_agent,
         analysis_agent=analysis_agent,
-        indexing_agent=indexing_agent,
         testing_agent=testing_agent,
         debugging_agent=debugging_agent,
         search_agent=search_agent,
         execution_agent=execution_agent,
         web_search_agent=web_search_agent,
         git_agent=git_agent, # GitAgentをOrchestratorに注入
-        max_retries=config.max_retries
+        max_retries=config.max_retries,
+        telemetry=telemetry,
+        model_warmer=model_warmer,
+        workspace_watcher=workspace_watcher,
+        project_registry=project_registry,
     )
\ No newline at end of file
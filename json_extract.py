@@ -0,0 +1,224 @@
+# path: aida/json_extract.py
+# title: Tolerant JSON Extractor
+# role: Finds, repairs and ranks the JSON values embedded in a raw LLM response.
+
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# The scanner only visits brackets and quotes; everything else, including the
+# body of each string, is skipped by the regex engine. This keeps the scan linear
+# and fast on long responses full of code.
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+_CONTROL_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t", "\b": "\\b", "\f": "\\f"}
+
+
+@dataclass
+class JSONCandidate:
+    """
+    A JSON value found in a response.
+
+    Attributes:
+        start: The offset of the opening brace or bracket in the response.
+        end: The offset just past the closing brace or bracket (or the end of
+            the response for a truncated value).
+        text: The JSON text, after repair if a repair was needed.
+        value: The decoded value, if it could be decoded.
+        parsed: Whether the text decodes as JSON.
+        repaired: Whether the text had to be repaired to decode.
+        truncated: Whether the value was still open at the end of the response.
+        fit: The overlap between the value's keys and the schema's fields (0 to 1).
+        model: The validated schema instance, if the value validates.
+        error: Why the candidate could not be decoded or validated.
+    """
+    start: int
+    end: int
+    text: str
+    value: Any = None
+    parsed: bool = False
+    repaired: bool = False
+    truncated: bool = False
+    fit: float = 0.0
+    model: Optional[BaseModel] = None
+    error: Optional[str] = None
+
+    @property
+    def valid(self) -> bool:
+        """Whether the candidate validates against the schema it was ranked for."""
+        return self.model is not None
+
+    def rank_key(self) -> Tuple[bool, float, bool, bool, int]:
+        return (self.valid, self.fit, self.parsed, not self.repaired, self.end - self.start)
+
+
+def scan_json_spans(text: str) -> List[Tuple[int, int, bool]]:
+    """
+    Finds the spans of all top-level JSON objects and arrays in a single pass.
+
+    Brackets are matched with a stack; quotes and backslash escapes are tracked
+    inside a value so that brackets in string content (e.g. code) are ignored.
+    Text outside any value, such as prose around the JSON, is skipped. If a value
+    is still open at the end of the text, it is returned as truncated, together
+    with the complete values nested inside it.
+
+    Returns:
+        (start, end, truncated) tuples in document order.
+    """
+    spans: List[Tuple[int, int, bool]] = []
+    # Each frame holds the opener, its offset and the complete values directly inside it.
+    stack: List[Tuple[str, int, List[Tuple[int, int, bool]]]] = []
+    pos = 0
+
+    while True:
+        match = _STRUCTURAL.search(text, pos)
+        if match is None:
+            break
+        i = match.start()
+        ch = text[i]
+        pos = i + 1
+        if ch == '"':
+            # Quotes only start strings inside a value; in prose they are ignored.
+            if stack:
+                rest = _STRING_REST.match(text, pos)
+                if rest is None:
+                    break
+                pos = rest.end()
+        elif ch in "{[":
+            stack.append((ch, i, []))
+        elif stack and _CLOSERS[stack[-1][0]] == ch:
+            _, start, _ = stack.pop()
+            span = (start, i + 1, False)
+            (stack[-1][2] if stack else spans).append(span)
+        # A closer that does not match the innermost opener is ignored.
+
+    if stack:
+        spans.append((stack[0][1], len(text), True))
+        for _, _, children in stack:
+            spans.extend(children)
+        spans.sort()
+    return spans
+
+
+def repair_json(text: str) -> str:
+    """
+    Fixes common defects of model-written JSON in one string-aware pass:
+    raw control characters (e.g. newlines in code `content`) are escaped,
+    repeated commas and trailing commas before a closing bracket are removed,
+    and an unterminated string and any unclosed containers are closed.
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = False
+    escape = False
+    trailing_comma = -1
+
+    for ch in text:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            elif ch < " ":
+                ch = _CONTROL_ESCAPES.get(ch, f"\\u{ord(ch):04x}")
+            out.append(ch)
+            continue
+
+        if ch in " \t\r\n":
+            out.append(ch)
+            continue
+        if ch in "}]":
+            if trailing_comma != -1:
+                out[trailing_comma] = ""
+            if stack and stack[-1] == ch:
+                stack.pop()
+        elif ch in "{[":
+            stack.append(_CLOSERS[ch])
+        elif ch == '"':
+            in_string = True
+        elif ch == "," and trailing_comma != -1:
+            continue
+        trailing_comma = len(out) if ch == "," else -1
+        out.append(ch)
+
+    if in_string:
+        if escape:
+            out.pop()
+        out.append('"')
+    if trailing_comma != -1:
+        out[trailing_comma] = ""
+    out.extend(reversed(stack))
+    return "".join(out)
+
+
+def schema_fit(value: Any, schema: Optional[Type[BaseModel]]) -> float:
+    """Returns the Jaccard overlap between an object's keys and the schema's field names."""
+    if schema is None or not isinstance(value, dict) or not value:
+        return 0.0
+    fields = {f.alias or name for name, f in schema.model_fields.items()}
+    keys = set(value)
+    return len(keys & fields) / len(keys | fields)
+
+
+def find_json_candidates(text: str) -> List[JSONCandidate]:
+    """
+    Decodes every top-level JSON value in the text, repairing those that do not
+    decode as-is. Candidates are returned in document order.
+    """
+    candidates: List[JSONCandidate] = []
+    for start, end, truncated in scan_json_spans(text):
+        snippet = text[start:end]
+        candidate = JSONCandidate(start=start, end=end, text=snippet, truncated=truncated)
+        try:
+            candidate.value = json.loads(snippet)
+            candidate.parsed = True
+        except json.JSONDecodeError as e:
+            repaired = repair_json(snippet)
+            try:
+                candidate.value = json.loads(repaired)
+                candidate.text = repaired
+                candidate.parsed = candidate.repaired = True
+            except json.JSONDecodeError:
+                candidate.error = f"The response is not valid JSON: {e}"
+        candidates.append(candidate)
+    return candidates
+
+
+def extract_json(text: str, schema: Optional[Type[BaseModel]] = None) -> List[JSONCandidate]:
+    """
+    Returns all JSON values in the text, best first.
+
+    Candidates that validate against the schema rank first, then those whose
+    keys best match the schema's fields, then values that decoded without
+    repair, and finally larger values before smaller ones.
+
+    Args:
+        text: The raw model response.
+        schema: An optional pydantic model used to validate and rank the candidates.
+    """
+    candidates = find_json_candidates(text)
+    if schema is not None:
+        for candidate in candidates:
+            if not candidate.parsed:
+                continue
+            candidate.fit = schema_fit(candidate.value, schema)
+            try:
+                candidate.model = schema.model_validate(candidate.value)
+            except ValidationError as e:
+                candidate.error = f"The JSON does not match the '{schema.__name__}' schema: {e}"
+    candidates.sort(key=JSONCandidate.rank_key, reverse=True)
+    return candidates
+
+
+def best_json(text: str, schema: Optional[Type[BaseModel]] = None) -> Optional[JSONCandidate]:
+    """Returns the highest-ranked JSON value in the text, or None if there is none."""
+    candidates = extract_json(text, schema)
+    return candidates[0] if candidates else None
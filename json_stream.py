@@ -0,0 +1,150 @@
+# path: aida/json_stream.py
+# title: Incremental JSON Parser
+# role: Parses a JSON document as it is streamed from the LLM and emits list items as soon as they close.
+
+import json
+from typing import Any, List, Optional
+
+
+class JSONStreamAborted(Exception):
+    """
+    Raised when a streamed response can no longer turn into the expected JSON document.
+    """
+
+
+class IncrementalJSONParser:
+    """
+    A character-level scanner that consumes a JSON document chunk by chunk.
+
+    The scanner tracks nesting and string/escape state without building a full
+    parse tree. Whenever an element of the target list closes, it is decoded and
+    returned from `feed`. The target list is either the value of `item_key` in the
+    root object (e.g. "steps" in a Plan) or the root itself if the root is an array.
+    """
+    def __init__(self, item_key: Optional[str] = None, max_preamble_chunks: int = 200):
+        """
+        Initializes the parser.
+
+        Args:
+            item_key: The key of the list in the root object whose items should be emitted.
+            max_preamble_chunks: How many chunks (roughly tokens) may arrive before the
+                first opening brace or bracket. Beyond this the stream is considered prose.
+        """
+        self.item_key = item_key
+        self.max_preamble_chunks = max_preamble_chunks
+        self.buffer = ""
+        self.chunks_seen = 0
+        self.root_start = -1
+        self.root_end = -1
+
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._pending_key: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._in_target = False
+        self._item_start = -1
+
+    @property
+    def started(self) -> bool:
+        """Whether the root JSON value has been opened."""
+        return self.root_start != -1
+
+    @property
+    def complete(self) -> bool:
+        """Whether the root JSON value has been closed."""
+        return self.root_end != -1
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Consumes the next chunk of the response.
+
+        Returns:
+            The decoded list items that were completed by this chunk.
+
+        Raises:
+            JSONStreamAborted: If no JSON value has started within the preamble limit.
+        """
+        self.chunks_seen += 1
+        self.buffer += chunk
+        items: List[Any] = []
+
+        while self._pos < len(self.buffer) and not self.complete:
+            self._scan_char(self._pos, items)
+            self._pos += 1
+
+        if not self.started and self.chunks_seen > self.max_preamble_chunks:
+            raise JSONStreamAborted(
+                f"No JSON value started after {self.chunks_seen} chunks; the response is not JSON."
+            )
+        return items
+
+    def document(self) -> str:
+        """
+        Returns the root JSON value seen so far, or the whole buffer if none has started.
+        """
+        if not self.started:
+            return self.buffer
+        end = self.root_end + 1 if self.complete else len(self.buffer)
+        return self.buffer[self.root_start:end]
+
+    def _scan_char(self, i: int, items: List[Any]) -> None:
+        """Advances the scanner state by a single character."""
+        ch = self.buffer[i]
+
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if len(self._stack) == 1 and self._stack[0] == "{":
+                    self._pending_key = self.buffer[self._string_start + 1:i]
+            return
+
+        if not self.started:
+            if ch in "{[":
+                self.root_start = i
+                self._stack.append(ch)
+                self._in_target = ch == "[" and self.item_key is None
+            return
+
+        if ch == '"':
+            self._in_string = True
+            self._string_start = i
+        elif ch == ":" and len(self._stack) == 1:
+            self._current_key = self._pending_key
+        elif ch in "{[":
+            self._stack.append(ch)
+            if (len(self._stack) == 2 and ch == "[" and self._stack[0] == "{"
+                    and self.item_key is not None and self._current_key == self.item_key):
+                self._in_target = True
+            elif self._in_target and self._item_start == -1 and len(self._stack) == self._item_depth():
+                self._item_start = i
+        elif ch in "}]":
+            if self._in_target and self._item_start != -1 and len(self._stack) == self._item_depth():
+                item = self._decode(self.buffer[self._item_start:i + 1])
+                if item is not None:
+                    items.append(item)
+                self._item_start = -1
+            if self._stack:
+                self._stack.pop()
+            if self._in_target and len(self._stack) < self._item_depth() - 1:
+                self._in_target = False
+            if not self._stack:
+                self.root_end = i
+
+    def _item_depth(self) -> int:
+        """The stack depth at which items of the target list are opened."""
+        return 2 if self.item_key is None else 3
+
+    @staticmethod
+    def _decode(text: str) -> Any:
+        """Decodes a single completed item, tolerating raw control characters in strings."""
+        try:
+            return json.loads(text, strict=False)
+        except json.JSONDecodeError:
+            return None
@@ -2,80 +2,527 @@
 # title: Large Language Model Client
 # role: Interacts with the LLM provider to generate text and structured data.
 
+import asyncio
+import hashlib
 import json
-from typing import Type, TypeVar, Optional, Dict, Any
-from langchain_ollama import ChatOllama
+import queue
+import time
+from contextlib import closing
+from typing import (
+    Type, TypeVar, Optional, Dict, Any, AsyncIterator, Coroutine, Generator, Iterator, List, Tuple,
+    TYPE_CHECKING, get_args, get_origin,
+)
 from pydantic import BaseModel, ValidationError
-from .utils import clean_json_response
+from .json_stream import IncrementalJSONParser, JSONStreamAborted
+from .llm_pool import OllamaHostPool
+from .services.telemetry import LLMCallRecord
+from .json_extract import extract_json
+
+if TYPE_CHECKING:
+    from aida.services import DiskCache, Telemetry, TokenCounter
 
 T = TypeVar("T", bound=BaseModel)
+R = TypeVar("R")
+
+REPAIR_PROMPT_TEMPLATE = """
+Your previous response could not be used because it is not valid `{schema_name}` JSON.
+
+**Error:**
+{error}
+
+Respond again with ONLY the corrected JSON object. It must conform to this JSON schema:
+{schema}
+"""
+
 
 class LLMClient:
     """
     A client for interacting with a large language model provider.
     This class supports generating structured JSON output.
+    Responses can be persisted in an on-disk cache so that identical
+    requests are answered without a model round trip.
+
+    Requests are sent to the Ollama chat API through an `OllamaHostPool`, which
+    keeps pooled keep-alive connections to one or more hosts and handles load
+    balancing, retries and hedging. For structured output, the pydantic schema
+    is passed to Ollama's `format` parameter so decoding is constrained to valid
+    JSON, and responses that still fail validation are sent back to the model
+    for a bounded number of repair attempts. The `agenerate_*` coroutines allow
+    several agents to have requests in flight at once, bounded per host by
+    `max_concurrent_requests`; the synchronous methods are thin wrappers around them.
+
+    A client can be bound to a model tier from `llm.tiers` (e.g. a small, fast
+    model and a large, accurate one), which sets the model, its Ollama options
+    and keep_alive. A client may also have a fallback client: when its output
+    fails schema validation, the request is retried once on the fallback
+    instead of going through the repair loop.
+
+    Every call is recorded in the optional telemetry collector with the calling
+    agent, serving host, token counts, time to first token, latency, throughput,
+    parse outcome and cache hits.
     """
-    def __init__(self, llm_config: Dict[str, Any]):
+    def __init__(
+        self,
+        llm_config: Dict[str, Any],
+        cache: Optional["DiskCache"] = None,
+        telemetry: Optional["Telemetry"] = None,
+        token_counter: Optional["TokenCounter"] = None,
+        pool: Optional[OllamaHostPool] = None,
+        tier: Optional[str] = None,
+        fallback: Optional["LLMClient"] = None,
+    ):
         """
         Initializes the LLMClient from a configuration dictionary.
 
         Args:
-            llm_config: A dictionary containing LLM settings like provider, model, and host.
+            llm_config: A dictionary containing LLM settings like provider, model, and host(s).
+            cache: An optional disk cache used to store and replay responses.
+            telemetry: An optional collector that receives a record for every call.
+            token_counter: An optional token counter calibrated with the prompt
+                token counts reported by the server.
+            pool: The host pool to send requests through. If omitted, the client
+                creates and owns a pool built from `llm_config`.
+            tier: The name of an entry in `llm_config["tiers"]` whose model,
+                options and keep_alive override the top-level settings.
+            fallback: A client (usually the large tier) that receives a request
+                once when this client's output fails schema validation. Ignored
+                if `llm.escalation.enabled` is false.
         """
         provider = llm_config.get("provider")
         model = llm_config.get("model")
-        host = llm_config.get("host")
+        hosts = llm_config.get("hosts") or llm_config.get("host")
 
-        if not all([provider, model, host]):
-            raise ValueError("LLM config must include 'provider', 'model', and 'host'.")
+        if not all([provider, model, hosts]):
+            raise ValueError("LLM config must include 'provider', 'model', and 'host' or 'hosts'.")
 
         if not isinstance(provider, str) or provider.lower() != "ollama":
             raise NotImplementedError(f"Provider '{provider}' is not supported yet.")
-        
-        self.llm = ChatOllama(
-            model=str(model),
-            base_url=str(host),
+
+        tiers = llm_config.get("tiers") or {}
+        if tier is not None and tiers and tier not in tiers:
+            raise ValueError(f"LLM tier '{tier}' is not defined in 'llm.tiers'.")
+        tier_config = tiers.get(tier) or {}
+        self.tier = tier
+        self.model = str(tier_config.get("model") or model)
+        self.options: Dict[str, Any] = dict(tier_config.get("options") or llm_config.get("options") or {})
+        self.keep_alive = tier_config.get("keep_alive", llm_config.get("keep_alive"))
+
+        escalation_config = llm_config.get("escalation") or {}
+        self.fallback = fallback if escalation_config.get("enabled", True) and fallback is not self else None
+
+        cache_config = llm_config.get("cache") or {}
+        self.cache = cache if cache_config.get("enabled", True) else None
+        stream_config = llm_config.get("stream") or {}
+        self.max_preamble_tokens = int(stream_config.get("max_preamble_tokens", 200))
+        self.structured_output = bool(llm_config.get("structured_output", True))
+        self.repair_attempts = int(llm_config.get("repair_attempts", 2))
+        self.telemetry = telemetry
+        self.token_counter = token_counter
+
+        self._owns_pool = pool is None
+        self.pool = pool or OllamaHostPool.from_config(llm_config)
+        self._runner = self.pool.runner
+        print(
+            f"LLMClient initialized with provider: {provider}, model: {self.model}"
+            f"{f' (tier: {tier})' if tier else ''}, hosts: {', '.join(h.url for h in self.pool.hosts)}, "
+            f"cache: {'on' if self.cache else 'off'}"
+            f"{f', escalates to: {self.fallback.model}' if self.fallback else ''}"
         )
-        print(f"LLMClient initialized with provider: {provider}, model: {model}, host: {host}")
 
-    def generate_json(self, prompt: str, output_schema: Type[T]) -> Optional[T]:
+    def close(self) -> None:
+        """Closes the host pool if this client created it."""
+        if self._owns_pool:
+            self.pool.close()
+
+    # --- Transport ---
+
+    async def _achat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        output_format: Optional[Dict[str, Any]] = None,
+        call: Optional[LLMCallRecord] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Streams the content of a chat completion from Ollama. Runs on the pool loop.
+
+        Args:
+            messages: The chat messages to send.
+            output_format: An optional JSON schema that constrains the decoded output.
+            call: An optional record that receives timing and token counts.
+        """
+        payload: Dict[str, Any] = {
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+        }
+        if output_format is not None:
+            payload["format"] = output_format
+        if self.options:
+            payload["options"] = self.options
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        sent_at = time.perf_counter()
+        async for host, data in self.pool.stream("/api/chat", payload):
+            if "error" in data:
+                raise RuntimeError(f"Ollama error: {data['error']}")
+            content = data.get("message", {}).get("content", "")
+            if content:
+                if call is not None and call.ttft_s is None:
+                    call.ttft_s = time.perf_counter() - sent_at
+                yield content
+            if data.get("done"):
+                if call is not None:
+                    call.host = host
+                self._record_usage(call, messages, data)
+                break
+
+    def _record_usage(self, call: Optional[LLMCallRecord], messages: List[Dict[str, str]], done: Dict[str, Any]) -> None:
+        """
+        Copies the token counts of Ollama's final chunk into the call record and
+        calibrates the token counter against the real prompt size.
+        """
+        prompt_tokens = int(done.get("prompt_eval_count") or 0)
+        if call is not None:
+            call.prompt_tokens += prompt_tokens
+            call.completion_tokens += int(done.get("eval_count") or 0)
+            call.generation_s += (done.get("eval_duration") or 0) / 1e9
+        if self.token_counter is not None and prompt_tokens:
+            self.token_counter.calibrate(sum(len(m["content"]) for m in messages), prompt_tokens)
+
+    async def _achat(
+        self,
+        messages: List[Dict[str, str]],
+        output_format: Optional[Dict[str, Any]] = None,
+        call: Optional[LLMCallRecord] = None,
+    ) -> str:
+        """Returns the full content of a chat completion. Runs on the pool loop."""
+        parts = [part async for part in self._achat_stream(messages, output_format, call)]
+        return "".join(parts)
+
+    def _output_format(self, output_schema: Type[BaseModel]) -> Optional[Dict[str, Any]]:
+        """Returns the JSON schema passed to Ollama's `format` parameter, if enabled."""
+        return output_schema.model_json_schema() if self.structured_output else None
+
+    async def _on_client_loop(self, coro: Coroutine[Any, Any, R]) -> R:
+        """Awaits a coroutine on the pool loop from whichever loop the caller runs on."""
+        return await asyncio.wrap_future(self._runner.submit(coro))
+
+    # --- Telemetry helpers ---
+
+    def _start_call(self, agent: Optional[str], kind: str) -> LLMCallRecord:
+        """Creates the record for a new call."""
+        return LLMCallRecord(agent=agent or "unknown", model=self.model, kind=kind, tier=self.tier)
+
+    def _finish_call(self, call: LLMCallRecord) -> None:
+        """Stamps the call's latency and hands it to the telemetry collector."""
+        call.finish()
+        if self.telemetry is not None:
+            self.telemetry.record(call)
+
+    # --- Cache helpers ---
+
+    def _cache_key(self, prompt: str, output_schema: Optional[Type[BaseModel]]) -> str:
+        """
+        Builds a content-addressed cache key from the model, its options, the prompt and the output schema.
+        """
+        schema = output_schema.model_json_schema() if output_schema else None
+        payload = json.dumps(
+            {"model": self.model, "options": self.options, "prompt": prompt, "schema": schema}, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, key: str, use_cache: bool) -> Optional[str]:
+        """Returns the cached raw response for the key, if caching applies to this call."""
+        if not self.cache or not use_cache:
+            return None
+        cached = self.cache.get(key)
+        return cached.decode("utf-8") if cached is not None else None
+
+    def _cache_put(self, key: str, raw_response: str) -> None:
+        """Stores a raw response. Bypassed calls still refresh the entry."""
+        if self.cache:
+            self.cache.put(key, raw_response.encode("utf-8"))
+
+    def _parse_json(self, raw_response_content: str, output_schema: Type[T]) -> Optional[T]:
+        """
+        Extracts, decodes and validates the JSON object contained in a raw LLM response.
+        """
+        result, error = self._try_parse_json(raw_response_content, output_schema)
+        if error:
+            print(f"[LLMClient] {error}")
+            print(f"--- Raw Response ---\n{raw_response_content}\n--------------------")
+        return result
+
+    @staticmethod
+    def _try_parse_json(raw_response_content: str, output_schema: Type[T]) -> Tuple[Optional[T], Optional[str]]:
+        """
+        Parses a raw response, returning either the validated model or a description
+        of why it could not be used. The description is suitable for a repair prompt.
+
+        All JSON values in the response are considered, so surrounding prose, a
+        second object or brackets inside code content do not hide a valid answer.
+        """
+        candidates = extract_json(raw_response_content, output_schema)
+        if not candidates:
+            return None, "No JSON object was found in the response."
+        best = candidates[0]
+        model = best.model if isinstance(best.model, output_schema) else None
+        return model, best.error
+
+    # --- Async API ---
+
+    async def agenerate_json(
+        self, prompt: str, output_schema: Type[T], use_cache: bool = True, agent: Optional[str] = None
+    ) -> Optional[T]:
         """
         Generates a structured JSON response by parsing the raw text output from the LLM.
+
+        Args:
+            prompt: The prompt to send to the model.
+            output_schema: The pydantic model the response must validate against.
+            use_cache: If False, the cache lookup is skipped and a fresh response is
+                requested. A valid fresh response still replaces the cached entry.
+            agent: The name of the calling agent, used for telemetry.
         """
+        call = self._start_call(agent, "json")
         try:
-            raw_response_content = self.llm.invoke(prompt).content
-            assert isinstance(raw_response_content, str), "LLM response content should be a string"
-            json_str = clean_json_response(raw_response_content)
-            
-            if not json_str:
-                print("[LLMClient] Error: No valid JSON found in the LLM response.")
-                print(f"--- Raw Response ---\n{raw_response_content}\n--------------------")
+            result = await self._agenerate_json(prompt, output_schema, use_cache, call)
+            call.parse_ok = result is not None
+            call.escalated = result is None and call.error is None and self.fallback is not None
+        finally:
+            self._finish_call(call)
+
+        if call.escalated and self.fallback is not None:
+            print(f"[LLMClient] Escalating '{output_schema.__name__}' from {self.model} to {self.fallback.model}.")
+            return await self.fallback.agenerate_json(prompt, output_schema, use_cache=use_cache, agent=agent)
+        return result
+
+    async def _agenerate_json(
+        self, prompt: str, output_schema: Type[T], use_cache: bool, call: LLMCallRecord
+    ) -> Optional[T]:
+        key = self._cache_key(prompt, output_schema)
+        cached = self._cache_get(key, use_cache)
+        if cached is not None:
+            result, _ = self._try_parse_json(cached, output_schema)
+            if result is not None:
+                call.cache_hit = True
+                return result
+
+        output_format = self._output_format(output_schema)
+        messages = [{"role": "user", "content": prompt}]
+        # With a fallback, a failed validation escalates instead of entering the repair loop.
+        max_attempts = 1 if self.fallback is not None else self.repair_attempts + 1
+        for attempt in range(max_attempts):
+            call.attempts = attempt + 1
+            try:
+                raw_response_content = await self._on_client_loop(self._achat(messages, output_format, call))
+            except Exception as e:
+                print(f"[LLMClient] An unexpected error occurred in generate_json: {e}")
+                call.error = str(e)
                 return None
-            
-            parsed_json = json.loads(json_str)
-            return output_schema.model_validate(parsed_json)
 
-        except json.JSONDecodeError as e:
-            print(f"[LLMClient] Error decoding JSON from LLM response: {e}")
-            print(f"--- Cleaned JSON String ---\n{json_str}\n-------------------------")
-            return None
-        except ValidationError as e:
-            print(f"[LLMClient] Error validating JSON against schema '{output_schema.__name__}': {e}")
-            print(f"--- Parsed JSON ---\n{parsed_json}\n-------------------")
-            return None
-        except Exception as e:
-            print(f"[LLMClient] An unexpected error occurred in generate_json: {e}")
-            return None
+            result, error = self._try_parse_json(raw_response_content, output_schema)
+            if result is not None:
+                self._cache_put(key, raw_response_content)
+                return result
+
+            print(f"[LLMClient] Attempt {attempt + 1}/{max_attempts} produced unusable JSON: {error}")
+            messages = messages + [
+                {"role": "assistant", "content": raw_response_content},
+                {"role": "user", "content": REPAIR_PROMPT_TEMPLATE.format(
+                    schema_name=output_schema.__name__,
+                    error=error,
+                    schema=json.dumps(output_schema.model_json_schema()),
+                )},
+            ]
 
-    def generate_text(self, prompt: str) -> str:
+        print(f"[LLMClient] Giving up on '{output_schema.__name__}' after {max_attempts} attempt(s).")
+        print(f"--- Last Raw Response ---\n{raw_response_content}\n--------------------")
+        return None
+
+    async def agenerate_text(self, prompt: str, use_cache: bool = True, agent: Optional[str] = None) -> str:
         """
         Generates a plain text response from a prompt.
+
+        Args:
+            prompt: The prompt to send to the model.
+            use_cache: If False, the cache lookup is skipped and a fresh response is requested.
+            agent: The name of the calling agent, used for telemetry.
         """
+        call = self._start_call(agent, "text")
         try:
-            response = self.llm.invoke(prompt)
-            content = response.content if hasattr(response, 'content') else ""
-            assert isinstance(content, str)
+            key = self._cache_key(prompt, None)
+            cached = self._cache_get(key, use_cache)
+            if cached is not None:
+                call.cache_hit = True
+                return cached
+
+            call.attempts = 1
+            try:
+                content = await self._on_client_loop(
+                    self._achat([{"role": "user", "content": prompt}], None, call)
+                )
+            except Exception as e:
+                print(f"[LLMClient] Error generating text: {e}")
+                call.error = str(e)
+                return ""
+
+            if content:
+                self._cache_put(key, content)
             return content
+        finally:
+            self._finish_call(call)
+
+    # --- Sync API ---
+
+    def generate_json(
+        self, prompt: str, output_schema: Type[T], use_cache: bool = True, agent: Optional[str] = None
+    ) -> Optional[T]:
+        """
+        Synchronous wrapper around `agenerate_json`.
+        """
+        return self._runner.run(self.agenerate_json(prompt, output_schema, use_cache=use_cache, agent=agent))
+
+    def generate_text(self, prompt: str, use_cache: bool = True, agent: Optional[str] = None) -> str:
+        """
+        Synchronous wrapper around `agenerate_text`.
+        """
+        return self._runner.run(self.agenerate_text(prompt, use_cache=use_cache, agent=agent))
+
+    def stream_json(
+        self, prompt: str, output_schema: Type[BaseModel], use_cache: bool = True, agent: Optional[str] = None
+    ) -> Generator[BaseModel, None, None]:
+        """
+        Streams a structured JSON response and yields the items of its list field
+        (e.g. each `Action` of a `Plan`) as soon as they are complete.
+
+        The response is consumed on the pool loop, so generation continues
+        while the caller works on the items already yielded. The request is aborted
+        early if no JSON value has started after `max_preamble_tokens` tokens.
+        The complete response is validated against `output_schema` at the end and
+        cached only if it is valid.
+
+        Args:
+            prompt: The prompt to send to the model.
+            output_schema: A pydantic model with exactly one list-of-models field.
+            use_cache: If False, the cache lookup is skipped and a fresh response is requested.
+            agent: The name of the calling agent, used for telemetry.
+
+        If the response fails validation before any item was yielded and a
+        fallback client is set, the request is streamed again from the fallback.
+        Items already handed to the caller are never replayed.
+        """
+        call = self._start_call(agent, "stream")
+        with closing(self._stream_json_once(prompt, output_schema, use_cache, call)) as items:
+            yield from items
+
+        if call.escalated and self.fallback is not None:
+            print(f"[LLMClient] Escalating '{output_schema.__name__}' stream from {self.model} to {self.fallback.model}.")
+            yield from self.fallback.stream_json(prompt, output_schema, use_cache=use_cache, agent=agent)
+
+    def _stream_json_once(
+        self, prompt: str, output_schema: Type[BaseModel], use_cache: bool, call: LLMCallRecord
+    ) -> Generator[BaseModel, None, None]:
+        """Streams a single response from this client's model, filling in the call record."""
+        item_key, item_schema = self._list_item_field(output_schema)
+        parser = IncrementalJSONParser(item_key=item_key, max_preamble_chunks=self.max_preamble_tokens)
+        key = self._cache_key(prompt, output_schema)
+        cached = self._cache_get(key, use_cache)
+        if cached is not None:
+            call.cache_hit = True
+            chunks: Iterator[str] = iter([cached])
+        else:
+            call.attempts = 1
+            chunks = self._stream_chunks(
+                [{"role": "user", "content": prompt}], self._output_format(output_schema), call
+            )
+
+        cancelled = False
+        yielded = False
+        try:
+            for chunk in chunks:
+                for item in parser.feed(chunk):
+                    try:
+                        validated = item_schema.model_validate(item)
+                    except ValidationError as e:
+                        print(f"[LLMClient] Skipping streamed item that does not match '{item_schema.__name__}': {e}")
+                        continue
+                    yielded = True
+                    yield validated
+                if parser.complete:
+                    break
+        except GeneratorExit:
+            # The caller stopped consuming; this is neither a parse failure nor an error.
+            cancelled = True
+            raise
+        except JSONStreamAborted as e:
+            print(f"[LLMClient] Aborted streaming response: {e}")
+            print(f"--- Partial Response ---\n{parser.buffer}\n--------------------")
+            call.parse_ok = False
+            return
         except Exception as e:
-            print(f"[LLMClient] Error generating text: {e}")
-            return ""
\ No newline at end of file
+            print(f"[LLMClient] An unexpected error occurred in stream_json: {e}")
+            call.error = str(e)
+            return
+        finally:
+            close = getattr(chunks, "close", None)
+            if close:
+                close()
+            if not cancelled and call.parse_ok is None and call.error is None:
+                call.parse_ok = self._parse_json(parser.buffer, output_schema) is not None if parser.complete else False
+                if call.parse_ok and cached is None:
+                    self._cache_put(key, parser.buffer)
+            call.escalated = call.parse_ok is False and not yielded and self.fallback is not None
+            self._finish_call(call)
+
+    def _stream_chunks(
+        self,
+        messages: List[Dict[str, str]],
+        output_format: Optional[Dict[str, Any]] = None,
+        call: Optional[LLMCallRecord] = None,
+    ) -> Iterator[str]:
+        """
+        Yields the content of each streamed chunk. A task on the pool loop drains
+        the model stream into a queue so the server is never blocked on the consumer.
+        Closing the iterator cancels the request.
+        """
+        chunk_queue: "queue.Queue[Any]" = queue.Queue()
+
+        async def produce() -> None:
+            try:
+                async for content in self._achat_stream(messages, output_format, call):
+                    chunk_queue.put(content)
+            except Exception as e:
+                chunk_queue.put(e)
+            finally:
+                chunk_queue.put(None)
+
+        producer = self._runner.submit(produce())
+        try:
+            while True:
+                item = chunk_queue.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+
+    @staticmethod
+    def _list_item_field(output_schema: Type[BaseModel]) -> Tuple[str, Type[BaseModel]]:
+        """
+        Finds the list-of-models field of a schema, e.g. ("steps", Action) for `Plan`.
+        """
+        for name, field in output_schema.model_fields.items():
+            if get_origin(field.annotation) is list:
+                args = get_args(field.annotation)
+                if args and isinstance(args[0], type) and issubclass(args[0], BaseModel):
+                    return name, args[0]
+        raise ValueError(f"Schema '{output_schema.__name__}' has no list-of-models field to stream.")
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Returns the hit/miss counters of the response cache, or an empty dict if caching is off.
+        """
+        return self.cache.stats() if self.cache else {}
@@ -0,0 +1,385 @@
+# path: aida/llm_pool.py
+# title: Ollama Host Pool
+# role: Routes LLM requests across several Ollama hosts with health checks, retries and hedging.
+
+import asyncio
+import concurrent.futures
+import json
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Coroutine, Deque, Dict, List, Optional, Set, Tuple, TypeVar, Union
+
+import httpx
+
+R = TypeVar("R")
+
+# Transport failures that are safe to retry on another host, as long as no
+# output has been returned to the caller yet.
+RETRYABLE_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.ReadError,
+    httpx.RemoteProtocolError,
+    httpx.PoolTimeout,
+)
+
+
+class HostUnavailableError(RuntimeError):
+    """
+    Raised when a host fails before producing any output (connection error or 5xx status).
+    """
+
+
+class EventLoopThread:
+    """
+    Runs a private asyncio event loop on a daemon thread.
+    All HTTP traffic of the pool is scheduled on this loop, so a single set of
+    pooled connections can be shared by synchronous callers on any thread and
+    by coroutines running on other event loops.
+    """
+    def __init__(self, name: str):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, coro: Coroutine[Any, Any, R]) -> "concurrent.futures.Future[R]":
+        """Schedules a coroutine on the loop and returns a thread-safe future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, R]) -> R:
+        """Runs a coroutine on the loop and blocks until it finishes."""
+        return self.submit(coro).result()
+
+    def stop(self) -> None:
+        """Stops the loop and waits for the thread to exit."""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+class OllamaHost:
+    """
+    One Ollama server in the pool, with its connection pool and routing state.
+    """
+    def __init__(self, url: str, weight: float, http: httpx.AsyncClient, max_concurrent: int):
+        self.url = url
+        self.weight = max(float(weight), 0.01)
+        self.http = http
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.outstanding = 0
+        self.healthy = True
+        self.failures = 0
+
+    def load(self) -> float:
+        """The routing score: outstanding requests relative to the host's weight."""
+        return (self.outstanding + 1) / self.weight
+
+    def mark_failed(self) -> None:
+        self.healthy = False
+        self.failures += 1
+
+    def mark_healthy(self) -> None:
+        self.healthy = True
+        self.failures = 0
+
+
+class _StreamAttempt:
+    """
+    A single streamed request to one host. The response is read by a task into
+    a queue so that competing (hedged) attempts can be raced on their first chunk.
+    """
+    def __init__(self, pool: "OllamaHostPool", host: OllamaHost, path: str, payload: Dict[str, Any]):
+        self.pool = pool
+        self.host = host
+        self.first_chunk = asyncio.Event()
+        self.error: Optional[BaseException] = None
+        self._queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._read(path, payload))
+
+    async def _read(self, path: str, payload: Dict[str, Any]) -> None:
+        host = self.host
+        host.outstanding += 1
+        started = time.perf_counter()
+        try:
+            async with host.semaphore:
+                async with host.http.stream("POST", path, json=payload) as response:
+                    if response.status_code >= 500:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        raise HostUnavailableError(f"{host.url} returned HTTP {response.status_code}: {body}")
+                    if response.status_code != 200:
+                        body = (await response.aread()).decode("utf-8", errors="replace")
+                        raise RuntimeError(f"Ollama returned HTTP {response.status_code}: {body}")
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        if not self.first_chunk.is_set():
+                            self.pool.observe_latency(time.perf_counter() - started)
+                            self.first_chunk.set()
+                        await self._queue.put(json.loads(line))
+            host.mark_healthy()
+        except asyncio.CancelledError:
+            raise
+        except RETRYABLE_ERRORS as e:
+            host.mark_failed()
+            self.error = HostUnavailableError(f"{host.url} is unreachable: {e!r}")
+        except HostUnavailableError as e:
+            host.mark_failed()
+            self.error = e
+        except BaseException as e:
+            self.error = e
+        finally:
+            host.outstanding -= 1
+            self.first_chunk.set()
+            self._queue.put_nowait(None)
+
+    async def lines(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yields the decoded response lines, raising the attempt's error if it failed."""
+        while True:
+            data = await self._queue.get()
+            if data is None:
+                if self.error is not None:
+                    raise self.error
+                return
+            yield data
+
+    def cancel(self) -> None:
+        self._task.cancel()
+
+
+class OllamaHostPool:
+    """
+    A pool of Ollama hosts shared by all LLM clients.
+
+    Requests are routed to the healthy host with the fewest outstanding
+    requests relative to its weight. Hosts that refuse connections or answer
+    with a 5xx status are marked unhealthy and the request is retried on
+    another host with exponential backoff; a background task re-checks
+    unhealthy hosts. With hedging enabled, a duplicate request is sent to a
+    second host when the first one has not produced a token within the
+    configured latency percentile, and the slower attempt is cancelled.
+    """
+    def __init__(
+        self,
+        hosts: List[Union[str, Dict[str, Any]]],
+        max_concurrent_requests: int = 2,
+        max_connections: Optional[int] = None,
+        timeout: float = 600,
+        health_check_interval: float = 30,
+        retry: Optional[Dict[str, Any]] = None,
+        hedge: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            hosts: Host URLs, or dicts with `url` and an optional `weight`.
+            max_concurrent_requests: The maximum number of in-flight requests per host.
+            max_connections: The size of each host's keep-alive connection pool.
+            timeout: The read timeout of a request, in seconds.
+            health_check_interval: Seconds between health checks of unhealthy hosts.
+            retry: `max_attempts`, `backoff_base` and `backoff_max` for connection failures.
+            hedge: `enabled`, `percentile` and `min_samples` for hedged requests.
+        """
+        if not hosts:
+            raise ValueError("At least one Ollama host must be configured.")
+        self._host_specs = [
+            (str(h).rstrip("/"), 1.0) if isinstance(h, str) else (str(h["url"]).rstrip("/"), float(h.get("weight", 1)))
+            for h in hosts
+        ]
+        self.max_concurrent_requests = int(max_concurrent_requests)
+        self.max_connections = int(max_connections or self.max_concurrent_requests * 2)
+        self.timeout = float(timeout)
+        self.health_check_interval = float(health_check_interval)
+
+        retry = retry or {}
+        self.max_attempts = int(retry.get("max_attempts", 3))
+        self.backoff_base = float(retry.get("backoff_base", 0.5))
+        self.backoff_max = float(retry.get("backoff_max", 8.0))
+
+        hedge = hedge or {}
+        self.hedge_enabled = bool(hedge.get("enabled", False))
+        self.hedge_percentile = float(hedge.get("percentile", 95))
+        self.hedge_min_samples = int(hedge.get("min_samples", 20))
+        self.hedged_requests = 0
+        self._latencies: Deque[float] = deque(maxlen=500)
+
+        self.runner = EventLoopThread(name="aida-llm-pool")
+        self.hosts: List[OllamaHost] = self.runner.run(self._open())
+        self._health_task = self.runner.submit(self._health_check_loop())
+        print(f"OllamaHostPool initialized with hosts: {', '.join(f'{h.url} (weight {h.weight:g})' for h in self.hosts)}")
+
+    @classmethod
+    def from_config(cls, llm_config: Dict[str, Any]) -> "OllamaHostPool":
+        """Builds a pool from the `llm` section of config.yml; `hosts` takes precedence over `host`."""
+        hosts = llm_config.get("hosts") or ([llm_config["host"]] if llm_config.get("host") else [])
+        return cls(
+            hosts=hosts,
+            max_concurrent_requests=llm_config.get("max_concurrent_requests", 2),
+            max_connections=llm_config.get("max_connections"),
+            timeout=llm_config.get("timeout", 600),
+            health_check_interval=llm_config.get("health_check_interval", 30),
+            retry=llm_config.get("retry"),
+            hedge=llm_config.get("hedge"),
+        )
+
+    async def _open(self) -> List[OllamaHost]:
+        """Creates each host's pooled HTTP client on the pool loop."""
+        return [
+            OllamaHost(
+                url=url,
+                weight=weight,
+                http=httpx.AsyncClient(
+                    base_url=url,
+                    timeout=httpx.Timeout(self.timeout, connect=10.0),
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                        keepalive_expiry=300.0,
+                    ),
+                ),
+                max_concurrent=self.max_concurrent_requests,
+            )
+            for url, weight in self._host_specs
+        ]
+
+    def close(self) -> None:
+        """Stops health checks, closes all connections and stops the pool loop."""
+        self._health_task.cancel()
+
+        async def close_all() -> None:
+            for host in self.hosts:
+                await host.http.aclose()
+
+        self.runner.run(close_all())
+        self.runner.stop()
+
+    # --- Routing ---
+
+    def pick(self, exclude: Optional[Set[str]] = None) -> Optional[OllamaHost]:
+        """
+        Returns the healthy host with the lowest weighted load, falling back to
+        unhealthy hosts when no healthy one is left.
+        """
+        exclude = exclude or set()
+        candidates = [h for h in self.hosts if h.url not in exclude]
+        if not candidates:
+            return None
+        healthy = [h for h in candidates if h.healthy] or candidates
+        lowest = min(h.load() for h in healthy)
+        return random.choice([h for h in healthy if h.load() == lowest])
+
+    def observe_latency(self, seconds: float) -> None:
+        """Records a time-to-first-chunk sample used for the hedging threshold."""
+        self._latencies.append(seconds)
+
+    def hedge_threshold(self) -> Optional[float]:
+        """
+        Returns the delay after which a hedged request is sent, or None if hedging
+        is disabled or there are not enough samples yet.
+        """
+        if not self.hedge_enabled or len(self.hosts) < 2 or len(self._latencies) < self.hedge_min_samples:
+            return None
+        samples = sorted(self._latencies)
+        index = min(len(samples) - 1, int(len(samples) * self.hedge_percentile / 100))
+        return samples[index]
+
+    # --- Requests ---
+
+    async def stream(self, path: str, payload: Dict[str, Any]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Streams a request and yields (host url, decoded line) pairs. Runs on the pool loop.
+
+        Connection failures before the first line are retried on another host
+        with exponential backoff. Errors after a line has been yielded are raised,
+        since retrying would replay output the caller has already consumed.
+        """
+        tried: Set[str] = set()
+        yielded = False
+        for attempt in range(self.max_attempts):
+            winner: Optional[_StreamAttempt] = None
+            try:
+                winner = await self._race(path, payload, tried)
+                async for data in winner.lines():
+                    yielded = True
+                    yield winner.host.url, data
+                return
+            except HostUnavailableError as e:
+                if yielded:
+                    raise
+                if attempt + 1 >= self.max_attempts:
+                    raise
+                if len(tried) >= len(self.hosts):
+                    tried.clear()
+                delay = min(self.backoff_max, self.backoff_base * (2 ** attempt)) * random.uniform(0.8, 1.2)
+                print(f"[OllamaHostPool] {e} Retrying in {delay:.1f}s (attempt {attempt + 2}/{self.max_attempts}).")
+                await asyncio.sleep(delay)
+            finally:
+                if winner is not None:
+                    winner.cancel()
+
+    async def _race(self, path: str, payload: Dict[str, Any], tried: Set[str]) -> _StreamAttempt:
+        """
+        Starts the request on the best host and, if hedging applies, on a second
+        host once the first has been silent past the threshold. Returns the first
+        attempt to produce output; the others are cancelled.
+        """
+        host = self.pick(exclude=tried) or self.pick()
+        assert host is not None
+        tried.add(host.url)
+        attempts = [_StreamAttempt(self, host, path, payload)]
+
+        threshold = self.hedge_threshold()
+        if threshold is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(attempts[0].first_chunk.wait()), timeout=threshold)
+            except asyncio.TimeoutError:
+                backup = self.pick(exclude={host.url})
+                if backup is not None:
+                    self.hedged_requests += 1
+                    tried.add(backup.url)
+                    attempts.append(_StreamAttempt(self, backup, path, payload))
+
+        pending = {asyncio.ensure_future(a.first_chunk.wait()): a for a in attempts}
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    attempt = pending.pop(future)
+                    if attempt.error is None or len(attempts) == 1 or not pending:
+                        for other in attempts:
+                            if other is not attempt:
+                                other.cancel()
+                        return attempt
+            raise HostUnavailableError("No host produced a response.")
+        finally:
+            for future in pending:
+                future.cancel()
+
+    # --- Health checks ---
+
+    async def check_health(self, host: OllamaHost) -> bool:
+        """Probes a host's `/api/tags` endpoint and updates its health flag."""
+        try:
+            response = await host.http.get("/api/tags", timeout=5.0)
+            if response.status_code == 200:
+                host.mark_healthy()
+                return True
+        except httpx.HTTPError:
+            pass
+        host.mark_failed()
+        return False
+
+    async def _health_check_loop(self) -> None:
+        """Periodically probes unhealthy hosts so they rejoin the rotation once they recover."""
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for host in self.hosts:
+                if not host.healthy:
+                    if await self.check_health(host):
+                        print(f"[OllamaHostPool] Host {host.url} is healthy again.")
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Returns the routing state of every host."""
+        return [
+            {"url": h.url, "weight": h.weight, "healthy": h.healthy, "outstanding": h.outstanding, "failures": h.failures}
+            for h in self.hosts
+        ]
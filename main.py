@@ -17,6 +17,7 @@ load_dotenv(dotenv_path=project_root_for_env / ".env")
 project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root))
 
+from typing import List, Optional
 from dependency_injector.wiring import inject, Provide
 from aida.container import Container
 from aida.orchestrator import Orchestrator
@@ -26,8 +27,10 @@ from aida.schemas import ProjectMetadata
 # All paths are now correctly defined relative to the 'aida' directory itself.
 AIDA_ROOT = Path(__file__).parent
 WORKSPACE_DIR = AIDA_ROOT / "workspace"
+# The vector index persists across runs and is updated incrementally at startup.
+# Pass --reindex to delete it and rebuild it from scratch.
+VECTOR_DB_DIR = AIDA_ROOT / "aida_vectordb"
 CACHE_DIRS = [
-    AIDA_ROOT / "aida_vectordb",
     AIDA_ROOT / "aida_sandbox",
 ]
 
@@ -37,15 +40,22 @@ sys.path.insert(0, str(WORKSPACE_DIR))
 # ◾️◾️◾️◾️◾️◾️◾️◾️◾️◾️◾️↑修正終わり◾️◾️◾️◾️◾️◾️◾️◾️◾️◾️◾️
 
 
-def setup_directories():
+def setup_directories(rebuild_index: bool = False):
     """
     Ensures that the workspace directory exists and clears cache directories
-    after user confirmation.
+    after user confirmation. The vector index is kept unless a rebuild is requested.
     """
     # Ensure the workspace directory exists.
     if not WORKSPACE_DIR.exists():
         print(f"[Main] Workspace directory not found. Creating at: {WORKSPACE_DIR}")
         WORKSPACE_DIR.mkdir(parents=True, exist_ok=True)
+
+    if rebuild_index and VECTOR_DB_DIR.exists():
+        try:
+            shutil.rmtree(VECTOR_DB_DIR)
+            print(f"[Main] Removed the vector index for a full rebuild: {VECTOR_DB_DIR}")
+        except OSError as e:
+            print(f"Error removing directory {VECTOR_DB_DIR}: {e}")
     
     # --- Confirmation before cleaning up cache ---
     dirs_to_clean = [d for d in CACHE_DIRS if d.exists()]
@@ -75,6 +85,54 @@ def setup_directories():
         print("\n--- No cache directories to clean. ---")
 
 
+def parse_project_roots(argv: List[str], configured: List[str]) -> List[Path]:
+    """
+    Returns the project roots AIDA can work on: those given with `--project PATH`
+    (repeatable) followed by `projects.roots` from the config, or the workspace
+    directory if there are none. The first one is opened at startup.
+    """
+    roots = [argv[i + 1] for i, arg in enumerate(argv[:-1]) if arg == "--project"]
+    roots += [str(root) for root in configured or []]
+    resolved: List[Path] = []
+    for root in roots:
+        path = Path(root).expanduser().resolve()
+        if not path.is_dir():
+            print(f"[Main] Project root not found, skipping: {path}")
+        elif path not in resolved:
+            resolved.append(path)
+    return resolved or [WORKSPACE_DIR]
+
+
+def print_projects(orchestrator: Orchestrator, roots: List[Path], current: Path):
+    """
+    Lists the project roots, marking the current one and those whose index is loaded.
+    """
+    loaded = {Path(project.root) for project in orchestrator.project_registry.loaded()} if orchestrator.project_registry else set()
+    print("Projects (switch with '/project <number or path>'):")
+    for number, root in enumerate(roots, start=1):
+        marker = "*" if root == current else " "
+        state = " [loaded]" if root in loaded else ""
+        print(f" {marker} {number}. {root}{state}")
+    if orchestrator.project_registry:
+        print(f"Loaded indexes: {orchestrator.project_registry.memory_bytes() / (1 << 20):.1f} MB (estimated)")
+
+
+def resolve_project(argument: str, roots: List[Path]) -> Optional[Path]:
+    """
+    Resolves the argument of '/project': a number from the list or a directory,
+    which is added to the list.
+    """
+    if argument.isdigit() and 1 <= int(argument) <= len(roots):
+        return roots[int(argument) - 1]
+    path = Path(argument).expanduser().resolve()
+    if not path.is_dir():
+        print(f"[Main] Not a project directory: {argument}")
+        return None
+    if path not in roots:
+        roots.append(path)
+    return path
+
+
 def signal_handler(sig, frame):
     """
     Handles graceful shutdown on Ctrl+C by cleaning up cache directories.
@@ -90,7 +148,10 @@ def signal_handler(sig, frame):
     sys.exit(0)
 
 @inject
-def main(orchestrator: Orchestrator = Provide[Container.orchestrator]):
+def main(
+    orchestrator: Orchestrator = Provide[Container.orchestrator],
+    configured_roots: List[str] = Provide[Container.config.projects.roots],
+):
     """
     The main application loop.
     """
@@ -98,9 +159,10 @@ def main(orchestrator: Orchestrator = Provide[Container.orchestrator]):
     
     print("\n--- AIDA: AI-Driven Assistant ---")
     print("Welcome! I'm here to help you with your software development tasks.")
-    print("Type your request, or 'exit' to quit.")
+    print("Type your request, '/projects' to list the projects, '/project <n>' to switch, '/compact' to compact the index, or 'exit' to quit.")
     
-    project_path = str(WORKSPACE_DIR)
+    roots = parse_project_roots(sys.argv[1:], configured_roots)
+    project_path = str(roots[0])
     
     # Perform initial project setup and indexing once at the beginning.
     metadata = orchestrator.setup_project(project_path)
@@ -111,23 +173,43 @@ def main(orchestrator: Orchestrator = Provide[Container.orchestrator]):
             if user_prompt.lower() == 'exit':
                 print("Exiting AIDA. Goodbye!")
                 break
+
+            if user_prompt.strip() == '/projects':
+                print_projects(orchestrator, roots, Path(project_path))
+                continue
+
+            if user_prompt.strip() == '/compact':
+                orchestrator.compact_index(project_path)
+                continue
+
+            if user_prompt.startswith('/project '):
+                target = resolve_project(user_prompt[len('/project '):].strip(), roots)
+                if target is not None and str(target) != project_path:
+                    # A project whose index is still loaded only re-indexes the files that changed meanwhile.
+                    project_path = str(target)
+                    metadata = orchestrator.setup_project(project_path)
+                continue
             
+            # The workspace watcher may have updated the metadata since the last prompt.
+            metadata = orchestrator.project_metadata or metadata
             orchestrator.run_task(user_prompt, metadata, project_path)
             
             # After a task, re-analyze the workspace to get the latest state for the next prompt.
             print("\n--- Task finished. Updating project state for next command. ---")
-            metadata = orchestrator.analysis_agent.run(project_root=project_path)
+            metadata = orchestrator.refresh_project(project_path)
 
     except Exception as e:
         print(f"\nAn unexpected error occurred: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        orchestrator.shutdown()
 
 if __name__ == "__main__":
     try:
         # Perform initial setup and cleanup BEFORE initializing the container.
         # This ensures a clean state for the database and other components.
-        setup_directories()
+        setup_directories(rebuild_index="--reindex" in sys.argv[1:])
         
         container = Container()
         # main があるモジュールを明示的に指定
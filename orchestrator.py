@@ -2,10 +2,13 @@
 # title: Task Orchestrator
 # role: Manages the stateful workflow of AI agents to accomplish development tasks.
 
+import threading
 import typing
+from typing import List, Optional
 from pathlib import Path
 import shutil
 import re
+from contextlib import closing
 from aida.schemas import ProjectMetadata, Action, TaskState, CodeChange
 from aida.utils import sandbox_manager
 
@@ -21,7 +24,9 @@ if typing.TYPE_CHECKING:
         WebSearchAgent,
         GitAgent, # GitAgentをインポート
     )
-    from aida.rag import IndexingAgent
+    from aida.rag import IndexingAgent, ProjectIndex, ProjectIndexRegistry
+    from aida.analysis import SymbolIndex
+    from aida.services import Telemetry, ModelWarmer, WorkspaceWatcher
 
 
 class Orchestrator:
@@ -34,7 +39,6 @@ class Orchestrator:
         planning_agent: "PlanningAgent",
         coding_agent: "CodingAgent",
         analysis_agent: "AnalysisAgent",
-        indexing_agent: "IndexingAgent",
         testing_agent: "TestingAgent",
         debugging_agent: "DebuggingAgent",
         search_agent: "SearchAgent",
@@ -42,7 +46,20 @@ class Orchestrator:
         web_search_agent: "WebSearchAgent",
         git_agent: "GitAgent", # GitAgentを受け取る
         max_retries: int,
+        telemetry: Optional["Telemetry"] = None,
+        model_warmer: Optional["ModelWarmer"] = None,
+        workspace_watcher: Optional["WorkspaceWatcher"] = None,
+        symbol_index: Optional["SymbolIndex"] = None,
+        indexing_agent: Optional["IndexingAgent"] = None,
+        project_registry: Optional["ProjectIndexRegistry"] = None,
     ):
+        """
+        Either `indexing_agent` (and optionally `symbol_index`) index a single
+        project, or `project_registry` provides them per project, bound to the
+        agents by `setup_project`.
+        """
+        if indexing_agent is None and project_registry is None:
+            raise ValueError("The Orchestrator needs an indexing_agent or a project_registry.")
         self.planning_agent = planning_agent
         self.coding_agent = coding_agent
         self.analysis_agent = analysis_agent
@@ -54,43 +71,154 @@ class Orchestrator:
         self.web_search_agent = web_search_agent
         self.git_agent = git_agent # GitAgentを初期化
         self.max_retries = max_retries
+        self.telemetry = telemetry
+        self.model_warmer = model_warmer
+        self.workspace_watcher = workspace_watcher
+        self.symbol_index = symbol_index
+        self.project_registry = project_registry
+        # The latest project metadata; refreshed after each task and by the workspace watcher.
+        self.project_metadata: Optional[ProjectMetadata] = None
+        self._metadata_lock = threading.Lock()
         print("Orchestrator initialized with all agents.")
 
     def setup_project(self, project_path: str) -> ProjectMetadata:
         """
-        Analyzes the project directory and performs a full indexing of its content.
+        Analyzes the project directory and brings the persisted index up to date
+        with its content, embedding only files that changed since the last run.
+        The models are preloaded in the background meanwhile. Afterwards, the
+        workspace watcher keeps the index and the metadata up to date with edits
+        made directly in the workspace.
+
+        With a project registry, this also switches projects: the index of the
+        project is opened (or taken from the loaded ones) and bound to the agents,
+        and the watcher moves to the project's root.
         """
         print("\n--- Setting up Project Environment ---")
+        if self.model_warmer:
+            self.model_warmer.start()
+        if self.project_registry:
+            self.stop_watching()
+            self._bind_project(self.project_registry.open(project_path))
         print(f"Running analysis on project: {project_path}")
         metadata = self.analysis_agent.run(project_root=project_path)
         print("Analysis complete. Metadata generated.")
 
-        self.indexing_agent.run_full_index(project_path, metadata.files)
+        indexing_agent = self._require_indexing_agent()
+        indexing_agent.sync_index(project_path, metadata.files)
+        if self.symbol_index:
+            self.symbol_index.sync(project_path, metadata.files)
+        if self.project_registry:
+            self.project_registry.trim()
+        with self._metadata_lock:
+            self.project_metadata = metadata
+        if self.workspace_watcher:
+            # The handler keeps the agents of this project, even if a batch is still
+            # being applied after switching to another project.
+            symbol_index = self.symbol_index
+            self.workspace_watcher.start(
+                project_path,
+                lambda paths: self._on_workspace_change(project_path, paths, indexing_agent, symbol_index),
+            )
         print("--- Project Setup Complete ---")
         return metadata
 
+    def _bind_project(self, project: "ProjectIndex"):
+        """
+        Points the orchestrator and the agents that read the index at a project's index.
+        """
+        self.indexing_agent = project.indexing_agent
+        self.symbol_index = project.symbol_index
+        for agent in (self.coding_agent, self.debugging_agent):
+            agent.retrieval_agent = project.retrieval_agent
+            agent.symbol_index = project.symbol_index
+
+    def _require_indexing_agent(self) -> "IndexingAgent":
+        """The indexing agent of the current project; with a registry, it is bound by `setup_project`."""
+        if self.indexing_agent is None:
+            raise RuntimeError("No project has been set up yet; call setup_project first.")
+        return self.indexing_agent
+
+    def refresh_project(self, project_path: str) -> ProjectMetadata:
+        """
+        Re-analyzes the whole project and returns the new metadata.
+        """
+        metadata = self.analysis_agent.run(project_root=project_path)
+        with self._metadata_lock:
+            self.project_metadata = metadata
+        return metadata
+
+    def compact_index(self, project_path: str):
+        """
+        Removes orphan chunks from the project's index and reclaims the space of deleted ones.
+        """
+        return self._require_indexing_agent().compact(project_path)
+
+    def stop_watching(self):
+        if self.workspace_watcher:
+            self.workspace_watcher.stop()
+
+    def shutdown(self):
+        """
+        Stops the workspace watcher and persists the indexes of all open projects.
+        """
+        self.stop_watching()
+        if self.project_registry:
+            self.project_registry.close_all()
+
+    def _on_workspace_change(
+        self,
+        project_path: str,
+        paths: List[str],
+        indexing_agent: "IndexingAgent",
+        symbol_index: Optional["SymbolIndex"],
+    ):
+        """
+        Applies a batch of files changed in the workspace to the index and the
+        project metadata. Runs on the watcher thread.
+        """
+        with self._metadata_lock:
+            if self.project_metadata is not None and Path(self.project_metadata.root_dir) == Path(project_path).resolve():
+                self.project_metadata = self.analysis_agent.refresh(self.project_metadata, paths)
+        print(f"\n[Orchestrator] {len(paths)} file(s) changed in the workspace.")
+        if symbol_index:
+            symbol_index.update_files(project_path, paths)
+        indexing_agent.update_files(project_path, paths)
+
     def run_task(self, prompt: str, metadata: ProjectMetadata, project_path: str):
         """
         Generates a plan and executes it step-by-step, including a debugging loop.
+        LLM usage of the task is summarized and exported when it ends.
+        The first task waits for the model warm-up to finish.
         """
+        if self.model_warmer:
+            self.model_warmer.wait()
+        if self.telemetry:
+            self.telemetry.begin_task()
+        try:
+            self._run_task(prompt, metadata, project_path)
+        finally:
+            if self.telemetry:
+                self.telemetry.end_task()
+
+    def _run_task(self, prompt: str, metadata: ProjectMetadata, project_path: str):
         print(f"\n--- Running Task: {prompt} ---")
 
-        # 1. Generate the plan
-        plan = self.planning_agent.run(prompt, metadata)
-        if not plan or not plan.steps:
-            print("\n--- ❌ Task Failed: Could not generate a valid plan. ---")
-            return
+        # 1. Stream the plan. Steps are executed as soon as the planner has finished writing them.
+        plan_steps = self.planning_agent.run_stream(prompt, metadata, [])
+        step_count = 0
 
         last_code_changes: list[CodeChange] = []
         task_successful = False
         goal = prompt # デバッグループ用に元のプロンプトを保持
 
-        with sandbox_manager(project_path) as sandbox_path:
+        # closing() stops the plan stream if the task ends before the planner does.
+        with sandbox_manager(project_path) as sandbox_path, closing(plan_steps):
             current_metadata = metadata
             
             # 2. Execute the plan step-by-step
-            for i, action in enumerate(plan.steps):
-                print(f"\n>>> Step {i+1}/{len(plan.steps)}: [{action.type}] {action.description} <<<")
+            for i, action in enumerate(plan_steps):
+                step_count = i + 1
+                print(f"\n>>> Step {step_count}: [{action.type}] {action.description} <<<")
 
                 if action.type == "finish":
                     task_successful = True
@@ -103,11 +231,14 @@ class Orchestrator:
 
                 # --- Action Execution ---
                 if action.type == "code":
-                    code_changes = self.coding_agent.run(action.description, current_metadata)
+                    code_changes: list[CodeChange] = []
+                    # Each file is written to the sandbox as soon as its change has been generated.
+                    for change in self.coding_agent.run_stream(action.description, current_metadata):
+                        self.coding_agent.apply_code_to_sandbox([change], sandbox_path)
+                        code_changes.append(change)
                     if not code_changes:
                         print(f"[Orchestrator] Coding agent did not produce any code. Skipping step.")
                     else:
-                        self.coding_agent.apply_code_to_sandbox(code_changes, sandbox_path)
                         last_code_changes = code_changes
                         print(f"[Orchestrator] Applied changes to {len(code_changes)} file(s).")
                         # Re-analyze the project after code changes to keep metadata fresh
@@ -198,6 +329,10 @@ class Orchestrator:
                 else:
                     print(f"--- ⚠️ Unknown action type: {action.type}. Skipping. ---")
 
+            if step_count == 0:
+                print("\n--- ❌ Task Failed: Could not generate a valid plan. ---")
+                return
+
             if not task_successful:
                 print(f"\n--- ❌ Task Failed: Plan did not complete successfully. ---")
             
@@ -215,4 +350,6 @@ class Orchestrator:
                         shutil.copy2(source_path, destination_path)
 
                 print("[Orchestrator] Sync complete.")
-                self.indexing_agent.update_index(project_path, last_code_changes)
\ No newline at end of file
+                self._require_indexing_agent().update_index(project_path, last_code_changes)
+                if self.symbol_index:
+                    self.symbol_index.update_files(project_path, [change.file_path for change in last_code_changes])
\ No newline at end of file
@@ -1,8 +1,29 @@
 # path: aida/rag/__init__.py
 # role: Initializes the RAG package.
 
+from typing import TYPE_CHECKING
+
 from .vector_store import VectorStore
 from .indexing_agent import IndexingAgent
 from .retrieval_agent import RetrievalAgent
+from .manifest import IndexManifest
+from .code_chunker import PythonChunker
+from .lexical_index import LexicalIndex
+from .query_cache import QueryCache
+from .search_scope import SearchScope
+from .project_registry import ProjectIndexRegistry, ProjectIndex, project_id
+
+if TYPE_CHECKING:
+    from .embedding_cache import CachedEmbeddingFunction
+
+
+def __getattr__(name: str):
+    # CachedEmbeddingFunction subclasses Chroma's EmbeddingFunction, so it is
+    # imported on first use rather than making every RAG import load chromadb.
+    if name == "CachedEmbeddingFunction":
+        from .embedding_cache import CachedEmbeddingFunction
+        return CachedEmbeddingFunction
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ["VectorStore", "IndexingAgent", "RetrievalAgent"]
\ No newline at end of file
+__all__ = ["VectorStore", "IndexingAgent", "RetrievalAgent", "IndexManifest", "CachedEmbeddingFunction", "PythonChunker", "LexicalIndex", "QueryCache", "SearchScope", "ProjectIndexRegistry", "ProjectIndex", "project_id"]
\ No newline at end of file
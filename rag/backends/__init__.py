@@ -0,0 +1,51 @@
+# path: aida/rag/backends/__init__.py
+# title: Vector Backends Package
+# role: Exposes the vector backend interface and creates backends by name.
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .base import VectorBackend, VectorMatch
+
+BACKENDS = ("chroma", "numpy")
+
+
+def create_backend(
+    name: str,
+    db_path: str,
+    embedding_function: Any = None,
+    options: Optional[Dict[str, Any]] = None,
+    namespace: Optional[str] = None,
+) -> VectorBackend:
+    """
+    Creates the vector backend selected in `rag.vector_store.backend`.
+    Backends are imported on demand, so an unused backend costs no import time.
+
+    Args:
+        name: "chroma" or "numpy".
+        db_path: The vector database directory; the NumPy backend uses its `numpy` subdirectory.
+        embedding_function: Registered with the Chroma collection.
+        options: Backend-specific options, e.g. `initial_capacity` for NumPy, and
+            `memory_limit_mb` for the collections Chroma keeps loaded.
+        namespace: Keeps this index apart from the others in the same database
+            (e.g. one per project): a separate Chroma collection, or a
+            subdirectory of `numpy`. None is the default, unnamed index.
+    """
+    options = dict(options or {})
+    memory_limit_mb = options.pop("memory_limit_mb", None)
+    if name == "chroma":
+        from .chroma_backend import COLLECTION_NAME, ChromaBackend
+        return ChromaBackend(
+            db_path,
+            embedding_function=embedding_function,
+            collection_name=f"{COLLECTION_NAME}_{namespace}" if namespace else COLLECTION_NAME,
+            memory_limit_mb=memory_limit_mb,
+        )
+    if name == "numpy":
+        from .numpy_backend import NumpyBackend
+        path = Path(db_path) / "numpy"
+        return NumpyBackend(str(path / namespace if namespace else path), **options)
+    raise ValueError(f"Unknown vector store backend '{name}'. Choose one of: {', '.join(BACKENDS)}.")
+
+
+__all__ = ["VectorBackend", "VectorMatch", "create_backend", "BACKENDS"]
@@ -0,0 +1,128 @@
+# path: aida/rag/backends/base.py
+# title: Vector Backend Interface
+# role: Defines the storage operations the VectorStore needs from a vector index.
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from chromadb.api.types import Embeddings, Metadata
+
+
+@dataclass
+class VectorMatch:
+    """
+    One result of a nearest-neighbour query.
+
+    Attributes:
+        id: The chunk id.
+        document: The chunk text.
+        metadata: The chunk metadata (e.g. `source`).
+        distance: The backend's distance to the query; smaller is closer.
+        embedding: The stored embedding, if it was requested.
+    """
+    id: str
+    document: str
+    metadata: "Metadata" = field(default_factory=dict)
+    distance: float = 0.0
+    embedding: Optional[Any] = None
+
+
+class VectorBackend(ABC):
+    """
+    Abstract base class for the storage behind a VectorStore.
+
+    Backends store chunks that were already embedded; the VectorStore computes
+    the embeddings of documents and queries. `where` filters are equality
+    filters on metadata, in Chroma's syntax: `{"source": "main.py"}` or
+    `{"source": {"$in": ["a.py", "b.py"]}}`.
+    """
+    @abstractmethod
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """Returns the subset of the given ids that is stored."""
+
+    @abstractmethod
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List["Metadata"], embeddings: "Embeddings") -> None:
+        """Inserts chunks, replacing those already stored under the same ids."""
+
+    @abstractmethod
+    def update_metadatas(self, ids: List[str], metadatas: List["Metadata"]) -> None:
+        """Replaces the metadata of stored chunks."""
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Deletes chunks by id; unknown ids are ignored."""
+
+    @abstractmethod
+    def delete_source(self, source: str) -> None:
+        """Deletes every chunk of a file."""
+
+    @abstractmethod
+    def ids_for_source(self, source: str) -> List[str]:
+        """Returns the ids of every chunk of a file."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Returns the number of stored chunks."""
+
+    @abstractmethod
+    def sources(self) -> Set[str]:
+        """Returns the distinct `source` values of the stored chunks."""
+
+    @abstractmethod
+    def query(
+        self,
+        embedding: Any,
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False,
+    ) -> List[VectorMatch]:
+        """Returns the chunks closest to the embedding, closest first."""
+
+    @abstractmethod
+    def get(self, ids: List[str], include_embeddings: bool = False) -> List[VectorMatch]:
+        """Returns the stored chunks with the given ids (distance 0); unknown ids are skipped."""
+
+    def get_documents(self, ids: List[str]) -> Dict[str, str]:
+        """Returns the documents stored under the given ids."""
+        return {match.id: match.document for match in self.get(ids)}
+
+    @abstractmethod
+    def iter_documents(self, batch_size: int = 512) -> Iterator[Tuple[List[str], List[str], List["Metadata"]]]:
+        """Yields every stored chunk as (ids, documents, metadatas) pages."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Deletes every chunk."""
+
+    def max_batch_size(self) -> int:
+        """Returns the largest number of records accepted in one write."""
+        return 100_000
+
+    def persist(self) -> None:
+        """Makes the writes so far durable. Backends that write through need not override this."""
+
+    def disk_bytes(self) -> int:
+        """The size of the files the index is stored in."""
+        return 0
+
+    def garbage_ratio(self) -> float:
+        """The fraction of the stored data that no longer belongs to a live chunk (deleted or replaced)."""
+        return 0.0
+
+    def compact(self, shared_threshold: float = 0.0) -> None:
+        """
+        Rewrites the storage without the data of deleted chunks. Storage shared
+        with other indexes (e.g. Chroma's SQLite file) is only rewritten when at
+        least `shared_threshold` of it is garbage. Backends without garbage need
+        not override this.
+        """
+
+    def memory_bytes(self) -> int:
+        """An estimate of the memory the backend holds for this index while it is open."""
+        return 0
+
+    def close(self) -> None:
+        """Persists the index and releases the memory it holds; the backend is not used afterwards."""
+        self.persist()
@@ -0,0 +1,323 @@
+# path: aida/rag/backends/chroma_backend.py
+# title: Chroma Vector Backend
+# role: Stores the vector index in a persistent ChromaDB collection.
+
+import re
+import shutil
+import sqlite3
+import struct
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import chromadb
+from chromadb.config import Settings
+from chromadb.api.types import EmbeddingFunction, Embeddings, Metadata
+
+from aida.rag.backends.base import VectorBackend, VectorMatch
+
+COLLECTION_NAME = "aida_collection"
+SQLITE_FILE = "chroma.sqlite3"
+# Segment directories (one HNSW index per collection) are named by the segment's UUID.
+_SEGMENT_DIR = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+# A rough per-vector overhead of the HNSW graph and the id mapping, on top of the vector itself.
+_HNSW_BYTES_PER_VECTOR = 200
+
+
+class ChromaBackend(VectorBackend):
+    """
+    A VectorBackend on a ChromaDB PersistentClient. Every write is durable
+    when it returns, and queries use Chroma's approximate (HNSW) index.
+
+    Several indexes (one per project) can share a database as separate
+    collections. With `memory_limit_mb`, Chroma keeps the HNSW indexes of the
+    collections in an LRU cache bounded to that size and reloads an evicted
+    one from disk when it is queried again.
+    """
+    def __init__(
+        self,
+        db_path: str,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        collection_name: str = COLLECTION_NAME,
+        memory_limit_mb: Optional[float] = None,
+    ):
+        """
+        Args:
+            db_path: The path to the database directory.
+            embedding_function: Registered with the collection so that its
+                configuration matches existing collections; embeddings are
+                always passed in explicitly.
+            collection_name: The collection holding this index.
+            memory_limit_mb: The memory Chroma may use for loaded collections;
+                None leaves them loaded until the process ends.
+        """
+        settings = Settings()
+        if memory_limit_mb:
+            settings = Settings(
+                chroma_segment_cache_policy="LRU",
+                chroma_memory_limit_bytes=int(float(memory_limit_mb) * (1 << 20)),
+            )
+        self.db_path = Path(db_path)
+        self.client = chromadb.PersistentClient(path=str(self.db_path), settings=settings)
+        self.embedding_function = embedding_function
+        self.collection_name = collection_name
+        self.collection = self._open_collection()
+        self._dim: Optional[int] = None
+        # The distinct sources, scanned on first use and then kept up to date by the writes.
+        # Deleting single chunks does not remove their source, so the set may name a
+        # file that no longer has chunks; filtering on it then simply matches nothing.
+        self._sources: Optional[Set[str]] = None
+
+    def _open_collection(self):
+        return self.client.get_or_create_collection(
+            name=self.collection_name,
+            embedding_function=self.embedding_function,
+        )
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        if not ids:
+            return set()
+        return set(self.collection.get(ids=ids, include=[])["ids"])
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Metadata], embeddings: Embeddings) -> None:
+        if ids:
+            self.collection.upsert(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+            self._add_sources(metadatas)
+
+    def update_metadatas(self, ids: List[str], metadatas: List[Metadata]) -> None:
+        if ids:
+            self.collection.update(ids=ids, metadatas=metadatas)
+            self._add_sources(metadatas)
+
+    def delete(self, ids: List[str]) -> None:
+        if ids:
+            self.collection.delete(ids=ids)
+
+    def delete_source(self, source: str) -> None:
+        self.collection.delete(where={"source": source})
+        if self._sources is not None:
+            self._sources.discard(source)
+
+    def ids_for_source(self, source: str) -> List[str]:
+        return self.collection.get(where={"source": source}, include=[])["ids"]
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def sources(self) -> Set[str]:
+        if self._sources is None:
+            sources: Set[str] = set()
+            offset = 0
+            while True:
+                page = self.collection.get(include=["metadatas"], limit=5000, offset=offset)
+                if not page["ids"]:
+                    break
+                sources.update(str(m["source"]) for m in page["metadatas"] or [] if m and "source" in m)
+                offset += len(page["ids"])
+            self._sources = sources
+        return set(self._sources)
+
+    def _add_sources(self, metadatas: List[Metadata]) -> None:
+        if self._sources is not None:
+            self._sources.update(str(m["source"]) for m in metadatas if m and "source" in m)
+
+    def query(
+        self,
+        embedding: Any,
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False,
+    ) -> List[VectorMatch]:
+        include = ["documents", "metadatas", "distances"] + (["embeddings"] if include_embeddings else [])
+        results = self.collection.query(
+            query_embeddings=[embedding],
+            n_results=n_results,
+            where=where or None,
+            include=include,  # type: ignore[arg-type]
+        )
+        if not results.get("ids") or not results["ids"][0]:
+            return []
+        ids = results["ids"][0]
+        embeddings = results["embeddings"][0] if include_embeddings else [None] * len(ids)  # type: ignore[index]
+        return [
+            VectorMatch(id=chunk_id, document=document, metadata=dict(metadata or {}), distance=float(distance),
+                        embedding=vector)
+            for chunk_id, document, metadata, distance, vector in zip(
+                ids, results["documents"][0], results["metadatas"][0], results["distances"][0], embeddings
+            )
+        ]
+
+    def get(self, ids: List[str], include_embeddings: bool = False) -> List[VectorMatch]:
+        if not ids:
+            return []
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        results = self.collection.get(ids=ids, include=include)  # type: ignore[arg-type]
+        embeddings = results["embeddings"] if include_embeddings else None
+        return [
+            VectorMatch(id=chunk_id, document=document, metadata=dict(metadata or {}),
+                        embedding=embeddings[i] if embeddings is not None else None)
+            for i, (chunk_id, document, metadata) in enumerate(
+                zip(results["ids"], results["documents"] or [], results["metadatas"] or [])
+            )
+        ]
+
+    def iter_documents(self, batch_size: int = 512) -> Iterator[Tuple[List[str], List[str], List[Metadata]]]:
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not page["ids"]:
+                return
+            yield page["ids"], page["documents"] or [], page["metadatas"] or []
+            offset += len(page["ids"])
+
+    def clear(self) -> None:
+        try:
+            self.client.delete_collection(name=self.collection_name)
+            self.collection = self._open_collection()
+            self._sources = set()
+        except Exception as e:
+            print(f"Error clearing collection: {e}")
+
+    def max_batch_size(self) -> int:
+        return self.client.get_max_batch_size()
+
+    def memory_bytes(self) -> int:
+        count = self.collection.count()
+        if not count:
+            return 0
+        if self._dim is None:
+            sample = self.collection.peek(limit=1)
+            embeddings = sample.get("embeddings")
+            if embeddings is None or not len(embeddings):
+                return 0
+            self._dim = len(embeddings[0])
+        return count * (self._dim * 4 + _HNSW_BYTES_PER_VECTOR)
+
+    # --- Compaction ---
+
+    def disk_bytes(self) -> int:
+        """The size of this collection's HNSW index and of the SQLite file, which all collections share."""
+        sqlite_path = self.db_path / SQLITE_FILE
+        return _directory_bytes(self._segment_dir()) + (sqlite_path.stat().st_size if sqlite_path.exists() else 0)
+
+    def garbage_ratio(self) -> float:
+        """
+        The fraction of the elements of this collection's HNSW index that belong
+        to deleted chunks, which hnswlib only marks as deleted. Other collections
+        and the SQLite file they share do not count.
+        """
+        elements = self._hnsw_element_count()
+        if not elements:
+            return 0.0
+        return max(0.0, 1.0 - self.collection.count() / elements)
+
+    def compact(self, shared_threshold: float = 0.0) -> None:
+        """
+        Rebuilds the collection's HNSW index without its deleted elements by
+        copying the live chunks (with their embeddings) into a new collection
+        that takes over the name, and removes the index directories Chroma left
+        behind for deleted collections. The SQLite file is shared by all
+        collections, so it is only vacuumed when at least `shared_threshold`
+        of it is free pages.
+
+        If the process stops during the copy, the collection may come back
+        empty; the IndexingAgent then rebuilds it, from the embedding cache.
+        """
+        if self.collection.count() == 0:
+            self.clear()
+        else:
+            self._rebuild_collection()
+        for directory in self._orphan_segment_dirs():
+            shutil.rmtree(directory, ignore_errors=True)
+        sqlite_path = self.db_path / SQLITE_FILE
+        free_bytes = self._free_sqlite_bytes()
+        if not free_bytes or free_bytes < shared_threshold * sqlite_path.stat().st_size:
+            return
+        try:
+            with closing(sqlite3.connect(str(sqlite_path), timeout=30)) as conn:
+                conn.execute("VACUUM")
+        except sqlite3.Error as e:
+            print(f"[ChromaBackend] Could not vacuum {sqlite_path}: {e}")
+
+    def _rebuild_collection(self) -> None:
+        tmp_name = f"{self.collection_name}__compact"
+        try:
+            # Left over from an interrupted compaction.
+            self.client.delete_collection(name=tmp_name)
+        except Exception:
+            pass
+        rebuilt = self.client.create_collection(name=tmp_name, embedding_function=self.embedding_function)
+        batch_size = min(self.max_batch_size(), 1000)
+        offset = 0
+        while True:
+            page = self.collection.get(include=["documents", "metadatas", "embeddings"], limit=batch_size, offset=offset)
+            if not page["ids"]:
+                break
+            rebuilt.add(
+                ids=page["ids"],
+                embeddings=page["embeddings"],
+                documents=page["documents"],
+                metadatas=page["metadatas"],
+            )
+            offset += len(page["ids"])
+        self.client.delete_collection(name=self.collection_name)
+        rebuilt.modify(name=self.collection_name)
+        self.collection = self._open_collection()
+
+    def _sqlite_query(self, sql: str, parameters: Tuple[Any, ...] = ()) -> List[Tuple[Any, ...]]:
+        path = self.db_path / SQLITE_FILE
+        if not path.exists():
+            return []
+        try:
+            with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True, timeout=30)) as conn:
+                return conn.execute(sql, parameters).fetchall()
+        except sqlite3.Error:
+            return []
+
+    def _free_sqlite_bytes(self) -> int:
+        free = self._sqlite_query("PRAGMA freelist_count")
+        page_size = self._sqlite_query("PRAGMA page_size")
+        return int(free[0][0]) * int(page_size[0][0]) if free and page_size else 0
+
+    def _segment_dir(self) -> Optional[Path]:
+        """The directory of this collection's HNSW index, if Chroma has written it."""
+        rows = self._sqlite_query(
+            "SELECT id FROM segments WHERE collection = ? AND scope = 'VECTOR'", (str(self.collection.id),)
+        )
+        directory = self.db_path / str(rows[0][0]) if rows else None
+        return directory if directory is not None and directory.is_dir() else None
+
+    def _hnsw_element_count(self) -> int:
+        """
+        The number of elements in this collection's persisted HNSW index, live or
+        deleted, from its `header.bin`: an int32 format version (1), then the
+        size_t fields offsetLevel0, max_elements and cur_element_count.
+        An unknown format counts as no elements, so it never triggers a rebuild.
+        """
+        directory = self._segment_dir()
+        try:
+            header = (directory / "header.bin").read_bytes() if directory is not None else b""
+        except OSError:
+            return 0
+        if len(header) < 28 or struct.unpack_from("<i", header, 0)[0] != 1:
+            return 0
+        return int(struct.unpack_from("<Q", header, 20)[0])
+
+    def _orphan_segment_dirs(self) -> List[Path]:
+        """The segment directories in the database directory that no segment refers to."""
+        if not (self.db_path / SQLITE_FILE).exists():
+            return []
+        segments = {str(row[0]) for row in self._sqlite_query("SELECT id FROM segments")}
+        if not segments:
+            # An unreadable table must not make every index look orphaned.
+            return []
+        return [
+            d for d in self.db_path.iterdir()
+            if d.is_dir() and _SEGMENT_DIR.fullmatch(d.name) and d.name not in segments
+        ]
+
+
+def _directory_bytes(directory: Optional[Path]) -> int:
+    if directory is None:
+        return 0
+    return sum(f.stat().st_size for f in directory.rglob("*") if f.is_file())
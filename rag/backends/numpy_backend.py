@@ -0,0 +1,655 @@
+# path: aida/rag/backends/numpy_backend.py
+# title: NumPy Vector Backend
+# role: An in-process exact vector index on a memory-mapped float32 matrix.
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from aida.rag.backends.base import VectorBackend, VectorMatch
+
+if TYPE_CHECKING:
+    from chromadb.api.types import Embeddings, Metadata
+
+VECTORS_FILE = "vectors.f32"
+QUANTIZED_FILES = {"float16": "vectors.f16", "int8": "vectors.i8"}
+SCALES_FILE = "scales.f32"
+QUANTIZATIONS = ("none", "float16", "int8")
+DOCUMENTS_FILE = "documents.bin"
+COLUMNS_FILE = "columns.npz"
+HEADER_FILE = "header.json"
+FORMAT_VERSION = 1
+
+# Sentinels for metadata values a row does not have.
+_MISSING_INT = np.iinfo(np.int64).min
+_MISSING_CODE = -1
+
+
+class _Column:
+    """
+    One metadata key stored for every row: integers and floats as numeric arrays,
+    strings and booleans as int32 codes into the backend's shared string table.
+    """
+    def __init__(self, kind: str, values: np.ndarray):
+        self.kind = kind
+        self.values = values
+
+    @classmethod
+    def empty(cls, kind: str, capacity: int) -> "_Column":
+        if kind == "int":
+            return cls(kind, np.full(capacity, _MISSING_INT, dtype=np.int64))
+        if kind == "float":
+            return cls(kind, np.full(capacity, np.nan, dtype=np.float64))
+        return cls(kind, np.full(capacity, _MISSING_CODE, dtype=np.int32))
+
+    def resize(self, capacity: int) -> None:
+        grown = _Column.empty(self.kind, capacity).values
+        grown[:len(self.values)] = self.values[:capacity]
+        self.values = grown
+
+
+def _kind_of(value: Any) -> str:
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "str"
+
+
+class NumpyBackend(VectorBackend):
+    """
+    A VectorBackend that keeps the embeddings in one contiguous float32 matrix,
+    memory-mapped from `vectors.f32`, and answers queries exactly with a single
+    matrix-vector product and `argpartition`.
+
+    Vectors are normalized on insert, so the score is the cosine similarity and
+    the reported distance is `1 - similarity`. Metadata is held in columnar
+    arrays, one per key, with strings dictionary-encoded; a `where` filter on
+    `source` compares int32 codes and only scores the matching rows. Document
+    texts are appended to `documents.bin` and read back by offset.
+
+    With `quantization` set to "float16" or "int8" (int8 with one float32 scale
+    per vector), a second, quantized copy of the matrix is memory-mapped and is
+    the only one scanned by queries, in blocks of `scan_block_rows`. The best
+    `n_results * rescore_factor` rows are then re-scored against the float32
+    matrix, which is only read for those rows, so the memory a query touches
+    drops to about 50% (float16) or 25% (int8) of the float32 index. A quantized
+    copy that is missing or was built for another setting is rebuilt from the
+    float32 matrix when the index is opened.
+
+    Rows are addressed by position. Deleting a chunk only clears its `alive`
+    flag, and replacing one appends its new text; the dead rows and texts stay
+    in the files until `compact` rewrites them without them.
+    Writes are buffered in memory until `persist` writes the columns and
+    flushes the matrix; the IndexingAgent persists after every index operation.
+    """
+    def __init__(
+        self,
+        path: str,
+        initial_capacity: int = 1024,
+        quantization: str = "none",
+        rescore_factor: int = 4,
+        scan_block_rows: int = 4096,
+    ):
+        """
+        Args:
+            path: The directory holding the index files.
+            initial_capacity: The number of rows allocated when the index is created.
+            quantization: "none", "float16" or "int8".
+            rescore_factor: How many candidates per requested result are re-scored
+                in float32 when the index is quantized.
+            scan_block_rows: The number of quantized rows converted to float32 at a
+                time while scanning; small blocks stay in the CPU cache and bound
+                the temporary memory of a query.
+        """
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}'. Choose one of: {', '.join(QUANTIZATIONS)}.")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.initial_capacity = max(1, int(initial_capacity))
+        self.quantization = quantization
+        self.rescore_factor = max(1, int(rescore_factor))
+        self.scan_block_rows = max(1, int(scan_block_rows))
+        self._lock = threading.RLock()
+        self._load()
+
+    # --- Loading and persistence ---
+
+    def _reset_state(self) -> None:
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        self.size = 0
+        self._vectors: Optional[np.memmap] = None
+        self._quantized: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._doc_offsets = np.zeros(0, dtype=np.int64)
+        self._doc_lengths = np.zeros(0, dtype=np.int64)
+        self._columns: Dict[str, _Column] = {}
+        self._strings: List[str] = []
+        self._codes: Dict[str, int] = {}
+        self._documents_end = 0
+        self._dirty = False
+
+    def _load(self) -> None:
+        self._reset_state()
+        header_path = self.path / HEADER_FILE
+        if not header_path.exists():
+            return
+        try:
+            header = json.loads(header_path.read_text(encoding="utf-8"))
+            if header.get("version") != FORMAT_VERSION:
+                raise ValueError(f"unsupported format version {header.get('version')}")
+            with np.load(self.path / COLUMNS_FILE, allow_pickle=False) as data:
+                self.size = int(header["size"])
+                self.capacity = self.size
+                self._ids = [i.decode("utf-8") for i in data["ids"].tolist()]
+                self._alive = data["alive"].copy()
+                self._doc_offsets = data["doc_offsets"].copy()
+                self._doc_lengths = data["doc_lengths"].copy()
+                self._columns = {
+                    key: _Column(kind, data[f"column:{key}"].copy())
+                    for key, kind in header["columns"].items()
+                }
+            self._strings = list(header["strings"])
+            self._codes = {s: i for i, s in enumerate(self._strings)}
+            self._documents_end = int(header["documents_end"])
+            self.dim = header["dim"]
+            if self.dim is not None and self.size:
+                self._vectors = np.memmap(self.path / VECTORS_FILE, dtype=np.float32, mode="r+", shape=(self.size, self.dim))
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids) if self._alive[row]}
+            if self._vectors is not None and self.quantization != "none":
+                self._open_quantized(rebuild=header.get("quantization") != self.quantization)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"[NumpyBackend] Could not load the index at {self.path}, starting empty: {e}")
+            self._reset_state()
+            self._remove_files()
+
+    def persist(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            for matrix in (self._vectors, self._quantized, self._scales):
+                if matrix is not None:
+                    matrix.flush()
+            n = self.size
+            arrays: Dict[str, Any] = {
+                "ids": np.array([i.encode("utf-8") for i in self._ids], dtype=bytes) if n else np.zeros(0, dtype="S1"),
+                "alive": self._alive[:n],
+                "doc_offsets": self._doc_offsets[:n],
+                "doc_lengths": self._doc_lengths[:n],
+            }
+            for key, column in self._columns.items():
+                arrays[f"column:{key}"] = column.values[:n]
+            tmp_columns = self.path / (COLUMNS_FILE + ".tmp")
+            with open(tmp_columns, "wb") as f:
+                np.savez(f, **arrays)
+            header = {
+                "version": FORMAT_VERSION,
+                "dim": self.dim,
+                "size": n,
+                "documents_end": self._documents_end,
+                "quantization": self.quantization,
+                "columns": {key: column.kind for key, column in self._columns.items()},
+                "strings": self._strings,
+            }
+            tmp_header = self.path / (HEADER_FILE + ".tmp")
+            tmp_header.write_text(json.dumps(header), encoding="utf-8")
+            # The header is replaced last: it names the row count the other files must cover.
+            os.replace(tmp_columns, self.path / COLUMNS_FILE)
+            os.replace(tmp_header, self.path / HEADER_FILE)
+            self._dirty = False
+
+    def _remove_files(self) -> None:
+        for name in (VECTORS_FILE, DOCUMENTS_FILE, COLUMNS_FILE, HEADER_FILE, SCALES_FILE, *QUANTIZED_FILES.values()):
+            try:
+                (self.path / name).unlink()
+            except FileNotFoundError:
+                pass
+
+    # --- Storage helpers ---
+
+    def _ensure_capacity(self, needed: int) -> None:
+        if needed <= self.capacity and self._vectors is not None:
+            return
+        assert self.dim is not None, "The dimension is known once vectors are written."
+        capacity = max(needed, self.capacity * 2, self.initial_capacity)
+        self._vectors = self._map(VECTORS_FILE, self._vectors, np.float32, (capacity, self.dim))
+        if self.quantization != "none":
+            dtype = np.float16 if self.quantization == "float16" else np.int8
+            self._quantized = self._map(QUANTIZED_FILES[self.quantization], self._quantized, dtype, (capacity, self.dim))
+            if self.quantization == "int8":
+                self._scales = self._map(SCALES_FILE, self._scales, np.float32, (capacity,))
+
+        def grow(array: np.ndarray) -> np.ndarray:
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array[:capacity]
+            return grown
+
+        self._alive = grow(self._alive)
+        self._doc_offsets = grow(self._doc_offsets)
+        self._doc_lengths = grow(self._doc_lengths)
+        for column in self._columns.values():
+            column.resize(capacity)
+        self.capacity = capacity
+
+    def _map(self, name: str, current: Optional[np.memmap], dtype: Any, shape: Tuple[int, ...]) -> np.memmap:
+        """(Re)maps a matrix file with the given shape, growing the file as needed."""
+        if current is not None:
+            current.flush()
+        path = self.path / name
+        with open(path, "ab") as f:
+            f.truncate(int(np.prod(shape)) * np.dtype(dtype).itemsize)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _open_quantized(self, rebuild: bool) -> None:
+        """Maps the quantized copy of the matrix, rebuilding it from float32 if needed."""
+        self.capacity = 0
+        self._quantized = self._scales = None
+        vectors = self._vectors
+        shape = vectors.shape  # type: ignore[union-attr]
+        quantized_path = self.path / QUANTIZED_FILES[self.quantization]
+        itemsize = 2 if self.quantization == "float16" else 1
+        if not rebuild and (not quantized_path.exists() or quantized_path.stat().st_size < shape[0] * shape[1] * itemsize):
+            rebuild = True
+        self._ensure_capacity(shape[0])
+        if rebuild:
+            print(f"[NumpyBackend] Building the {self.quantization} copy of {self.size} vector(s)...")
+            for start in range(0, self.size, self.scan_block_rows):
+                rows = np.arange(start, min(self.size, start + self.scan_block_rows))
+                self._write_quantized(rows, np.asarray(self._vectors[rows]))  # type: ignore[index]
+            self._dirty = True
+
+    def _write_quantized(self, rows: np.ndarray, matrix: np.ndarray) -> None:
+        if self.quantization == "float16":
+            self._quantized[rows] = matrix.astype(np.float16)  # type: ignore[index]
+        elif self.quantization == "int8":
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._quantized[rows] = np.round(matrix / scales[:, None]).astype(np.int8)  # type: ignore[index]
+            self._scales[rows] = scales  # type: ignore[index]
+
+    def _scores(self, rows: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+        """
+        Scores rows (all rows if None) against the query with the matrix that
+        queries scan: the quantized copy if there is one, else the float32 matrix.
+        """
+        matrix = self._quantized if self._quantized is not None else self._vectors
+        assert matrix is not None and self.dim is not None, "Only an index with vectors is scored."
+        if rows is not None:
+            scores = np.asarray(matrix[rows], dtype=np.float32) @ query
+            return scores * self._scales[rows] if self._scales is not None else scores
+        scores = np.empty(self.size, dtype=np.float32)
+        if matrix is self._vectors:
+            scores[:] = np.asarray(matrix[:self.size]) @ query
+            return scores
+        block = np.empty((min(self.scan_block_rows, self.size), self.dim), dtype=np.float32)
+        for start in range(0, self.size, self.scan_block_rows):
+            end = min(self.size, start + self.scan_block_rows)
+            converted = block[:end - start]
+            converted[...] = matrix[start:end]
+            scores[start:end] = converted @ query
+        if self._scales is not None:
+            scores *= self._scales[:self.size]
+        return scores
+
+    def scanned_bytes(self) -> int:
+        """The size of the matrix a query scans, i.e. the index's working set."""
+        if self.dim is None:
+            return 0
+        if self.quantization == "float16":
+            return self.size * self.dim * 2
+        if self.quantization == "int8":
+            return self.size * (self.dim + 4)
+        return self.size * self.dim * 4
+
+    def disk_bytes(self) -> int:
+        return sum(f.stat().st_size for f in self.path.iterdir() if f.is_file())
+
+    def garbage_ratio(self) -> float:
+        """The larger of the fraction of dead rows and the fraction of `documents.bin` no live row points to."""
+        with self._lock:
+            if not self.size:
+                return 0.0
+            alive = self._alive[:self.size]
+            dead_rows = 1.0 - len(self._rows) / self.size
+            live_bytes = int(self._doc_lengths[:self.size][alive].sum())
+            dead_bytes = 1.0 - live_bytes / self._documents_end if self._documents_end else 0.0
+            return max(dead_rows, dead_bytes)
+
+    def compact(self, shared_threshold: float = 0.0) -> None:
+        """
+        Rewrites the matrix, the documents and the columns with only the live
+        rows, in their current order, and drops strings no row uses any more.
+        The quantized copy is rebuilt from the new matrix. Nothing is shared
+        with other indexes, so `shared_threshold` does not apply.
+        """
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self.size])
+            if len(rows) == self.size and int(self._doc_lengths[rows].sum()) == self._documents_end:
+                return
+            if not len(rows):
+                self.clear()
+                return
+            self.persist()
+            assert self.dim is not None and self._vectors is not None
+            n = len(rows)
+
+            lengths = self._doc_lengths[rows].copy()
+            offsets = np.zeros(n, dtype=np.int64)
+            offsets[1:] = np.cumsum(lengths)[:-1]
+            tmp_documents = self.path / (DOCUMENTS_FILE + ".tmp")
+            with open(self.path / DOCUMENTS_FILE, "rb") as src, open(tmp_documents, "wb") as dst:
+                for row, length in zip(rows.tolist(), lengths.tolist()):
+                    src.seek(int(self._doc_offsets[row]))
+                    dst.write(src.read(length))
+
+            tmp_vectors = self.path / (VECTORS_FILE + ".tmp")
+            matrix = np.memmap(tmp_vectors, dtype=np.float32, mode="w+", shape=(n, self.dim))
+            for start in range(0, n, self.scan_block_rows):
+                block = rows[start:start + self.scan_block_rows]
+                matrix[start:start + len(block)] = self._vectors[block]
+            matrix.flush()
+            del matrix
+
+            # Re-encode the string table with only the strings the live rows use.
+            used = sorted({
+                int(code)
+                for column in self._columns.values() if column.kind in ("str", "bool")
+                for code in np.unique(column.values[rows]) if code != _MISSING_CODE
+            })
+            remap = np.full(len(self._strings), _MISSING_CODE, dtype=np.int32)
+            remap[used] = np.arange(len(used), dtype=np.int32)
+            for column in self._columns.values():
+                values = column.values[rows]
+                if column.kind in ("str", "bool"):
+                    values = np.where(values == _MISSING_CODE, _MISSING_CODE, remap[values]).astype(np.int32)
+                column.values = values
+            self._strings = [self._strings[code] for code in used]
+            self._codes = {value: code for code, value in enumerate(self._strings)}
+
+            self._vectors = self._quantized = self._scales = None
+            for name in (SCALES_FILE, *QUANTIZED_FILES.values()):
+                (self.path / name).unlink(missing_ok=True)
+            os.replace(tmp_documents, self.path / DOCUMENTS_FILE)
+            os.replace(tmp_vectors, self.path / VECTORS_FILE)
+            self._ids = [self._ids[row] for row in rows.tolist()]
+            self._alive = np.ones(n, dtype=bool)
+            self._doc_offsets = offsets
+            self._doc_lengths = lengths
+            self._documents_end = int(lengths.sum())
+            self.size = self.capacity = n
+            self._dirty = True
+            self.persist()
+            self._load()
+
+    def memory_bytes(self) -> int:
+        """The scanned matrix, the row arrays and metadata columns, and about 150 bytes per id and string."""
+        with self._lock:
+            arrays = self._alive.nbytes + self._doc_offsets.nbytes + self._doc_lengths.nbytes
+            arrays += sum(column.values.nbytes for column in self._columns.values())
+            return self.scanned_bytes() + arrays + 150 * (len(self._ids) + len(self._strings))
+
+    def close(self) -> None:
+        with self._lock:
+            self.persist()
+            self._vectors = self._quantized = self._scales = None
+            self._reset_state()
+
+    def _code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            self._strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def _column_for(self, key: str, kind: str) -> _Column:
+        column = self._columns.get(key)
+        if column is None:
+            column = _Column.empty(kind, self.capacity)
+            self._columns[key] = column
+        elif column.kind != kind and not (column.kind == "float" and kind == "int"):
+            if column.kind == "int" and kind == "float":
+                values = column.values.astype(np.float64)
+                values[column.values == _MISSING_INT] = np.nan
+                column.kind, column.values = "float", values
+            elif column.kind != "str":
+                # Mixed types fall back to strings.
+                decoded = [self._decode(column, row) for row in range(len(column.values))]
+                column.kind = "str"
+                column.values = np.array(
+                    [_MISSING_CODE if v is None else self._code(str(v)) for v in decoded], dtype=np.int32
+                )
+        return column
+
+    def _set_metadata(self, row: int, metadata: "Metadata") -> None:
+        for column in self._columns.values():
+            column.values[row] = _MISSING_INT if column.kind == "int" else (np.nan if column.kind == "float" else _MISSING_CODE)
+        for key, value in (metadata or {}).items():
+            if value is None:
+                continue
+            column = self._column_for(key, _kind_of(value))
+            if column.kind in ("int", "float"):
+                column.values[row] = value
+            else:
+                column.values[row] = self._code(str(value) if column.kind == "str" else ("1" if value else "0"))
+
+    def _decode(self, column: _Column, row: int) -> Any:
+        value = column.values[row]
+        if column.kind == "int":
+            return None if value == _MISSING_INT else int(value)
+        if column.kind == "float":
+            return None if np.isnan(value) else float(value)
+        if value == _MISSING_CODE:
+            return None
+        text = self._strings[int(value)]
+        return text == "1" if column.kind == "bool" else text
+
+    def _metadata(self, row: int) -> "Metadata":
+        metadata: Dict[str, Any] = {}
+        for key, column in self._columns.items():
+            value = self._decode(column, row)
+            if value is not None:
+                metadata[key] = value
+        return metadata
+
+    def _document(self, row: int) -> str:
+        with open(self.path / DOCUMENTS_FILE, "rb") as f:
+            f.seek(int(self._doc_offsets[row]))
+            return f.read(int(self._doc_lengths[row])).decode("utf-8")
+
+    def _documents(self, rows: List[int]) -> List[str]:
+        if not rows:
+            return []
+        with open(self.path / DOCUMENTS_FILE, "rb") as f:
+            texts = []
+            for row in rows:
+                f.seek(int(self._doc_offsets[row]))
+                texts.append(f.read(int(self._doc_lengths[row])).decode("utf-8"))
+            return texts
+
+    def _match_mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Returns the rows that are alive and satisfy an equality filter."""
+        mask = self._alive[:self.size].copy()
+        for key, condition in (where or {}).items():
+            wanted = condition.get("$in") if isinstance(condition, dict) else [condition]
+            if wanted is None:
+                raise ValueError(f"Unsupported filter on '{key}': {condition!r}")
+            column = self._columns.get(key)
+            if column is None:
+                return np.zeros(self.size, dtype=bool)
+            values = column.values[:self.size]
+            if column.kind in ("str", "bool"):
+                keys = [("1" if v else "0") if column.kind == "bool" else str(v) for v in wanted]
+                codes = [self._codes[k] for k in keys if k in self._codes]
+                mask &= np.isin(values, codes)
+            else:
+                mask &= np.isin(values, wanted)
+        return mask
+
+    # --- VectorBackend ---
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        with self._lock:
+            return {chunk_id for chunk_id in ids if chunk_id in self._rows}
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List["Metadata"], embeddings: "Embeddings") -> None:
+        if not ids:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(ids):
+            raise ValueError("Expected one embedding per id.")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = np.asarray(matrix / np.where(norms > 0, norms, 1.0), dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(matrix.shape[1])
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match the index ({self.dim}).")
+            new_count = len({chunk_id for chunk_id in ids if chunk_id not in self._rows})
+            self._ensure_capacity(self.size + new_count)
+
+            rows = np.empty(len(ids), dtype=np.int64)
+            for i, chunk_id in enumerate(ids):
+                row = self._rows.get(chunk_id)
+                if row is None:
+                    row = self.size
+                    self.size += 1
+                    self._ids.append(chunk_id)
+                    self._rows[chunk_id] = row
+                rows[i] = row
+            self._vectors[rows] = matrix  # type: ignore[index]
+            self._write_quantized(rows, matrix)
+            self._alive[rows] = True
+
+            encoded = [document.encode("utf-8") for document in documents]
+            with open(self.path / DOCUMENTS_FILE, "ab") as f:
+                f.seek(self._documents_end)
+                f.truncate()
+                f.write(b"".join(encoded))
+            lengths = np.array([len(b) for b in encoded], dtype=np.int64)
+            self._doc_offsets[rows] = self._documents_end + np.cumsum(lengths) - lengths
+            self._doc_lengths[rows] = lengths
+            self._documents_end += int(lengths.sum())
+
+            for row, metadata in zip(rows.tolist(), metadatas):
+                self._set_metadata(row, metadata)
+            self._dirty = True
+
+    def update_metadatas(self, ids: List[str], metadatas: List["Metadata"]) -> None:
+        with self._lock:
+            for chunk_id, metadata in zip(ids, metadatas):
+                row = self._rows.get(chunk_id)
+                if row is not None:
+                    self._set_metadata(row, metadata)
+                    self._dirty = True
+
+    def delete(self, ids: List[str]) -> None:
+        with self._lock:
+            for chunk_id in ids:
+                row = self._rows.pop(chunk_id, None)
+                if row is not None:
+                    self._alive[row] = False
+                    self._dirty = True
+
+    def delete_source(self, source: str) -> None:
+        self.delete(self.ids_for_source(source))
+
+    def ids_for_source(self, source: str) -> List[str]:
+        with self._lock:
+            return [self._ids[row] for row in np.flatnonzero(self._match_mask({"source": source})).tolist()]
+
+    def count(self) -> int:
+        return len(self._rows)
+
+    def sources(self) -> Set[str]:
+        with self._lock:
+            column = self._columns.get("source")
+            if column is None or column.kind != "str":
+                return set()
+            codes = np.unique(column.values[:self.size][self._alive[:self.size]])
+            return {self._strings[int(code)] for code in codes if code != _MISSING_CODE}
+
+    def query(
+        self,
+        embedding: Any,
+        n_results: int,
+        where: Optional[Dict[str, Any]] = None,
+        include_embeddings: bool = False,
+    ) -> List[VectorMatch]:
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(query))
+        if norm > 0:
+            query = query / norm
+        with self._lock:
+            if self._vectors is None or not self._rows or n_results <= 0:
+                return []
+            if query.shape[0] != self.dim:
+                raise ValueError(f"Query dimension {query.shape[0]} does not match the index ({self.dim}).")
+            if where:
+                rows = np.flatnonzero(self._match_mask(where))
+                scores = self._scores(rows, query)
+            else:
+                rows = np.arange(self.size)
+                scores = self._scores(None, query)
+                scores[~self._alive[:self.size]] = -np.inf
+            k = min(n_results, len(rows), len(self._rows))
+            if k == 0:
+                return []
+            if self._quantized is not None:
+                # Re-score the best approximate candidates at full precision.
+                candidates = min(len(rows), k * self.rescore_factor)
+                top = np.argpartition(-scores, candidates - 1)[:candidates]
+                top = top[np.isfinite(scores[top])]
+                rows, scores = rows[top], np.asarray(self._vectors[rows[top]] @ query)  # type: ignore[index]
+                k = min(k, len(rows))
+                if k == 0:
+                    return []
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            top = top[np.isfinite(scores[top])]
+            selected = rows[top].tolist()
+            return self._matches(selected, (1.0 - scores[top]).tolist(), include_embeddings)
+
+    def _matches(self, rows: List[int], distances: List[float], include_embeddings: bool) -> List[VectorMatch]:
+        documents = self._documents(rows)
+        vectors = np.array(self._vectors[rows]) if include_embeddings and rows else None  # type: ignore[index]
+        return [
+            VectorMatch(id=self._ids[row], document=document, metadata=self._metadata(row), distance=float(distance),
+                        embedding=vectors[i] if vectors is not None else None)
+            for i, (row, document, distance) in enumerate(zip(rows, documents, distances))
+        ]
+
+    def get(self, ids: List[str], include_embeddings: bool = False) -> List[VectorMatch]:
+        with self._lock:
+            rows = [self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows]
+            return self._matches(rows, [0.0] * len(rows), include_embeddings)
+
+    def get_documents(self, ids: List[str]) -> Dict[str, str]:
+        with self._lock:
+            found = [(chunk_id, self._rows[chunk_id]) for chunk_id in ids if chunk_id in self._rows]
+            return dict(zip((chunk_id for chunk_id, _ in found), self._documents([row for _, row in found])))
+
+    def iter_documents(self, batch_size: int = 512) -> Iterator[Tuple[List[str], List[str], List["Metadata"]]]:
+        with self._lock:
+            rows = np.flatnonzero(self._alive[:self.size]).tolist()
+        for start in range(0, len(rows), batch_size):
+            with self._lock:
+                page = [row for row in rows[start:start + batch_size] if self._alive[row]]
+                batch = ([self._ids[row] for row in page], self._documents(page), [self._metadata(row) for row in page])
+            yield batch
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = self._quantized = self._scales = None
+            self._remove_files()
+            self._reset_state()
@@ -0,0 +1,377 @@
+# path: aida/rag/benchmark.py
+# title: RAG Benchmark
+# role: Measures indexing cost and retrieval quality and latency on a generated repository, without Ollama.
+
+"""
+Usage:
+    python -m aida.rag.benchmark [--files 200] [--queries 200] [--k 5] [--backend numpy]
+                                 [--chunk-size 1000] [--chunk-overlap 200] [--no-code-chunking]
+                                 [--no-hybrid] [--no-mmr] [--seed 0] [--output result.json]
+
+Generates a fixture repository of Python modules and Markdown notes with a
+labeled query set, indexes it with the IndexingAgent into a temporary vector
+store, embedding with a deterministic hashing function instead of an Ollama
+model, and answers every query with the RetrievalAgent.
+
+A query asks for one function, either in words ("how do we merge the rolling
+totals of a ledger") or by name ("where is merge_rolling_totals defined"). A
+hit is relevant if it comes from that function's file and overlaps its lines.
+
+The report is JSON with sorted keys, so two runs (e.g. before and after a
+chunking change) can be compared with `diff`:
+
+    index     build seconds, chunks, chunks per second and per file, peak
+              memory growth of the process, size on disk
+    queries   p50/p95 latency, recall@1/@k and MRR@k, overall and per query kind
+
+The hashing embedder only captures shared words, so absolute scores are not
+comparable with a real model; differences between runs are what it measures.
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import math
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from aida.rag.indexing_agent import IndexingAgent
+from aida.rag.lexical_index import LexicalIndex, tokenize
+from aida.rag.retrieval_agent import RetrievalAgent
+from aida.rag.vector_store import VectorStore
+from aida.schemas import SearchHit
+
+REPORT_VERSION = 2
+
+DOMAINS = [
+    "invoice", "customer", "shipment", "ledger", "sensor", "playlist", "recipe", "ticket",
+    "forecast", "warehouse", "payroll", "subscription", "itinerary", "inventory", "catalog", "vehicle",
+]
+ACTIONS = ["compute", "validate", "merge", "export", "parse", "normalize", "schedule", "archive", "rank", "summarize"]
+QUALIFIERS = ["monthly", "weighted", "rolling", "overdue", "regional", "pending", "nightly", "encrypted", "partial", "historical"]
+OBJECTS = ["totals", "discounts", "timestamps", "addresses", "thresholds", "durations", "currencies", "priorities", "duplicates", "checksums"]
+
+
+class HashingEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    A deterministic embedding: the tokens of a text (see `lexical_index.tokenize`)
+    are hashed into `dim` signed buckets weighted by 1 + log(term frequency),
+    and the vector is normalized. Texts that share words are close; nothing is
+    downloaded and the result is identical on every machine.
+    """
+    def __init__(self, dim: int = 384):
+        self.dim = int(dim)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        matrix = np.zeros((len(input), self.dim), dtype=np.float32)
+        for row, text in enumerate(input):
+            for token, count in Counter(tokenize(text)).items():
+                digest = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+                sign = 1.0 if digest & 1 else -1.0
+                matrix[row, (digest >> 1) % self.dim] += sign * (1.0 + math.log(count))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return list(matrix / np.where(norms > 0, norms, 1.0))
+
+    @staticmethod
+    def name() -> str:
+        return "aida-hashing"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "HashingEmbeddingFunction":
+        return HashingEmbeddingFunction(dim=config.get("dim", 384))
+
+
+@dataclass
+class Target:
+    """A function in the fixture repository that a query asks for."""
+    path: str
+    name: str
+    start_line: int
+    end_line: int
+    words: Sequence[str]
+
+
+@dataclass
+class LabeledQuery:
+    text: str
+    kind: str
+    target: Target
+
+
+def build_fixture(root: Path, n_files: int, n_queries: int, seed: int = 0) -> List[LabeledQuery]:
+    """
+    Writes a repository of `n_files` files to `root` (about one Markdown note
+    per eight modules) and returns labeled queries for functions in it.
+    """
+    rng = random.Random(seed)
+    targets: List[Target] = []
+    used = set()
+    for index in range(n_files):
+        package = f"pkg_{index // 20}"
+        domain = DOMAINS[index % len(DOMAINS)]
+        if index % 8 == 7:
+            path = f"{package}/notes_{index}.md"
+            _write(root / path, _note(rng, domain))
+            continue
+        path = f"{package}/{domain}_{index}.py"
+        lines = [f'"""Helpers for {domain} records."""', "", "import math", ""]
+        for _ in range(rng.randint(3, 6)):
+            while True:
+                words = (rng.choice(ACTIONS), rng.choice(QUALIFIERS), rng.choice(OBJECTS))
+                if (domain, words) not in used:
+                    used.add((domain, words))
+                    break
+            name = "_".join(words)
+            # `lines` holds whole functions, so line numbers are counted in the joined text.
+            start = _line_count(lines) + 2
+            lines += ["", _function(rng, domain, name, words, [t.name for t in targets[-3:]])]
+            end = _line_count(lines)
+            targets.append(Target(path, name, start, end, (domain,) + words))
+        _write(root / path, "\n".join(lines) + "\n")
+
+    queries = []
+    for target in rng.sample(targets, min(n_queries, len(targets))):
+        domain, action, qualifier, obj = target.words
+        if rng.random() < 0.5:
+            queries.append(LabeledQuery(f"how do we {action} the {qualifier} {obj} of a {domain}", "natural", target))
+        else:
+            queries.append(LabeledQuery(f"where is {target.name} defined", "identifier", target))
+    return queries
+
+
+def _line_count(lines: List[str]) -> int:
+    """The number of lines in the file text joined from `lines`, counting a trailing empty line."""
+    return "\n".join(lines).count("\n") + 1
+
+
+def _function(rng: random.Random, domain: str, name: str, words: Sequence[str], neighbours: List[str]) -> str:
+    action, qualifier, obj = words
+    body = [
+        f"def {name}(records, limit=None):",
+        f'    """{action.capitalize()} the {qualifier} {obj} of a {domain} record set."""',
+        "    result = []",
+    ]
+    for step in range(rng.randint(2, 12)):
+        body += [
+            "    for record in records:",
+            f"        value = record.get('{rng.choice(OBJECTS)}', {step})",
+            f"        if value and value > math.sqrt({rng.randint(1, 99)}):",
+            "            result.append(value)",
+        ]
+    if neighbours:
+        body.append(f"    # See also {rng.choice(neighbours)}.")
+    body.append("    return result[:limit] if limit else result")
+    return "\n".join(body)
+
+
+def _note(rng: random.Random, domain: str) -> str:
+    paragraphs = [f"# {domain.capitalize()} notes", ""]
+    for _ in range(rng.randint(3, 8)):
+        words = [rng.choice(QUALIFIERS + OBJECTS + ACTIONS) for _ in range(rng.randint(20, 60))]
+        paragraphs += [f"The {domain} module " + " ".join(words) + ".", ""]
+    return "\n".join(paragraphs)
+
+
+def _write(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _is_relevant(hit: SearchHit, target: Target) -> bool:
+    if hit.source != target.path:
+        return False
+    if hit.start_line is None:
+        return True
+    return hit.start_line <= target.end_line and (hit.end_line or hit.start_line) >= target.start_line
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    return round(float(np.percentile(values, q)), 3) if len(values) else 0.0
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """The peak resident memory of the process, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def _quality(ranks: List[Optional[int]], k: int) -> Dict[str, float]:
+    """recall@1, recall@k and MRR@k from the 1-based rank of the first relevant hit of each query."""
+    count = max(1, len(ranks))
+    return {
+        "queries": len(ranks),
+        "recall_at_1": sum(1 for r in ranks if r == 1) / count,
+        f"recall_at_{k}": sum(1 for r in ranks if r is not None) / count,
+        f"mrr_at_{k}": sum(1.0 / r for r in ranks if r is not None) / count,
+    }
+
+
+def run_benchmark(
+    n_files: int = 200,
+    n_queries: int = 200,
+    k: int = 5,
+    backend: str = "numpy",
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    code_chunking: bool = True,
+    hybrid: bool = True,
+    mmr: bool = True,
+    seed: int = 0,
+    workdir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Builds the fixture, indexes it and runs the queries; returns the report.
+    Progress output of the agents goes to stderr.
+    """
+    base = Path(workdir) if workdir else Path(tempfile.mkdtemp(prefix="aida-rag-bench-"))
+    project_root, db_path = base / "repo", base / "db"
+    shutil.rmtree(project_root, ignore_errors=True)
+    shutil.rmtree(db_path, ignore_errors=True)
+    try:
+        queries = build_fixture(project_root, n_files, n_queries, seed)
+        files = sorted(str(p.relative_to(project_root)) for p in project_root.rglob("*") if p.is_file())
+
+        with contextlib.redirect_stdout(sys.stderr):
+            vector_store = VectorStore(str(db_path), HashingEmbeddingFunction(), backend=backend)
+            lexical_index = LexicalIndex()
+            indexing_agent = IndexingAgent(
+                vector_store, chunk_size, chunk_overlap,
+                code_chunking={"enabled": code_chunking},
+                lexical_index=lexical_index,
+            )
+            rss_before = _peak_rss_mb()
+            started = time.perf_counter()
+            indexing_agent.run_full_index(str(project_root), files)
+            build_seconds = time.perf_counter() - started
+            rss_after = _peak_rss_mb()
+
+            per_file: Counter[str] = Counter()
+            for _, _, metadatas in vector_store.iter_documents():
+                per_file.update(str(m.get("source", "")) for m in metadatas)
+            chunk_counts = [per_file.get(f, 0) for f in files]
+
+            retrieval_agent = RetrievalAgent(
+                vector_store,
+                lexical_index=lexical_index,
+                hybrid={"enabled": hybrid},
+                mmr={"enabled": mmr},
+            )
+            retrieval_agent.run(queries[0].text, k)  # warm-up
+            latencies: List[float] = []
+            ranks: Dict[str, List[Optional[int]]] = {"natural": [], "identifier": []}
+            for query in queries:
+                started = time.perf_counter()
+                hits = retrieval_agent.run(query.text, k)
+                latencies.append((time.perf_counter() - started) * 1000)
+                rank = next((i + 1 for i, hit in enumerate(hits) if _is_relevant(hit, query.target)), None)
+                ranks[query.kind].append(rank)
+
+        all_ranks = ranks["natural"] + ranks["identifier"]
+        disk_bytes = sum(p.stat().st_size for p in db_path.rglob("*") if p.is_file())
+        return {
+            "version": REPORT_VERSION,
+            "config": {
+                "files": n_files,
+                "queries": len(queries),
+                "k": k,
+                "backend": backend,
+                "chunk_size": chunk_size,
+                "chunk_overlap": chunk_overlap,
+                "code_chunking": code_chunking,
+                "hybrid": hybrid,
+                "mmr": mmr,
+                "seed": seed,
+                "embedding": HashingEmbeddingFunction().get_config(),
+            },
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "index": {
+                "build_seconds": round(build_seconds, 4),
+                "chunks": vector_store.count(),
+                "chunks_per_second": round(vector_store.count() / build_seconds, 1) if build_seconds else None,
+                "chunks_per_file": {
+                    "mean": round(float(np.mean(chunk_counts)), 3),
+                    "p50": _percentile(chunk_counts, 50),
+                    "p95": _percentile(chunk_counts, 95),
+                    "max": max(chunk_counts, default=0),
+                },
+                "peak_rss_mb": round(rss_after, 1) if rss_after is not None else None,
+                "build_rss_growth_mb": round(rss_after - rss_before, 1) if rss_after is not None and rss_before is not None else None,
+                "disk_mb": round(disk_bytes / 1e6, 3),
+            },
+            "queries": {
+                "latency_ms": {
+                    "p50": _percentile(latencies, 50),
+                    "p95": _percentile(latencies, 95),
+                    "mean": round(float(np.mean(latencies)), 3) if latencies else 0.0,
+                },
+                "overall": _round(_quality(all_ranks, k)),
+                "by_kind": {kind: _round(_quality(kind_ranks, k)) for kind, kind_ranks in ranks.items()},
+            },
+        }
+    finally:
+        if not workdir:
+            shutil.rmtree(base, ignore_errors=True)
+
+
+def _round(values: Dict[str, float]) -> Dict[str, float]:
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in values.items()}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--backend", default="numpy", choices=["numpy", "chroma"])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--no-code-chunking", action="store_true")
+    parser.add_argument("--no-hybrid", action="store_true")
+    parser.add_argument("--no-mmr", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="Where the fixture and index are built (default: a temporary directory).")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this file instead of stdout.")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        n_files=args.files,
+        n_queries=args.queries,
+        k=args.k,
+        backend=args.backend,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        code_chunking=not args.no_code_chunking,
+        hybrid=not args.no_hybrid,
+        mmr=not args.no_mmr,
+        seed=args.seed,
+        workdir=args.workdir,
+    )
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+        print(f"[RAGBenchmark] Report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
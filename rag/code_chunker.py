@@ -0,0 +1,177 @@
+# path: aida/rag/code_chunker.py
+# title: Python Code Chunker
+# role: Splits Python sources into chunks along module, class and function boundaries.
+
+import ast
+import bisect
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+@dataclass
+class _Piece:
+    """
+    A contiguous range of source lines (0-based, end exclusive) that becomes one chunk,
+    optionally preceded by a header that restates the enclosing signature.
+    """
+    start: int
+    end: int
+    names: List[str] = field(default_factory=list)
+    header: str = ""
+
+
+class PythonChunker:
+    """
+    Chunks Python files so that each chunk is a whole definition or a run of
+    whole definitions.
+
+    Top-level statements are taken one at a time, together with the comments and
+    blank lines above them. Neighbouring pieces are merged while they fit in
+    `max_chars`, so small functions and the imports around them share a chunk.
+    A definition larger than `max_chars` is split into its header (decorators,
+    signature and docstring) and its body statements, recursively; each body
+    piece of a function is prefixed with the function's signature so it stays
+    recognisable on its own. A single statement that is still too large is split
+    by characters as a last resort. Chunks do not overlap.
+
+    Every chunk carries `qualname` (the qualified names of the definitions it
+    holds, comma-separated, or `<module>`), `start_line` and `end_line` (1-based,
+    inclusive) and `start_index` (the character offset of its first line).
+    """
+    def __init__(self, max_chars: int = 1500):
+        """
+        Args:
+            max_chars: The size a chunk may reach before it is split or no longer merged.
+        """
+        self.max_chars = max_chars
+        self._fallback = RecursiveCharacterTextSplitter(
+            chunk_size=max_chars,
+            chunk_overlap=0,
+            length_function=len,
+            add_start_index=True,
+        )
+
+    def split(self, content: str, source: str) -> Optional[List[Document]]:
+        """
+        Returns the chunks of a Python source, or None if it does not parse.
+        """
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return None
+
+        lines = content.splitlines(keepends=True)
+        offsets = [0]
+        for line in lines:
+            offsets.append(offsets[-1] + len(line))
+        pieces = self._pieces(lines, tree.body, 0, len(lines), prefix="", header="")
+        documents: List[Document] = []
+        for piece in pieces:
+            text = piece.header + "".join(lines[piece.start:piece.end])
+            if not text.strip():
+                continue
+            if len(text) <= self.max_chars:
+                documents.append(self._document(text, source, piece, offsets[piece.start], piece.start, piece.end))
+                continue
+            # A single statement larger than a chunk: split it by characters.
+            body = "".join(lines[piece.start:piece.end])
+            for part in self._fallback.create_documents([body]):
+                offset = offsets[piece.start] + part.metadata["start_index"]
+                first = bisect.bisect_right(offsets, offset) - 1
+                last = bisect.bisect_right(offsets, offset + len(part.page_content) - 1) - 1
+                documents.append(self._document(piece.header + part.page_content, source, piece, offset, first, last + 1))
+        return documents
+
+    def _document(self, text: str, source: str, piece: _Piece, start_index: int, start: int, end: int) -> Document:
+        return Document(
+            page_content=text,
+            metadata={
+                "source": source,
+                "start_index": start_index,
+                "qualname": ", ".join(piece.names) or "<module>",
+                "start_line": start + 1,
+                "end_line": max(start + 1, end),
+            },
+        )
+
+    @staticmethod
+    def _size(lines: List[str], piece: _Piece) -> int:
+        return len(piece.header) + sum(len(line) for line in lines[piece.start:piece.end])
+
+    def _pieces(self, lines: List[str], nodes: Sequence[ast.stmt], start: int, end: int, prefix: str, header: str) -> List[_Piece]:
+        """
+        Covers the lines [start, end) with one piece per statement in `nodes`,
+        splits the pieces that are too large and merges neighbours that fit together.
+        """
+        pieces: List[_Piece] = []
+        cursor = start
+        for i, node in enumerate(nodes):
+            node_end = end if i == len(nodes) - 1 else self._first_line(nodes[i + 1])
+            piece = _Piece(start=cursor, end=node_end, header=header)
+            if isinstance(node, _DEFINITIONS):
+                piece.names.append(prefix + node.name)
+            cursor = node_end
+            if self._size(lines, piece) > self.max_chars:
+                pieces.extend(self._split_node(lines, node, piece, prefix))
+            else:
+                pieces.append(piece)
+        return self._merge(lines, pieces)
+
+    def _split_node(self, lines: List[str], node: ast.stmt, piece: _Piece, prefix: str) -> List[_Piece]:
+        """Splits a large statement into its header and the pieces of its body."""
+        body = list(getattr(node, "body", None) or [])
+        if not body or not all(isinstance(child, ast.stmt) for child in body):
+            return [piece]
+
+        is_definition = isinstance(node, _DEFINITIONS)
+        # The docstring stays with the signature.
+        if is_definition and _is_docstring(body[0]):
+            body = body[1:]
+            if not body:
+                return [piece]
+        header_end = self._first_line(body[0])
+        head = _Piece(start=piece.start, end=header_end, names=list(piece.names), header=piece.header)
+
+        child_prefix = prefix
+        child_header = piece.header
+        if isinstance(node, _DEFINITIONS):
+            child_prefix = f"{prefix}{node.name}."
+            if not isinstance(node, ast.ClassDef):
+                # Body pieces of a function repeat its signature.
+                child_header = "".join(lines[self._first_line(node):node.body[0].lineno - 1])
+        children = self._pieces(lines, body, header_end, piece.end, child_prefix, child_header)
+        if is_definition and not isinstance(node, ast.ClassDef):
+            for child in children:
+                child.names = child.names or list(piece.names)
+        return [head] + children
+
+    def _merge(self, lines: List[str], pieces: List[_Piece]) -> List[_Piece]:
+        """Joins neighbouring pieces with the same header while they fit in one chunk."""
+        merged: List[_Piece] = []
+        for piece in pieces:
+            last = merged[-1] if merged else None
+            if (
+                last is not None and last.header == piece.header
+                and last.end == piece.start
+                and self._size(lines, last) + self._size(lines, piece) - len(piece.header) <= self.max_chars
+            ):
+                last.end = piece.end
+                last.names.extend(n for n in piece.names if n not in last.names)
+            else:
+                merged.append(piece)
+        return merged
+
+    @staticmethod
+    def _first_line(node: ast.stmt) -> int:
+        """The 0-based line where a statement starts, including its decorators."""
+        decorators = getattr(node, "decorator_list", None) or []
+        return min([node.lineno] + [d.lineno for d in decorators]) - 1
+
+
+def _is_docstring(node: ast.stmt) -> bool:
+    return isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
@@ -0,0 +1,89 @@
+# path: aida/rag/embedding_cache.py
+# title: Embedding Cache
+# role: Wraps an embedding function with a persistent cache keyed by model and content hash.
+
+import hashlib
+from typing import Any, Dict, List
+
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings, Space
+
+from aida.services.disk_cache import DiskCache
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    An embedding function that serves repeated texts from a disk cache.
+
+    Embeddings are stored as float32 bytes under (embedding model, sha256(text)),
+    so byte-identical chunks are embedded only once across files, sandbox copies
+    and restarts. Only the texts missing from the cache are sent to the wrapped
+    function, in a single batch. The wrapped function's name and configuration
+    are passed through, so existing Chroma collections accept the wrapper.
+    """
+    def __init__(
+        self,
+        embedding_function: EmbeddingFunction[Documents],
+        cache: DiskCache,
+        model_name: str,
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            embedding_function: The function that computes embeddings on a cache miss.
+            cache: The disk cache that stores the embeddings.
+            model_name: The embedding model name, part of every cache key.
+            enabled: If False, every call goes straight to the wrapped function.
+        """
+        self.embedding_function = embedding_function
+        self.cache = cache
+        self.model_name = model_name
+        self.enabled = bool(enabled)
+
+    def __call__(self, input: Documents) -> Embeddings:
+        if not self.enabled:
+            return self.embedding_function(input)
+
+        keys = [self._key(text) for text in input]
+        cached = self.cache.get_many(keys)
+
+        # Identical texts within the batch are embedded once.
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, input):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            computed = self.embedding_function(list(missing.values()))
+            fresh = {key: np.asarray(vector, dtype=np.float32).tobytes() for key, vector in zip(missing, computed)}
+            self.cache.put_many(fresh.items())
+            cached.update(fresh)
+
+        return [np.frombuffer(cached[key], dtype=np.float32) for key in keys]
+
+    def embed_query(self, input: Documents) -> Embeddings:
+        """Queries are embedded by the wrapped function, which may treat them differently from documents."""
+        return self.embedding_function.embed_query(input)
+
+    def _key(self, text: str) -> str:
+        return f"{self.model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the hit/miss counters and size of the cache."""
+        return self.cache.stats()
+
+    # --- Delegation to the wrapped function, so Chroma sees the original configuration ---
+
+    def name(self) -> str:  # type: ignore[override]
+        return self.embedding_function.name()
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.embedding_function.get_config()
+
+    def is_legacy(self) -> bool:
+        return self.embedding_function.is_legacy()
+
+    def default_space(self) -> Space:
+        return self.embedding_function.default_space()
+
+    def supported_spaces(self) -> List[Space]:
+        return self.embedding_function.supported_spaces()
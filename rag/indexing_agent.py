@@ -2,75 +2,593 @@
 # title: Indexing Agent
 # role: Handles the process of splitting and storing file content in the vector database.
 
+import bisect
+import hashlib
 import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterator, List, Optional, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from chromadb.api.types import Metadata
-from aida.rag.vector_store import VectorStore
+from aida.rag.vector_store import VectorStore, chunk_ids
+from aida.rag.manifest import IndexManifest
+from aida.rag.code_chunker import PythonChunker
+from aida.rag.lexical_index import LexicalIndex
 from aida.schemas import CodeChange
 
+if TYPE_CHECKING:
+    from chromadb.api.types import Embeddings, Metadata
+
+@dataclass
+class CompactionReport:
+    """
+    The result of `IndexingAgent.compact`.
+    """
+    orphans: int
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return max(0, self.bytes_before - self.bytes_after)
+
+    def summary(self) -> str:
+        return (
+            f"{self.orphans} orphan chunk(s) removed, {self.bytes_reclaimed / 1e6:.1f} MB reclaimed "
+            f"({self.bytes_before / 1e6:.1f} MB -> {self.bytes_after / 1e6:.1f} MB)"
+        )
+
+
 class IndexingAgent:
     """
     This agent is responsible for reading files, splitting them into chunks,
     and adding them to the vector store for later retrieval.
     It supports both full indexing and incremental updates.
+
+    With a manifest, the index persists across runs: `sync_index` compares the
+    workspace with the manifest and only embeds added or changed files and
+    deletes the chunks of removed ones.
+
+    Deleted and replaced chunks leave garbage in the store, and chunks whose
+    file was renamed behind the manifest's back become orphans. When their share
+    of the index passes `compaction.threshold` after an update, `compact` drops
+    the orphans and rewrites the store without the garbage.
+
+    The public methods may be called from several threads (e.g. the workspace
+    watcher and the orchestrator); they run one at a time.
     """
-    def __init__(self, vector_store: VectorStore, chunk_size: int, chunk_overlap: int):
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        chunk_size: int,
+        chunk_overlap: int,
+        manifest: Optional[IndexManifest] = None,
+        pipeline: Optional[Dict[str, Any]] = None,
+        code_chunking: Optional[Dict[str, Any]] = None,
+        lexical_index: Optional[LexicalIndex] = None,
+        compaction: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            vector_store: The store the chunks are written to.
+            chunk_size: The maximum number of characters per chunk.
+            chunk_overlap: The number of characters shared by neighbouring chunks.
+            manifest: The manifest that lets `sync_index` skip unchanged files.
+            pipeline: `chunk_workers`, `embed_batch_size`, `max_in_flight`,
+                `write_batch_size` and `progress_interval` (seconds, 0 disables
+                progress output) of the embedding pipeline.
+            code_chunking: `enabled` and `max_chars` of the AST-aware chunker used
+                for Python files; other files use the character splitter.
+            lexical_index: The keyword index kept in step with the vector store.
+            compaction: `enabled` and `threshold` (the garbage ratio, see
+                `garbage_ratio`, above which the index is compacted after an update).
+        """
         self.vector_store = vector_store
+        self.manifest = manifest
+        self.lexical_index = lexical_index
+        self._lock = threading.RLock()
+        pipeline = pipeline or {}
+        self.chunk_workers = max(1, int(pipeline.get("chunk_workers", 4)))
+        self.embed_batch_size = max(1, int(pipeline.get("embed_batch_size", 64)))
+        self.max_in_flight = max(1, int(pipeline.get("max_in_flight", 4)))
+        self.write_batch_size = max(1, int(pipeline.get("write_batch_size", 512)))
+        self.progress_interval = float(pipeline.get("progress_interval", 5.0))
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap,
             length_function=len,
+            add_start_index=True,
         )
+        compaction = compaction or {}
+        self.compaction_enabled = bool(compaction.get("enabled", True))
+        self.compaction_threshold = float(compaction.get("threshold", 0.3))
+        code_chunking = code_chunking or {}
+        self.code_chunker: Optional[PythonChunker] = None
+        if code_chunking.get("enabled", True):
+            self.code_chunker = PythonChunker(max_chars=int(code_chunking.get("max_chars", 1500)))
 
     def run_full_index(self, project_root: str, file_paths: List[str]):
         """
-        Performs a full indexing of all specified files.
-        The cleanup of the old index is now handled by the main application startup.
+        Rebuilds the index from scratch for all specified files.
+        """
+        with self._lock:
+            print("[IndexingAgent] Running full index...")
+            cache_before = self._embedding_cache_stats()
+            self.vector_store.clear()
+            if self.lexical_index is not None:
+                self.lexical_index.clear()
+            if self.manifest:
+                # Saved right away, so an interrupted rebuild is resumed rather than trusted.
+                self.manifest.clear()
+                self.manifest.save()
+            self._process_files(project_root, file_paths, fresh=True)
+            self.vector_store.persist()
+            if self.manifest:
+                self.manifest.save()
+            self._report_embedding_cache(cache_before)
+            self.vector_store.bump_generation()
+            print("[IndexingAgent] Full indexing complete.")
+
+    def sync_index(self, project_root: str, file_paths: List[str]):
+        """
+        Brings a persisted index up to date with the workspace, embedding only
+        added or changed files and deleting the chunks of removed ones.
+        Falls back to a full index without a manifest, or when the manifest
+        no longer matches the store (e.g. changed settings or a deleted database).
         """
-        print("[IndexingAgent] Running full index...")
-        self._process_files(project_root, file_paths)
-        print("[IndexingAgent] Full indexing complete.")
+        with self._lock:
+            if self.manifest is None:
+                self.run_full_index(project_root, file_paths)
+                return
+            if self.manifest.reset_required or (self.manifest.entries and self.vector_store.count() == 0):
+                self.run_full_index(project_root, file_paths)
+                return
+            self._load_lexical_index()
+
+            diff = self.manifest.diff(project_root, file_paths)
+            print(f"[IndexingAgent] Index manifest: {diff.summary()}.")
+            if not diff.is_empty:
+                cache_before = self._embedding_cache_stats()
+                for file_path in diff.removed:
+                    self._delete_file(file_path)
+                self._process_files(project_root, diff.added + diff.changed)
+                self._report_embedding_cache(cache_before)
+                self.vector_store.persist()
+                self.vector_store.bump_generation()
+            self.manifest.save()
+            print("[IndexingAgent] Index is up to date.")
+            self._maybe_compact(project_root)
 
     def update_index(self, project_root: str, changes: List[CodeChange]):
         """
         Incrementally updates the index based on a list of code changes.
         """
-        print(f"[IndexingAgent] Updating index with {len(changes)} change(s)...")
-        for change in changes:
-            if change.action in ["update", "delete"]:
-                self.vector_store.delete(file_path=change.file_path)
+        with self._lock:
+            print(f"[IndexingAgent] Updating index with {len(changes)} change(s)...")
+            for change in changes:
+                if change.action == "delete":
+                    self._delete_file(change.file_path)
 
-            if change.action in ["create", "update"]:
-                self._process_files(project_root, [change.file_path])
-        print("[IndexingAgent] Index update complete.")
+                if change.action in ["create", "update"]:
+                    self._process_files(project_root, [change.file_path])
+            self.vector_store.persist()
+            if self.manifest:
+                self.manifest.save()
+            self.vector_store.bump_generation()
+            print("[IndexingAgent] Index update complete.")
+            self._maybe_compact(project_root)
 
-    def _process_files(self, project_root: str, file_paths: List[str]):
+    def update_files(self, project_root: str, file_paths: List[str]) -> bool:
         """
-        Helper method to process a list of files and add them to the vector store.
+        Brings the given files up to date with their content on disk, e.g. after
+        the workspace watcher reported them: files whose content changed are
+        re-indexed, files that no longer exist are removed, and files the
+        manifest shows to be unchanged are skipped.
+
+        Returns:
+            True if the index changed.
+        """
+        with self._lock:
+            if self.manifest is not None:
+                diff = self.manifest.diff(project_root, file_paths, partial=True)
+                updated, removed = diff.added + diff.changed, diff.removed
+            else:
+                updated = [p for p in file_paths if (Path(project_root) / p).is_file()]
+                removed = sorted(set(file_paths) - set(updated))
+            if not updated and not removed:
+                return False
+            print(f"[IndexingAgent] Updating index for {len(updated)} changed and {len(removed)} removed file(s)...")
+            for file_path in removed:
+                self._delete_file(file_path)
+            self._process_files(project_root, updated)
+            self.vector_store.persist()
+            if self.manifest:
+                self.manifest.save()
+            self.vector_store.bump_generation()
+            self._maybe_compact(project_root)
+            return True
+
+    def garbage_ratio(self) -> float:
+        """
+        Returns the share of the index that is garbage: the larger of the store's
+        own garbage (see `VectorStore.garbage_ratio`) and the fraction of stored
+        chunks the manifest does not account for.
+        """
+        count = self.vector_store.count()
+        orphan_ratio = 0.0
+        if self.manifest is not None and count:
+            orphan_ratio = max(0, count - self.manifest.chunk_count()) / count
+        return max(self.vector_store.garbage_ratio(), orphan_ratio)
+
+    def compact(self, project_root: str) -> CompactionReport:
+        """
+        Deletes orphan chunks and rewrites the store without garbage: the ANN
+        index is rebuilt, and files shared with other projects' indexes are
+        vacuumed only when their garbage reaches the compaction threshold.
+
+        A chunk is an orphan if its file no longer exists in the project, or,
+        with a manifest, if the manifest does not list it for its file (e.g. a
+        stale chunk of an earlier version of the file).
+        """
+        with self._lock:
+            bytes_before = self.vector_store.disk_bytes()
+            orphans = self._orphan_ids(project_root)
+            if orphans:
+                self._delete_ids(orphans)
+            self.vector_store.compact(shared_threshold=self.compaction_threshold)
+            self.vector_store.persist()
+            if self.manifest:
+                self.manifest.save()
+            self.vector_store.bump_generation()
+            report = CompactionReport(len(orphans), bytes_before, self.vector_store.disk_bytes())
+            print(f"[IndexingAgent] Compacted the index: {report.summary()}.")
+            return report
+
+    def _maybe_compact(self, project_root: str):
+        """Compacts the index if its garbage ratio has reached the threshold."""
+        if not self.compaction_enabled:
+            return
+        ratio = self.garbage_ratio()
+        if ratio >= self.compaction_threshold:
+            print(f"[IndexingAgent] {ratio:.0%} of the index is garbage, compacting...")
+            self.compact(project_root)
+
+    def _orphan_ids(self, project_root: str) -> List[str]:
+        """Returns the ids of the stored chunks whose file is gone or that the manifest does not list."""
+        root = Path(project_root)
+        expected: Optional[set] = None
+        if self.manifest is not None:
+            for file_path in [p for p in self.manifest.entries if not (root / p).is_file()]:
+                self.manifest.remove(file_path)
+            expected = {chunk_id for entry in self.manifest.entries.values() for chunk_id in entry.chunk_ids}
+        exists: Dict[str, bool] = {}
+        orphans: List[str] = []
+        for ids, _, metadatas in self.vector_store.iter_documents(batch_size=self.write_batch_size):
+            for chunk_id, metadata in zip(ids, metadatas):
+                source = str((metadata or {}).get("source", ""))
+                if source not in exists:
+                    exists[source] = (root / source).is_file()
+                if not exists[source] or (expected is not None and chunk_id not in expected):
+                    orphans.append(chunk_id)
+        return orphans
+
+    def _load_lexical_index(self):
+        """
+        Fills the in-memory lexical index from the documents already in the vector
+        store, e.g. after a restart, so it matches the store before incremental updates.
+        """
+        if self.lexical_index is None or len(self.lexical_index) == self.vector_store.count():
+            return
+        self.lexical_index.clear()
+        for ids, documents, metadatas in self.vector_store.iter_documents(batch_size=self.write_batch_size):
+            self.lexical_index.add(ids, documents, metadatas)
+        print(f"[IndexingAgent] Loaded {len(self.lexical_index)} chunk(s) into the lexical index.")
+
+    def _delete_ids(self, ids: List[str]):
+        """Deletes chunks from the vector store and the lexical index."""
+        self.vector_store.delete_ids(ids)
+        if self.lexical_index is not None:
+            self.lexical_index.remove(ids)
+
+    def _embedding_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Returns the embedding cache counters if the store's embedding function is cached."""
+        stats = getattr(self.vector_store.embedding_function, "stats", None)
+        return stats() if callable(stats) else None
+
+    def _report_embedding_cache(self, before: Optional[Dict[str, Any]]):
+        """Prints the embedding cache hit rate of the work done since `before` was taken."""
+        after = self._embedding_cache_stats()
+        if before is None or after is None:
+            return
+        hits = after["hits"] - before["hits"]
+        misses = after["misses"] - before["misses"]
+        if hits + misses:
+            print(
+                f"[IndexingAgent] Embedding cache: {hits} hit(s), {misses} miss(es) "
+                f"({hits / (hits + misses):.0%} hit rate, {after['entries']} entries)."
+            )
+
+    def _delete_file(self, file_path: str):
+        """
+        Removes a file's chunks from the store, by the ids recorded in the manifest if known.
+        """
+        entry = self.manifest.remove(file_path) if self.manifest else None
+        if entry is not None:
+            self._delete_ids(entry.chunk_ids)
+        else:
+            self.vector_store.delete(file_path=file_path)
+            if self.lexical_index is not None:
+                self.lexical_index.remove_source(file_path)
+
+    def _previous_ids(self, file_path: str) -> List[str]:
+        """Returns the ids currently stored for a file, from the manifest if it knows the file."""
+        entry = self.manifest.entries.get(file_path) if self.manifest else None
+        return entry.chunk_ids if entry is not None else self.vector_store.ids_for(file_path)
+
+    def _process_files(self, project_root: str, file_paths: List[str], fresh: bool = False):
         """
-        all_texts: List[str] = []
-        all_metadatas: List[Metadata] = []
+        Streams files through the embedding pipeline and upserts them into the vector store.
+        Only chunks whose content changed are embedded; chunks a file no longer
+        produces are deleted. The chunk ids of each file are recorded in the manifest
+        once all of its chunks are written.
 
+        Files are read and split by a pool of chunking workers, a bounded number
+        of files ahead of the consumer. New chunks are grouped into embedding batches
+        of `embed_batch_size` that run concurrently, at most `max_in_flight` at a time;
+        when that limit is reached, the pipeline waits for the oldest batch and writes
+        it to the store in batches of up to `write_batch_size`. Chunking pauses
+        while embedding is behind, so peak memory depends on these limits, not on
+        the size of the repository.
+
+        Args:
+            fresh: The store is known to hold no chunks of these files, so the
+                lookup of previously stored chunks is skipped.
+        """
+        file_paths = list(dict.fromkeys(file_paths))
+        if not file_paths:
+            return
+        with ThreadPoolExecutor(self.chunk_workers, thread_name_prefix="aida-chunk") as chunk_pool, \
+                ThreadPoolExecutor(self.max_in_flight, thread_name_prefix="aida-embed") as embed_pool:
+            run = _PipelineRun(self, project_root, len(file_paths), fresh, embed_pool)
+            for chunks in self._chunk_files(chunk_pool, project_root, file_paths):
+                run.add_file(chunks)
+            run.finish()
+
+    def _chunk_files(self, pool: ThreadPoolExecutor, project_root: str, file_paths: List[str]) -> Iterator["_FileChunks"]:
+        """
+        Yields the chunks of each file in order, keeping at most two files per
+        worker read and split ahead of the consumer.
+        """
+        window = self.chunk_workers * 2
+        pending: Deque["Future[Optional[_FileChunks]]"] = deque()
         for file_path_str in file_paths:
-            full_path = Path(project_root) / file_path_str
-            if not full_path.is_file():
-                continue
-
-            try:
-                with open(full_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                chunks = self.text_splitter.split_text(content)
-                metadatas: List[Metadata] = [{"source": file_path_str} for _ in chunks]
-                
-                all_texts.extend(chunks)
-                all_metadatas.extend(metadatas)
-                
-            except (UnicodeDecodeError, IOError):
-                print(f"[IndexingAgent] Warning: Could not decode file {file_path_str} as utf-8, skipping.")
-                continue
-
-        if all_texts:
-            self.vector_store.add(documents=all_texts, metadatas=all_metadatas)
\ No newline at end of file
+            pending.append(pool.submit(self._chunk_file, project_root, file_path_str))
+            if len(pending) >= window:
+                chunks = pending.popleft().result()
+                if chunks is not None:
+                    yield chunks
+        while pending:
+            chunks = pending.popleft().result()
+            if chunks is not None:
+                yield chunks
+
+    def _chunk_file(self, project_root: str, file_path_str: str) -> Optional["_FileChunks"]:
+        """
+        Reads and splits one file. Runs on a chunking worker.
+        Returns None if the file does not exist, and chunks marked `undecodable`
+        if it is not utf-8.
+
+        The stat is taken from the open file before reading it, so an edit made
+        while the chunks are embedded leaves a newer mtime on disk than the one
+        recorded, and the next sync picks the file up again.
+        """
+        full_path = Path(project_root) / file_path_str
+        if not full_path.is_file():
+            return None
+        try:
+            with full_path.open('rb') as f:
+                stat = os.fstat(f.fileno())
+                raw = f.read()
+        except IOError as e:
+            print(f"[IndexingAgent] Warning: Could not read file {file_path_str}, skipping: {e}")
+            return None
+        digest = hashlib.sha256(raw).hexdigest()
+        try:
+            content = raw.decode('utf-8')
+        except UnicodeDecodeError:
+            print(f"[IndexingAgent] Warning: Could not decode file {file_path_str} as utf-8, skipping.")
+            return _FileChunks(path=file_path_str, digest=digest, stat=stat, undecodable=True)
+
+        documents = None
+        if self.code_chunker and file_path_str.endswith(".py"):
+            # Returns None for files that do not parse, which fall back to the character splitter.
+            documents = self.code_chunker.split(content, file_path_str)
+        if documents is None:
+            documents = self.text_splitter.create_documents([content], metadatas=[{"source": file_path_str}])
+            _add_line_numbers(content, documents)
+        return _FileChunks(
+            path=file_path_str,
+            digest=digest,
+            stat=stat,
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+        )
+
+
+def _add_line_numbers(content: str, documents: List[Any]) -> None:
+    """Adds `start_line` and `end_line` (1-based) to chunks that carry a `start_index`."""
+    line_starts = [0] + [match.end() for match in re.finditer("\n", content)]
+    for doc in documents:
+        start = doc.metadata.get("start_index")
+        if start is None or start < 0:
+            continue
+        end = start + max(0, len(doc.page_content) - 1)
+        doc.metadata["start_line"] = bisect.bisect_right(line_starts, start)
+        doc.metadata["end_line"] = bisect.bisect_right(line_starts, end)
+
+
+@dataclass
+class _FileChunks:
+    """The chunks of one file, as produced by a chunking worker."""
+    path: str
+    digest: str
+    stat: os.stat_result
+    undecodable: bool = False
+    documents: List[str] = field(default_factory=list)
+    metadatas: List["Metadata"] = field(default_factory=list)
+
+
+@dataclass
+class _PendingFile:
+    """A file whose new chunks are still being embedded or written."""
+    path: str
+    digest: str
+    stat: os.stat_result
+    ids: List[str]
+    stale: List[str]
+    remaining: int
+
+
+# (file, chunk id, document, metadata) of a chunk that needs an embedding.
+_Chunk = Tuple[_PendingFile, str, str, "Metadata"]
+
+
+class _PipelineRun:
+    """
+    The state of one `IndexingAgent._process_files` call: the chunks waiting for
+    an embedding batch, the batches in flight, the embedded chunks waiting to be
+    written, and the progress counters. All store and manifest access happens on
+    the calling thread; only `VectorStore.embed` runs on the embedding workers.
+    """
+    def __init__(self, agent: IndexingAgent, project_root: str, total_files: int, fresh: bool, embed_pool: ThreadPoolExecutor):
+        self.agent = agent
+        self.store = agent.vector_store
+        self.project_root = project_root
+        self.total_files = total_files
+        self.fresh = fresh
+        self.embed_pool = embed_pool
+        self.write_batch_size = min(agent.write_batch_size, self.store.max_batch_size())
+
+        self.buffer: List[_Chunk] = []
+        self.in_flight: Deque[Tuple["Future[Embeddings]", List[_Chunk]]] = deque()
+        self.to_write: List[Tuple[_Chunk, Any]] = []
+
+        self.files_done = 0
+        self.embedded = 0
+        self.unchanged = 0
+        self.started = time.monotonic()
+        self.last_report = self.started
+
+    def add_file(self, chunks: _FileChunks):
+        """Queues the new chunks of a file and refreshes the metadata of its unchanged ones."""
+        previous = [] if self.fresh else self.agent._previous_ids(chunks.path)
+        if chunks.undecodable:
+            self.agent._delete_ids(previous)
+            if self.agent.manifest:
+                # Remember the file so it is not retried until it changes.
+                self.agent.manifest.record(self.project_root, chunks.path, [], sha256=chunks.digest, stat=chunks.stat)
+            self._file_done()
+            return
+
+        ids = chunk_ids(chunks.documents, chunks.metadatas)
+        existing = set() if self.fresh else self.store.existing_ids(ids)
+        current = set(ids)
+        pending = _PendingFile(
+            path=chunks.path,
+            digest=chunks.digest,
+            stat=chunks.stat,
+            ids=ids,
+            stale=[i for i in previous if i not in current],
+            remaining=len(ids) - len(existing),
+        )
+
+        kept = [i for i, chunk_id in enumerate(ids) if chunk_id in existing]
+        for start in range(0, len(kept), self.write_batch_size):
+            batch = kept[start:start + self.write_batch_size]
+            self.store.update_metadatas([ids[i] for i in batch], [chunks.metadatas[i] for i in batch])
+        self.unchanged += len(kept)
+
+        for i, chunk_id in enumerate(ids):
+            if chunk_id not in existing:
+                self.buffer.append((pending, chunk_id, chunks.documents[i], chunks.metadatas[i]))
+                if len(self.buffer) >= self.agent.embed_batch_size:
+                    self._submit()
+        if pending.remaining == 0:
+            self._finish_file(pending)
+
+    def finish(self):
+        """Embeds and writes everything still queued, then prints the final progress."""
+        if self.buffer:
+            self._submit()
+        while self.in_flight:
+            self._collect_oldest()
+        self._write()
+        self._report(final=True)
+
+    def _submit(self):
+        """Sends the buffered chunks as one embedding batch, waiting first if too many are in flight."""
+        while len(self.in_flight) >= self.agent.max_in_flight:
+            self._collect_oldest()
+        batch, self.buffer = self.buffer, []
+        future = self.embed_pool.submit(self.store.embed, [document for _, _, document, _ in batch])
+        self.in_flight.append((future, batch))
+
+    def _collect_oldest(self):
+        """Waits for the oldest embedding batch and queues its chunks for writing."""
+        future, batch = self.in_flight.popleft()
+        embeddings = future.result()
+        self.to_write.extend(zip(batch, embeddings))
+        if len(self.to_write) >= self.write_batch_size:
+            self._write()
+
+    def _write(self):
+        """Writes the embedded chunks to the store and finishes the files that are complete."""
+        while self.to_write:
+            batch = self.to_write[:self.write_batch_size]
+            del self.to_write[:self.write_batch_size]
+            self.store.upsert_embedded(
+                ids=[chunk_id for (_, chunk_id, _, _), _ in batch],
+                documents=[document for (_, _, document, _), _ in batch],
+                metadatas=[metadata for (_, _, _, metadata), _ in batch],
+                embeddings=[embedding for _, embedding in batch],
+            )
+            if self.agent.lexical_index is not None:
+                self.agent.lexical_index.add(
+                    [chunk_id for (_, chunk_id, _, _), _ in batch],
+                    [document for (_, _, document, _), _ in batch],
+                    [metadata for (_, _, _, metadata), _ in batch],
+                )
+            self.embedded += len(batch)
+            for (pending, _, _, _), _ in batch:
+                pending.remaining -= 1
+                if pending.remaining == 0:
+                    self._finish_file(pending)
+
+    def _finish_file(self, pending: _PendingFile):
+        self.agent._delete_ids(pending.stale)
+        if self.agent.manifest:
+            self.agent.manifest.record(
+                self.project_root, pending.path, pending.ids, sha256=pending.digest, stat=pending.stat,
+            )
+        self._file_done()
+
+    def _file_done(self):
+        self.files_done += 1
+        self._report()
+
+    def _report(self, final: bool = False):
+        now = time.monotonic()
+        interval = self.agent.progress_interval
+        if not final and (interval <= 0 or now - self.last_report < interval):
+            return
+        self.last_report = now
+        elapsed = now - self.started
+        rate = self.embedded / elapsed if elapsed > 0 else 0.0
+        print(
+            f"[IndexingAgent] {'Indexed' if final else 'Progress:'} {self.files_done}/{self.total_files} file(s): "
+            f"{self.embedded} chunk(s) embedded, {self.unchanged} unchanged ({rate:.1f} chunks/s, {elapsed:.1f}s)."
+        )
@@ -0,0 +1,169 @@
+# path: aida/rag/lexical_index.py
+# title: Lexical Index
+# role: An in-memory BM25 inverted index over the chunks in the vector store.
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from chromadb.api.types import Metadata
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+# Splits snake_case and camelCase identifiers into their words.
+_WORD = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercases identifiers and words, keeping each identifier whole (`parse_config`)
+    as well as its parts (`parse`, `config`), so that both exact symbol lookups
+    and natural-language queries match.
+    """
+    tokens: List[str] = []
+    for identifier in _IDENTIFIER.findall(text):
+        whole = identifier.lower()
+        if len(whole) > 1:
+            tokens.append(whole)
+        parts = _WORD.findall(identifier)
+        if len(parts) > 1:
+            tokens.extend(p.lower() for p in parts if len(p) > 1)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    A BM25 index kept next to the vector store, so that queries naming a symbol
+    find the chunks that literally contain it even when the embedding does not.
+
+    Chunks are added, replaced and removed by id as the IndexingAgent writes the
+    vector store. The index lives in memory; after a restart it is rebuilt from
+    the documents stored in the vector store (see `IndexingAgent.sync_index`).
+    A query only visits the postings of its own terms.
+    """
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            k1: The BM25 term-frequency saturation.
+            b: The BM25 document-length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._terms: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._sources: Dict[str, Set[str]] = {}
+        self._source_of: Dict[str, str] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def memory_bytes(self) -> int:
+        """
+        An estimate of the index's memory: each (term, chunk) pair is held twice,
+        in the postings and in the chunk's term counts, at about 100 bytes each,
+        plus about 400 bytes of bookkeeping per chunk.
+        """
+        with self._lock:
+            pairs = sum(len(terms) for terms in self._terms.values())
+            return 200 * pairs + 400 * len(self._lengths)
+
+    def add(self, ids: List[str], documents: List[str], metadatas: Optional[List["Metadata"]] = None) -> None:
+        """Indexes chunks, replacing any chunk that is already indexed under the same id."""
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                self._remove(chunk_id)
+                counts = Counter(tokenize(document))
+                self._terms[chunk_id] = dict(counts)
+                length = sum(counts.values())
+                self._lengths[chunk_id] = length
+                self._total_length += length
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[chunk_id] = tf
+                source = str(metadata.get("source", ""))
+                self._source_of[chunk_id] = source
+                self._sources.setdefault(source, set()).add(chunk_id)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Removes chunks by id; unknown ids are ignored."""
+        with self._lock:
+            for chunk_id in ids:
+                self._remove(chunk_id)
+
+    def remove_source(self, source: str) -> None:
+        """Removes every chunk of a file."""
+        with self._lock:
+            for chunk_id in list(self._sources.get(source, ())):
+                self._remove(chunk_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._terms.clear()
+            self._lengths.clear()
+            self._sources.clear()
+            self._source_of.clear()
+            self._total_length = 0
+
+    def _remove(self, chunk_id: str) -> None:
+        terms = self._terms.pop(chunk_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            del postings[chunk_id]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(chunk_id)
+        source = self._source_of.pop(chunk_id)
+        ids = self._sources[source]
+        ids.discard(chunk_id)
+        if not ids:
+            del self._sources[source]
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        accept_source: Optional[Callable[[str], bool]] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Returns the ids and BM25 scores of the best-matching chunks, best first.
+
+        Args:
+            query: The search query.
+            n_results: The number of chunks to return.
+            accept_source: If given, only chunks whose source it accepts are returned.
+        """
+        with self._lock:
+            count = len(self._lengths)
+            if count == 0:
+                return []
+            average_length = self._total_length / count or 1.0
+            scores: Dict[str, float] = {}
+            accepted: Dict[str, bool] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    if accept_source is not None and not self._accepts(accept_source, chunk_id, accepted):
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / average_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return heapq.nlargest(n_results, scores.items(), key=lambda item: item[1])
+
+    def _accepts(self, accept_source: Callable[[str], bool], chunk_id: str, accepted: Dict[str, bool]) -> bool:
+        """Applies the source filter once per source and search."""
+        source = self._source_of.get(chunk_id, "")
+        result = accepted.get(source)
+        if result is None:
+            result = accepted[source] = accept_source(source)
+        return result
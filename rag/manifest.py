@@ -0,0 +1,192 @@
+# path: aida/rag/manifest.py
+# title: Index Manifest
+# role: Records which files are in the vector index so startup can re-embed only what changed.
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Bumped whenever the chunk id scheme or the chunk metadata changes, so older indexes are rebuilt.
+MANIFEST_VERSION = 3
+
+
+@dataclass
+class ManifestEntry:
+    """
+    The state of one indexed file at the time it was embedded.
+    """
+    path: str
+    size: int
+    mtime_ns: int
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ManifestDiff:
+    """
+    The difference between the manifest and the files currently in the workspace.
+    """
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.changed or self.removed)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.removed)} removed, {len(self.unchanged)} unchanged"
+        )
+
+
+def file_sha256(path: Path) -> str:
+    """Returns the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IndexManifest:
+    """
+    A JSON file stored next to the vector database that lists every indexed file
+    with its size, modification time, content hash and chunk ids.
+
+    Files whose size and modification time are unchanged are trusted without
+    reading them; otherwise the content hash decides whether the file changed.
+    The manifest also records the indexing settings (chunking parameters and
+    embedding model). If they change, the stored entries are discarded and
+    `reset_required` is set so that the index is rebuilt from scratch.
+    """
+    def __init__(self, path: str, settings: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            path: The location of the manifest file.
+            settings: The settings the index is built with; a mismatch invalidates the manifest.
+        """
+        self.path = Path(path)
+        self.settings = dict(settings or {})
+        self.entries: Dict[str, ManifestEntry] = {}
+        self.reset_required = False
+        self.load()
+
+    def load(self) -> None:
+        """Reads the manifest from disk; a missing, corrupt or outdated manifest is treated as empty."""
+        self.entries = {}
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[IndexManifest] Could not read {self.path}, rebuilding the index: {e}")
+            self.reset_required = True
+            return
+        if data.get("version") != MANIFEST_VERSION or data.get("settings") != self.settings:
+            print("[IndexManifest] Indexing settings changed since the last run; the index will be rebuilt.")
+            self.reset_required = True
+            return
+        self.entries = {e["path"]: ManifestEntry(**e) for e in data.get("files", [])}
+
+    def save(self) -> None:
+        """Writes the manifest atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "settings": self.settings,
+            "files": [asdict(e) for e in sorted(self.entries.values(), key=lambda e: e.path)],
+        }
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, indent=1), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        """Forgets all entries, e.g. after the vector store was cleared."""
+        self.entries = {}
+        self.reset_required = False
+
+    def diff(self, project_root: str, file_paths: List[str], partial: bool = False) -> ManifestDiff:
+        """
+        Compares the manifest with the given workspace files.
+
+        By default `file_paths` lists the whole workspace, and recorded files not
+        in it are reported as removed. With `partial`, only the given paths are
+        compared, and those that no longer exist are reported as removed.
+
+        Unchanged files whose modification time moved (e.g. after a checkout)
+        have their recorded stat refreshed so the next diff skips hashing them.
+        """
+        result = ManifestDiff()
+        current = set()
+        for rel_path in file_paths:
+            full_path = Path(project_root) / rel_path
+            try:
+                stat = full_path.stat()
+            except OSError:
+                continue
+            current.add(rel_path)
+            entry = self.entries.get(rel_path)
+            if entry is None:
+                result.added.append(rel_path)
+            elif entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                result.unchanged.append(rel_path)
+            elif entry.size == stat.st_size and entry.sha256 == file_sha256(full_path):
+                entry.mtime_ns = stat.st_mtime_ns
+                result.unchanged.append(rel_path)
+            else:
+                result.changed.append(rel_path)
+        candidates = set(file_paths) if partial else set(self.entries)
+        result.removed = sorted(path for path in candidates - current if path in self.entries)
+        return result
+
+    def record(
+        self,
+        project_root: str,
+        rel_path: str,
+        chunk_ids: List[str],
+        sha256: Optional[str] = None,
+        stat: Optional[os.stat_result] = None,
+    ) -> None:
+        """
+        Stores the state of a file together with the ids of its chunks.
+
+        The stat should be the one taken when the indexed content was read: a
+        stat taken later could belong to a newer version of the file, which the
+        next diff would then wrongly trust as unchanged. If no stat is given and
+        the file is gone, its entry is dropped instead; chunks it leaves behind
+        are collected as orphans by compaction.
+
+        Args:
+            sha256: The digest of the content that was indexed, if already known.
+            stat: The stat of the file taken when its content was read, if known.
+        """
+        full_path = Path(project_root) / rel_path
+        try:
+            if stat is None:
+                stat = full_path.stat()
+            if sha256 is None:
+                sha256 = file_sha256(full_path)
+        except OSError:
+            self.entries.pop(rel_path, None)
+            return
+        self.entries[rel_path] = ManifestEntry(
+            path=rel_path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            sha256=sha256,
+            chunk_ids=list(chunk_ids),
+        )
+
+    def remove(self, rel_path: str) -> Optional[ManifestEntry]:
+        """Drops a file from the manifest and returns its entry."""
+        return self.entries.pop(rel_path, None)
+
+    def chunk_count(self) -> int:
+        return sum(len(e.chunk_ids) for e in self.entries.values())
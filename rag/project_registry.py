@@ -0,0 +1,235 @@
+# path: aida/rag/project_registry.py
+# title: Project Index Registry
+# role: Keeps a namespaced index per project root and an LRU of the indexes loaded in memory.
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from aida.analysis import SymbolIndex
+from aida.rag.indexing_agent import IndexingAgent
+from aida.rag.lexical_index import LexicalIndex
+from aida.rag.manifest import IndexManifest
+from aida.rag.retrieval_agent import RetrievalAgent
+from aida.rag.vector_store import VectorStore
+
+if TYPE_CHECKING:
+    from chromadb.api.types import EmbeddingFunction
+
+PROJECTS_DIR = "projects"
+PROJECT_FILE = "project.json"
+
+
+def project_id(project_root: str) -> str:
+    """
+    Returns the id of a project root: its directory name, made safe for
+    collection and file names, and a digest of its absolute path, so two
+    checkouts with the same name do not share an index (`billing-3f9a0c12d4`).
+    """
+    root = Path(project_root).resolve()
+    slug = re.sub(r"[^a-z0-9]+", "-", root.name.lower()).strip("-")[:40] or "project"
+    return f"{slug}-{hashlib.sha256(str(root).encode('utf-8')).hexdigest()[:10]}"
+
+
+@dataclass
+class ProjectIndex:
+    """
+    Everything indexed for one project root. The vector index is a namespace in
+    the shared vector database; the manifest and the symbol table are stored in
+    `<db_path>/projects/<project_id>/`.
+    """
+    project_id: str
+    root: str
+    vector_store: VectorStore
+    lexical_index: LexicalIndex
+    manifest: IndexManifest
+    symbol_index: SymbolIndex
+    indexing_agent: IndexingAgent
+    retrieval_agent: RetrievalAgent
+
+    def memory_bytes(self) -> int:
+        """An estimate of the memory held by the vector and lexical indexes."""
+        return self.vector_store.memory_bytes() + self.lexical_index.memory_bytes()
+
+    def close(self) -> None:
+        """Persists the indexes and releases their memory."""
+        self.symbol_index.save()
+        self.vector_store.close()
+        self.lexical_index.clear()
+
+
+class ProjectIndexRegistry:
+    """
+    Opens the index of each project AIDA works on and keeps the most recently
+    used ones loaded, so switching back to a project reuses its index in memory
+    instead of loading it again, and a project seen before only re-embeds the
+    files that changed since.
+
+    The least recently used projects are closed when more than `max_loaded` are
+    open or their estimated memory exceeds `max_memory_mb`. The active project
+    (the one opened last) is never closed.
+    """
+    def __init__(
+        self,
+        db_path: str,
+        embedding_function: "EmbeddingFunction",
+        indexing_agent_factory: Callable[..., IndexingAgent],
+        retrieval_agent_factory: Callable[..., RetrievalAgent],
+        backend: str = "chroma",
+        backend_options: Optional[Dict[str, Any]] = None,
+        manifest_settings: Optional[Dict[str, Any]] = None,
+        max_loaded: int = 3,
+        max_memory_mb: float = 1024,
+    ):
+        """
+        Args:
+            db_path: The vector database directory shared by all projects.
+            embedding_function: The embedding function of every vector store.
+            indexing_agent_factory: Creates an IndexingAgent; called with the
+                project's `vector_store`, `manifest` and `lexical_index`.
+            retrieval_agent_factory: Creates a RetrievalAgent; called with the
+                project's `vector_store` and `lexical_index`.
+            backend: The vector backend ("chroma" or "numpy").
+            backend_options: Options passed to the backend.
+            manifest_settings: The settings recorded in each project's manifest.
+            max_loaded: The number of projects kept open.
+            max_memory_mb: The estimated memory the open projects may use;
+                0 disables the limit.
+        """
+        self.db_path = Path(db_path)
+        self.embedding_function = embedding_function
+        self.indexing_agent_factory = indexing_agent_factory
+        self.retrieval_agent_factory = retrieval_agent_factory
+        self.backend = backend
+        self.backend_options = dict(backend_options or {})
+        if backend == "chroma" and max_memory_mb:
+            # Chroma bounds the HNSW indexes it keeps loaded by the same budget.
+            self.backend_options.setdefault("memory_limit_mb", max_memory_mb)
+        self.manifest_settings = dict(manifest_settings or {})
+        self.max_loaded = max(1, int(max_loaded))
+        self.max_memory_mb = float(max_memory_mb or 0)
+        self._loaded: "OrderedDict[str, ProjectIndex]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def active(self) -> Optional[ProjectIndex]:
+        """The project opened last, or None before the first `open`."""
+        with self._lock:
+            return next(reversed(self._loaded.values()), None)
+
+    def open(self, project_root: str) -> ProjectIndex:
+        """
+        Returns the index of a project root, loading it if it is not open, and
+        makes it the active project. The caller brings it up to date with the
+        files (`IndexingAgent.sync_index`, `SymbolIndex.sync`) and then calls `trim`.
+        """
+        key = project_id(project_root)
+        with self._lock:
+            project = self._loaded.get(key)
+            if project is not None:
+                self._loaded.move_to_end(key)
+                print(f"[ProjectIndexRegistry] Switched to the loaded index of '{project.root}' ({key}).")
+                return project
+            project = self._load(key, str(Path(project_root).resolve()))
+            self._loaded[key] = project
+            self.trim()
+            return project
+
+    def _load(self, key: str, root: str) -> ProjectIndex:
+        project_dir = self.db_path / PROJECTS_DIR / key
+        project_dir.mkdir(parents=True, exist_ok=True)
+        self._write_project_file(project_dir, root)
+        vector_store = VectorStore(
+            str(self.db_path),
+            self.embedding_function,
+            backend=self.backend,
+            backend_options=self.backend_options,
+            namespace=key,
+        )
+        lexical_index = LexicalIndex()
+        manifest = IndexManifest(str(project_dir / "index_manifest.json"), settings=self.manifest_settings)
+        print(f"[ProjectIndexRegistry] Opened the index of '{root}' ({key}).")
+        return ProjectIndex(
+            project_id=key,
+            root=root,
+            vector_store=vector_store,
+            lexical_index=lexical_index,
+            manifest=manifest,
+            symbol_index=SymbolIndex(str(project_dir / "symbols.json")),
+            indexing_agent=self.indexing_agent_factory(
+                vector_store=vector_store, manifest=manifest, lexical_index=lexical_index
+            ),
+            retrieval_agent=self.retrieval_agent_factory(vector_store=vector_store, lexical_index=lexical_index),
+        )
+
+    @staticmethod
+    def _write_project_file(project_dir: Path, root: str) -> None:
+        """Records the root of the project, so `known_projects` can list it after a restart."""
+        path = project_dir / PROJECT_FILE
+        try:
+            if json.loads(path.read_text(encoding="utf-8")).get("root") == root:
+                return
+        except (OSError, ValueError):
+            pass
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"root": root}), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def trim(self) -> List[str]:
+        """
+        Closes the least recently used projects until at most `max_loaded` are
+        open and they fit in `max_memory_mb`. Returns the ids of the closed projects.
+        """
+        closed = []
+        with self._lock:
+            while len(self._loaded) > 1:
+                over_count = len(self._loaded) > self.max_loaded
+                over_memory = self.max_memory_mb > 0 and self.memory_bytes() > self.max_memory_mb * (1 << 20)
+                if not (over_count or over_memory):
+                    break
+                key, project = self._loaded.popitem(last=False)
+                project.close()
+                closed.append(key)
+                reason = "too many open projects" if over_count else "memory limit"
+                print(f"[ProjectIndexRegistry] Closed the index of '{project.root}' ({reason}).")
+        return closed
+
+    def close(self, project_root: str) -> None:
+        """Closes a project's index if it is open."""
+        with self._lock:
+            project = self._loaded.pop(project_id(project_root), None)
+        if project is not None:
+            project.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            projects = list(self._loaded.values())
+            self._loaded.clear()
+        for project in projects:
+            project.close()
+
+    def memory_bytes(self) -> int:
+        """The estimated memory of all open projects."""
+        with self._lock:
+            return sum(project.memory_bytes() for project in self._loaded.values())
+
+    def loaded(self) -> List[ProjectIndex]:
+        """The open projects, least recently used first."""
+        with self._lock:
+            return list(self._loaded.values())
+
+    def known_projects(self) -> Dict[str, str]:
+        """The ids and roots of every project that has an index, open or not."""
+        known = {}
+        for project_file in sorted((self.db_path / PROJECTS_DIR).glob(f"*/{PROJECT_FILE}")):
+            try:
+                known[project_file.parent.name] = json.loads(project_file.read_text(encoding="utf-8"))["root"]
+            except (OSError, ValueError, KeyError):
+                continue
+        return known
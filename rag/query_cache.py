@@ -0,0 +1,77 @@
+# path: aida/rag/query_cache.py
+# title: Query Cache
+# role: An in-memory LRU cache of retrieval results, invalidated by the index generation.
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """Collapses whitespace and case so trivially different queries share an entry."""
+    return " ".join(query.split()).lower()
+
+
+class QueryCache:
+    """
+    Remembers the results of recent retrieval queries.
+
+    Every entry is tagged with the index generation it was computed at (see
+    `VectorStore.generation`). A lookup at a different generation is a miss and
+    drops the entry, so results from before an index update are never served.
+    The least recently used entries are evicted beyond `max_entries`.
+    """
+    def __init__(self, max_entries: int = 256, enabled: bool = True):
+        """
+        Args:
+            max_entries: The number of query results kept.
+            enabled: If False, every lookup misses and nothing is stored.
+        """
+        self.max_entries = max(1, int(max_entries))
+        self.enabled = bool(enabled)
+        self._entries: "OrderedDict[Hashable, Tuple[int, List[Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query: str, n_results: int, *filters: Hashable) -> Tuple[Hashable, ...]:
+        """Builds the key of a query; `filters` are whatever else restricts the results."""
+        return (normalize_query(query), n_results, *filters)
+
+    def get(self, key: Hashable, generation: int) -> Optional[List[Any]]:
+        """Returns a copy of the cached results, or None if absent or computed at another generation."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != generation:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key: Hashable, generation: int, results: List[Any]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (generation, list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
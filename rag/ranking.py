@@ -0,0 +1,74 @@
+# path: aida/rag/ranking.py
+# title: Ranking Helpers
+# role: Similarity, rank fusion and maximal-marginal-relevance re-ranking of retrieval candidates.
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+
+def cosine_similarities(query: ArrayLike, vectors: ArrayLike) -> np.ndarray:
+    """Returns the cosine similarity of the query to each vector."""
+    matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+    if matrix.size == 0:
+        return np.zeros(0, dtype=np.float32)
+    return matrix @ _normalize(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: float = 60.0) -> Dict[str, float]:
+    """
+    Merges rankings of ids: each id scores the sum of 1 / (k + rank) over the
+    rankings it appears in (ranks start at 1). Returns the scores, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return dict(sorted(scores.items(), key=lambda entry: entry[1], reverse=True))
+
+
+def maximal_marginal_relevance(
+    relevance: ArrayLike,
+    vectors: ArrayLike,
+    k: int,
+    lambda_mult: float = 0.7,
+) -> List[int]:
+    """
+    Selects k candidates greedily, each maximizing
+    `lambda_mult * relevance - (1 - lambda_mult) * (max similarity to those already selected)`,
+    so that near-duplicates of a selected chunk (e.g. overlapping windows of the
+    same file) give way to chunks that add new information.
+
+    Args:
+        relevance: The relevance of each candidate to the query, on a similarity scale.
+        vectors: The embedding of each candidate.
+        k: The number of candidates to select.
+        lambda_mult: 1 ranks by relevance only; 0 maximizes diversity only.
+
+    Returns:
+        The indices of the selected candidates, in selection order.
+    """
+    relevance_arr = np.asarray(relevance, dtype=np.float32)
+    count = len(relevance_arr)
+    if count == 0 or k <= 0:
+        return []
+    matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+    similarity = matrix @ matrix.T
+    selected: List[int] = [int(np.argmax(relevance_arr))]
+    redundancy = similarity[selected[0]].copy()
+    available = np.ones(count, dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < min(k, count):
+        scores = lambda_mult * relevance_arr - (1 - lambda_mult) * redundancy
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
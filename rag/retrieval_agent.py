@@ -2,23 +2,125 @@
 # title: Retrieval Agent
 # role: Retrieves relevant context from the vector store based on a query.
 
-from typing import List
-from aida.rag.vector_store import VectorStore
+from typing import Any, Dict, Iterable, List, Optional
+from aida.rag.vector_store import VectorStore, embedding_matrix, to_hit
+from aida.rag.lexical_index import LexicalIndex
+from aida.rag.query_cache import QueryCache
+from aida.rag.ranking import maximal_marginal_relevance, reciprocal_rank_fusion
+from aida.rag.search_scope import SearchScope
+from aida.schemas import SearchHit
 
 class RetrievalAgent:
     """
     This agent retrieves relevant document chunks from the vector store
-    based on a given query.
+    based on a given query, as hits carrying their source, line range and score.
+
+    With a lexical index, the query is answered by both the embedding search
+    and BM25, and the two rankings are merged by reciprocal-rank fusion: each
+    chunk scores the sum of 1 / (rrf_k + rank) over the rankings it appears in.
+    Chunks that literally contain an identifier from the query are found even
+    when the embedding search misses them.
+
+    With MMR enabled, the final hits are picked from the fused candidates by
+    maximal marginal relevance, so overlapping chunks of the same code do not
+    crowd out the rest of the context.
+
+    With a query cache, repeated queries at the same index generation are
+    answered from memory without embedding the query again.
     """
-    def __init__(self, vector_store: VectorStore):
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        lexical_index: Optional[LexicalIndex] = None,
+        hybrid: Optional[Dict[str, Any]] = None,
+        query_cache: Optional[QueryCache] = None,
+        mmr: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            vector_store: The store searched by embedding similarity.
+            lexical_index: The keyword index maintained by the IndexingAgent.
+            hybrid: `enabled`, `rrf_k` (the fusion constant) and `candidates`
+                (how many results each ranking contributes before fusion).
+            query_cache: The cache of recent results, shared by all agents.
+            mmr: `enabled` and `lambda` (1 ranks by relevance only, lower values
+                favour hits that differ from those already selected).
+        """
         self.vector_store = vector_store
+        self.lexical_index = lexical_index
+        self.query_cache = query_cache
+        hybrid = hybrid or {}
+        self.hybrid_enabled = bool(hybrid.get("enabled", True)) and lexical_index is not None
+        self.rrf_k = float(hybrid.get("rrf_k", 60))
+        self.candidates = int(hybrid.get("candidates", 20))
+        mmr = mmr or {}
+        self.mmr_lambda: Optional[float] = float(mmr.get("lambda", 0.7)) if mmr.get("enabled", True) else None
 
-    def run(self, query: str, n_results: int = 5) -> List[str]:
+    def run(
+        self,
+        query: str,
+        n_results: int = 5,
+        path_prefix: Optional[str] = None,
+        languages: Optional[Iterable[str]] = None,
+    ) -> List[SearchHit]:
         """
-        Searches the vector store for relevant documents.
+        Searches the vector store for relevant chunks.
+
+        Args:
+            query: The search query.
+            n_results: The number of hits to return.
+            path_prefix: Only search files at or below this path, relative to the project root.
+            languages: Only search files in these languages (e.g. "python", "markdown").
         """
         print(f"[RetrievalAgent] Searching for context related to: '{query}'")
-        
-        # VectorStoreのsearchメソッドを正しい引数で呼び出す
-        results = self.vector_store.search(query=query, n_results=n_results)
-        return results
\ No newline at end of file
+        scope = SearchScope.of(path_prefix, languages)
+        if self.query_cache is None:
+            return self._search(query, n_results, scope)
+
+        key = QueryCache.key(query, n_results, scope, self.vector_store.namespace)
+        generation = self.vector_store.generation
+        cached = self.query_cache.get(key, generation)
+        if cached is not None:
+            print("[RetrievalAgent] Served from the query cache.")
+            return cached
+        results = self._search(query, n_results, scope)
+        self.query_cache.put(key, generation, results)
+        return results
+
+    def _search(self, query: str, n_results: int, scope: SearchScope) -> List[SearchHit]:
+        depth = max(n_results, self.candidates)
+        if not self.hybrid_enabled or self.lexical_index is None:
+            return self.vector_store.search(
+                query=query,
+                n_results=n_results,
+                scope=scope,
+                fetch_k=depth if self.mmr_lambda is not None else n_results,
+                mmr_lambda=self.mmr_lambda,
+            )
+
+        vector_matches = self.vector_store.query(query, depth, scope=scope, include_embeddings=True)
+        lexical_hits = self.lexical_index.search(
+            query, n_results=depth, accept_source=None if scope.unrestricted else scope.accepts
+        )
+        fused = reciprocal_rank_fusion(
+            [[match.id for match in vector_matches], [chunk_id for chunk_id, _ in lexical_hits]], k=self.rrf_k
+        )
+        ranked = list(fused)[:depth if self.mmr_lambda is not None else n_results]
+
+        matches = {match.id: match for match in vector_matches}
+        missing = [chunk_id for chunk_id in ranked if chunk_id not in matches]
+        matches.update((match.id, match) for match in self.vector_store.get(missing, include_embeddings=True))
+        ranked = [chunk_id for chunk_id in ranked if chunk_id in matches]
+        if not ranked:
+            return []
+
+        # Fused scores are tiny (at most 2 / (rrf_k + 1)); scale them to [0, 1] so
+        # they weigh against the cosine similarities MMR uses for redundancy.
+        best = fused[ranked[0]]
+        relevance = [fused[chunk_id] / best for chunk_id in ranked]
+        if self.mmr_lambda is None:
+            order = list(range(min(n_results, len(ranked))))
+        else:
+            embeddings = embedding_matrix([matches[chunk_id] for chunk_id in ranked])
+            order = maximal_marginal_relevance(relevance, embeddings, n_results, self.mmr_lambda)
+        return [to_hit(matches[ranked[i]], fused[ranked[i]]) for i in order]
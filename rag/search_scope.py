@@ -0,0 +1,71 @@
+# path: aida/rag/search_scope.py
+# title: Search Scope
+# role: Restricts retrieval to a path prefix and a set of languages.
+
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from typing import Iterable, List, Optional, Tuple
+
+# File extensions and the language they are searched as.
+LANGUAGES = {
+    ".py": "python", ".pyi": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript",
+    ".java": "java", ".kt": "kotlin", ".go": "go", ".rs": "rust",
+    ".c": "c", ".h": "c", ".cc": "cpp", ".cpp": "cpp", ".hpp": "cpp", ".cs": "csharp",
+    ".rb": "ruby", ".php": "php", ".swift": "swift", ".sh": "shell",
+    ".html": "html", ".css": "css", ".sql": "sql",
+    ".md": "markdown", ".rst": "rst", ".txt": "text",
+    ".json": "json", ".yml": "yaml", ".yaml": "yaml", ".toml": "toml",
+}
+
+
+def language_for(path: str) -> str:
+    """Returns the language of a file from its extension ("text" if unknown)."""
+    return LANGUAGES.get(PurePosixPath(path).suffix.lower(), "text")
+
+
+def _normalize_path(path: str) -> str:
+    path = path.replace("\\", "/").strip()
+    while path.startswith("./"):
+        path = path[2:]
+    return path.strip("/")
+
+
+@dataclass(frozen=True)
+class SearchScope:
+    """
+    The part of the index a search may return.
+
+    Attributes:
+        path_prefix: A directory or file relative to the project root. A source
+            matches if it is that file or lies below that directory, so "agents"
+            matches "agents/coding_agent.py" but not "agents_old/x.py".
+        languages: The languages (see `LANGUAGES`) a source must be written in.
+    """
+    path_prefix: Optional[str] = None
+    languages: Optional[Tuple[str, ...]] = None
+
+    @classmethod
+    def of(cls, path_prefix: Optional[str] = None, languages: Optional[Iterable[str]] = None) -> "SearchScope":
+        """Builds a normalized scope; empty arguments mean no restriction."""
+        prefix = _normalize_path(path_prefix) if path_prefix else None
+        langs = tuple(sorted({language.lower() for language in languages})) if languages else None
+        return cls(path_prefix=prefix or None, languages=langs or None)
+
+    @property
+    def unrestricted(self) -> bool:
+        return self.path_prefix is None and self.languages is None
+
+    def accepts(self, source: str) -> bool:
+        if self.path_prefix is not None:
+            path = _normalize_path(source)
+            if path != self.path_prefix and not path.startswith(self.path_prefix + "/"):
+                return False
+        if self.languages is not None and language_for(source) not in self.languages:
+            return False
+        return True
+
+    def select(self, sources: Iterable[str]) -> List[str]:
+        """Returns the sources inside the scope."""
+        return sorted(source for source in sources if self.accepts(source))
@@ -2,72 +2,329 @@
 # title: Vector Store
 # role: Manages the vector database for document storage and retrieval.
 
-import chromadb
-from chromadb.api.types import EmbeddingFunction, Metadata
-from typing import List, Dict, Any
-from pathlib import Path
+import hashlib
+import itertools
+import numpy as np
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Optional, Set, Tuple
+from aida.rag.backends import VectorBackend, VectorMatch, create_backend
+from aida.rag.ranking import cosine_similarities, maximal_marginal_relevance
+from aida.rag.search_scope import SearchScope, language_for
+from aida.schemas import SearchHit
+
+if TYPE_CHECKING:
+    from chromadb.api.types import EmbeddingFunction, Embeddings, Metadata
+
+# Generations are drawn from one counter for the whole process, so a store that
+# is closed and opened again never reuses a generation that results were cached at.
+_generations = itertools.count(1)
+
+
+def chunk_ids(documents: List[str], metadatas: List["Metadata"]) -> List[str]:
+    """
+    Derives stable chunk ids from each chunk's source path, its content digest and
+    its ordinal among identical chunks of the same file.
+
+    The id does not depend on the chunk's position, so chunks that merely moved
+    because of an edit above them keep their id and do not need to be re-embedded.
+    """
+    ids: List[str] = []
+    seen: Dict[Tuple[str, str], int] = {}
+    for doc, metadata in zip(documents, metadatas):
+        source = str(metadata.get("source", ""))
+        digest = hashlib.sha256(doc.encode("utf-8")).hexdigest()
+        ordinal = seen.get((source, digest), 0)
+        seen[(source, digest)] = ordinal + 1
+        ids.append(hashlib.sha256(f"{source}\0{digest}\0{ordinal}".encode("utf-8")).hexdigest()[:32])
+    return ids
+
+
+def embedding_matrix(matches: List[VectorMatch]) -> np.ndarray:
+    """Stacks the embeddings of matches that were fetched with `include_embeddings=True`."""
+    vectors = [match.embedding for match in matches if match.embedding is not None]
+    if len(vectors) != len(matches):
+        raise ValueError("The matches were fetched without their embeddings.")
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _line_number(value: Any) -> Optional[int]:
+    return int(value) if isinstance(value, (int, float, str, np.integer)) else None
+
+
+def to_hit(match: VectorMatch, score: float) -> SearchHit:
+    """Converts a stored chunk into a search hit with the given relevance score."""
+    metadata = match.metadata or {}
+    source = str(metadata.get("source", ""))
+    start_line = metadata.get("start_line")
+    end_line = metadata.get("end_line")
+    qualname = metadata.get("qualname")
+    return SearchHit(
+        id=match.id,
+        text=match.document,
+        source=source,
+        start_line=_line_number(start_line),
+        end_line=_line_number(end_line),
+        qualname=str(qualname) if qualname else None,
+        language=language_for(source),
+        score=score,
+    )
+
 
 class VectorStore:
     """
-    This class manages the ChromaDB vector store.
-    It now accepts a custom embedding function.
+    This class manages the vector store.
+    It embeds documents and queries with a custom embedding function and keeps
+    the vectors in a pluggable backend (ChromaDB or an in-process NumPy index).
     """
-    def __init__(self, db_path: str, embedding_function: EmbeddingFunction):
+    def __init__(
+        self,
+        db_path: str,
+        embedding_function: "EmbeddingFunction",
+        backend: str = "chroma",
+        backend_options: Optional[Dict[str, Any]] = None,
+        namespace: Optional[str] = None,
+    ):
         """
         Initializes the VectorStore.
 
         Args:
             db_path: The path to the database directory.
             embedding_function: The function or object to use for generating embeddings.
+            backend: The name of the vector backend ("chroma" or "numpy").
+            backend_options: Options passed to the backend.
+            namespace: Separates this index from others in the same database,
+                e.g. the project id (see `ProjectIndexRegistry`).
         """
-        db_directory = Path(db_path)
-        self.client = chromadb.PersistentClient(path=str(db_directory))
         self.embedding_function = embedding_function
-        self.collection = self.client.get_or_create_collection(
-            name="aida_collection",
-            embedding_function=self.embedding_function
-        )
+        self.namespace = namespace
+        self.backend: VectorBackend = create_backend(backend, db_path, embedding_function, backend_options, namespace)
+        # Changed after every index update, so cached query results can be invalidated.
+        self.generation = next(_generations)
+
+    def bump_generation(self) -> int:
+        """
+        Marks the content of the store as changed and returns the new generation.
+        """
+        self.generation = next(_generations)
+        return self.generation
+
+    def add(self, documents: List[str], metadatas: List["Metadata"]) -> List[str]:
+        """
+        Upserts documents into the vector store and returns their ids.
+
+        Ids are derived from the content (see `chunk_ids`). Chunks that are already
+        stored are not embedded again; only their metadata (e.g. the start offset)
+        is refreshed. Chunks that are no longer produced for a file are not removed
+        here; callers delete them with `delete_ids`.
+        """
+        ids = chunk_ids(documents, metadatas)
+        if not ids:
+            return ids
+        existing = self.existing_ids(ids)
+        new = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing]
+        kept = [i for i, chunk_id in enumerate(ids) if chunk_id in existing]
 
-    def add(self, documents: List[str], metadatas: List[Metadata]):
+        if new:
+            self.upsert_embedded(
+                ids=[ids[i] for i in new],
+                documents=[documents[i] for i in new],
+                metadatas=[metadatas[i] for i in new],
+                embeddings=self.embed([documents[i] for i in new]),
+            )
+        self.update_metadatas([ids[i] for i in kept], [metadatas[i] for i in kept])
+        print(f"[VectorStore] Upserted {len(ids)} chunk(s): {len(new)} embedded, {len(kept)} unchanged.")
+        return ids
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """
+        Returns the subset of the given ids that is already stored.
+        """
+        return self.backend.existing_ids(ids)
+
+    def embed(self, documents: List[str]) -> "Embeddings":
+        """
+        Computes the embeddings of documents without storing them.
+        Safe to call from worker threads; the backend is not touched.
+        """
+        return self.embedding_function(documents)
+
+    def embed_query(self, query: str) -> Any:
+        """
+        Computes the embedding of a search query.
+        """
+        embed_query = getattr(self.embedding_function, "embed_query", None)
+        embeddings = embed_query([query]) if callable(embed_query) else self.embedding_function([query])
+        return embeddings[0]
+
+    def upsert_embedded(self, ids: List[str], documents: List[str], metadatas: List["Metadata"], embeddings: "Embeddings"):
         """
-        Adds documents to the vector store.
+        Writes chunks whose embeddings were already computed (see `embed`).
         """
-        ids = [f"id_{hash(doc)}_{i}" for i, doc in enumerate(documents)]
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
+        self.backend.upsert(ids, documents, metadatas, embeddings)
+
+    def update_metadatas(self, ids: List[str], metadatas: List["Metadata"]):
+        """
+        Refreshes the metadata of stored chunks without re-embedding them.
+        """
+        if ids:
+            self.backend.update_metadatas(ids, metadatas)
+
+    def max_batch_size(self) -> int:
+        """
+        Returns the largest number of records the backend accepts in one write.
+        """
+        return self.backend.max_batch_size()
+
+    def persist(self):
+        """
+        Makes the writes so far durable (a no-op for backends that write through).
+        """
+        self.backend.persist()
 
     def delete(self, file_path: str):
         """
         Deletes all chunks associated with a specific file path from the collection.
         """
         print(f"[VectorStore] Deleting entries for file: {file_path}")
-        self.collection.delete(where={"source": file_path})
+        self.backend.delete_source(file_path)
 
-    def search(self, query: str, n_results: int = 5) -> List[str]:
+    def ids_for(self, file_path: str) -> List[str]:
         """
-        Searches for relevant documents in the vector store.
+        Returns the ids of all chunks stored for a file.
         """
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=n_results
-        )
-        documents_list = results.get('documents')
-        if documents_list:
-            return documents_list[0]
-        return []
+        return self.backend.ids_for_source(file_path)
+
+    def delete_ids(self, ids: List[str]):
+        """
+        Deletes the chunks with the given ids.
+        """
+        if ids:
+            self.backend.delete(ids)
+
+    def count(self) -> int:
+        """
+        Returns the number of chunks in the collection.
+        """
+        return self.backend.count()
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        scope: Optional[SearchScope] = None,
+        fetch_k: Optional[int] = None,
+        mmr_lambda: Optional[float] = None,
+    ) -> List[SearchHit]:
+        """
+        Searches for relevant chunks and returns them as hits, best first.
+
+        Args:
+            query: The search query.
+            n_results: The number of hits to return.
+            scope: Restricts the search to a path prefix and languages.
+            fetch_k: The number of nearest chunks considered (default: n_results).
+            mmr_lambda: If set, the hits are re-ranked from the `fetch_k` candidates
+                by maximal marginal relevance with this trade-off (see
+                `maximal_marginal_relevance`); if None, they are ranked by similarity.
+        """
+        query_embedding = self.embed_query(query)
+        depth = max(n_results, fetch_k or 0)
+        matches = self.query_embedding(query_embedding, depth, scope, include_embeddings=True)
+        if not matches:
+            return []
+        embeddings = embedding_matrix(matches)
+        relevance = cosine_similarities(query_embedding, embeddings)
+        if mmr_lambda is None:
+            order = list(range(min(n_results, len(matches))))
+        else:
+            order = maximal_marginal_relevance(relevance, embeddings, n_results, mmr_lambda)
+        return [to_hit(matches[i], float(relevance[i])) for i in order]
+
+    def query(
+        self,
+        query: str,
+        n_results: int = 5,
+        scope: Optional[SearchScope] = None,
+        include_embeddings: bool = False,
+    ) -> List[VectorMatch]:
+        """
+        Returns the chunks closest to the query with their metadata and distance.
+        """
+        if self.count() == 0:
+            return []
+        return self.query_embedding(self.embed_query(query), n_results, scope, include_embeddings)
+
+    def query_embedding(
+        self,
+        embedding: Any,
+        n_results: int,
+        scope: Optional[SearchScope] = None,
+        include_embeddings: bool = False,
+    ) -> List[VectorMatch]:
+        """
+        Returns the chunks closest to an embedding computed with `embed_query`.
+        """
+        if self.count() == 0:
+            return []
+        where = None
+        if scope is not None and not scope.unrestricted:
+            sources = scope.select(self.backend.sources())
+            if not sources:
+                return []
+            where = {"source": {"$in": sources}}
+        return self.backend.query(embedding, n_results, where=where, include_embeddings=include_embeddings)
+
+    def get(self, ids: List[str], include_embeddings: bool = False) -> List[VectorMatch]:
+        """
+        Returns the stored chunks with the given ids; unknown ids are skipped.
+        """
+        return self.backend.get(ids, include_embeddings)
+
+    def get_documents(self, ids: List[str]) -> Dict[str, str]:
+        """
+        Returns the documents stored under the given ids.
+        """
+        return self.backend.get_documents(ids)
+
+    def iter_documents(self, batch_size: int = 512) -> Iterator[Tuple[List[str], List[str], List["Metadata"]]]:
+        """
+        Yields every stored chunk as (ids, documents, metadatas) pages.
+        """
+        return self.backend.iter_documents(batch_size)
 
     def clear(self):
         """
         Clears all entries from the vector store collection.
         """
-        try:
-            self.client.delete_collection(name="aida_collection")
-            self.collection = self.client.get_or_create_collection(
-                name="aida_collection",
-                embedding_function=self.embedding_function
-            )
-        except Exception as e:
-            print(f"Error clearing collection: {e}")
\ No newline at end of file
+        self.backend.clear()
+
+    def disk_bytes(self) -> int:
+        """
+        Returns the size of the files the index is stored in.
+        """
+        return self.backend.disk_bytes()
+
+    def garbage_ratio(self) -> float:
+        """
+        Returns the fraction of the stored data that belongs to deleted or replaced chunks.
+        """
+        return self.backend.garbage_ratio()
+
+    def compact(self, shared_threshold: float = 0.0):
+        """
+        Rewrites the index without deleted chunks and reclaims their space.
+        Storage shared with other namespaces is only rewritten when at least
+        `shared_threshold` of it is garbage.
+        """
+        self.backend.compact(shared_threshold)
+
+    def memory_bytes(self) -> int:
+        """
+        Returns an estimate of the memory the index holds while it is open.
+        """
+        return self.backend.memory_bytes()
+
+    def close(self):
+        """
+        Persists the index and releases its memory. The store is not used afterwards.
+        """
+        self.backend.close()
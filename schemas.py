@@ -55,9 +55,45 @@ class CodeChanges(BaseModel):
     changes: List[CodeChange] = Field(description="A list of code changes to be applied.")
 
 
+class FileDesign(BaseModel):
+    """
+    Represents a single file proposed by the architecture agent.
+    """
+    file_path: str = Field(description="The relative path of the proposed file.")
+    description: str = Field(description="A concise, one-sentence description of the file's purpose.")
+
+
+class ArchitecturePlan(BaseModel):
+    """
+    Represents the file structure proposed for a project.
+    """
+    files: List[FileDesign] = Field(description="A list of the files that make up the proposed design.")
+
+
 class ProjectMetadata(BaseModel):
     """
     Represents the metadata of the project being worked on.
     """
     root_dir: str = Field(description="The absolute path to the root directory of the project.")
-    files: List[str] = Field(description="A list of all file paths within the project, relative to the root.")
\ No newline at end of file
+    files: List[str] = Field(description="A list of all file paths within the project, relative to the root.")
+
+
+class SearchHit(BaseModel):
+    """
+    A chunk returned by retrieval, with where it comes from and how relevant it is.
+    """
+    id: str = Field(description="The chunk id in the vector store.")
+    text: str = Field(description="The chunk text.")
+    source: str = Field(description="The path of the file the chunk comes from.")
+    start_line: Optional[int] = Field(default=None, description="The first line of the chunk (1-based), if known.")
+    end_line: Optional[int] = Field(default=None, description="The last line of the chunk (1-based), if known.")
+    qualname: Optional[str] = Field(default=None, description="The definitions the chunk covers, for code chunks.")
+    language: str = Field(default="text", description="The language of the source file.")
+    score: float = Field(description="The relevance to the query; higher is better.")
+
+    @property
+    def location(self) -> str:
+        """`source:start-end`, or just the source if the lines are unknown."""
+        if self.start_line is None:
+            return self.source
+        return f"{self.source}:{self.start_line}-{self.end_line or self.start_line}"
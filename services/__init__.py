@@ -4,5 +4,10 @@
 
 from .file_system import FileSystem
 from .sandbox import Sandbox
+from .disk_cache import DiskCache
+from .context_packer import ContextPacker, PromptSection, PackedPrompt, TokenCounter
+from .telemetry import Telemetry, LLMCallRecord
+from .warmup import ModelWarmer, WarmupResult
+from .file_watcher import WorkspaceWatcher
 
-__all__ = ["FileSystem", "Sandbox"]
\ No newline at end of file
+__all__ = ["FileSystem", "Sandbox", "DiskCache", "ContextPacker", "PromptSection", "PackedPrompt", "TokenCounter", "Telemetry", "LLMCallRecord", "ModelWarmer", "WarmupResult", "WorkspaceWatcher"]
\ No newline at end of file
@@ -0,0 +1,256 @@
+# path: aida/services/context_packer.py
+# title: Context Packer
+# role: Assembles agent prompts within a per-agent token budget, filling sections by priority.
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# Approximate characters per token for common model families. Code and mixed
+# prose tokenize a little denser than plain English text.
+DEFAULT_CHARS_PER_TOKEN = 3.5
+MODEL_CHARS_PER_TOKEN = {
+    "gemma": 3.6,
+    "llama": 3.4,
+    "qwen": 3.3,
+    "mistral": 3.4,
+    "phi": 3.4,
+    "deepseek": 3.3,
+}
+
+# Sections are never truncated below this size; a smaller remainder is dropped instead.
+MIN_TRUNCATED_TOKENS = 32
+
+
+class TokenCounter:
+    """
+    Estimates token counts for the configured model.
+
+    Ollama does not expose its tokenizer, so counts are derived from a
+    characters-per-token ratio for the model family. The ratio can be
+    overridden in the configuration and refined at runtime with `calibrate`,
+    using the prompt token counts reported by the server.
+    """
+    def __init__(self, model: str, chars_per_token: Optional[float] = None):
+        """
+        Args:
+            model: The model name, e.g. "gemma3:latest".
+            chars_per_token: An explicit ratio that overrides the per-family default.
+        """
+        self.model = model
+        if chars_per_token:
+            self.chars_per_token = float(chars_per_token)
+        else:
+            family = next((name for name in MODEL_CHARS_PER_TOKEN if model.lower().startswith(name)), None)
+            self.chars_per_token = MODEL_CHARS_PER_TOKEN[family] if family else DEFAULT_CHARS_PER_TOKEN
+
+    def count(self, text: str) -> int:
+        """Returns the estimated number of tokens in the text."""
+        return math.ceil(len(text) / self.chars_per_token) if text else 0
+
+    def chars_for(self, tokens: int) -> int:
+        """Returns the approximate number of characters that fit in the given token count."""
+        return max(0, int(tokens * self.chars_per_token))
+
+    def calibrate(self, text_length: int, actual_tokens: int, weight: float = 0.2) -> None:
+        """
+        Moves the ratio towards an observed (characters, tokens) measurement.
+        """
+        if text_length <= 0 or actual_tokens <= 0:
+            return
+        observed = text_length / actual_tokens
+        self.chars_per_token = (1 - weight) * self.chars_per_token + weight * observed
+
+
+@dataclass
+class PromptSection:
+    """
+    A placeholder in a prompt template and the content that may fill it.
+
+    Attributes:
+        name: The template placeholder name.
+        items: The pieces of content, in relevance order (e.g. retrieved chunks or files).
+        priority: Sections with a lower value are filled first.
+        required: Required sections are always included in full.
+        separator: The string placed between included items.
+        keep: "first" keeps items from the start of the list, "last" from the end
+            (useful for history, where the most recent entries matter most).
+        truncate: "head" keeps the beginning of an item that does not fit, "tail"
+            keeps its end (useful for test output), None drops it instead.
+        collapsible: The items are file paths that may be collapsed into a directory summary.
+        empty: The text used when nothing from the section fits.
+    """
+    name: str
+    items: List[str]
+    priority: int = 0
+    required: bool = False
+    separator: str = "\n"
+    keep: str = "first"
+    truncate: Optional[str] = None
+    collapsible: bool = False
+    empty: str = "(empty)"
+
+    @classmethod
+    def text(cls, name: str, text: str, **kwargs) -> "PromptSection":
+        """Creates a section with a single piece of text."""
+        return cls(name=name, items=[text] if text else [], **kwargs)
+
+    @classmethod
+    def file_list(cls, name: str, files: List[str], priority: int, **kwargs) -> "PromptSection":
+        """Creates a collapsible section listing project files."""
+        return cls(name=name, items=list(files), priority=priority, collapsible=True, **kwargs)
+
+
+@dataclass
+class PackedPrompt:
+    """
+    The result of packing a prompt: the rendered text and what had to be left out.
+    """
+    prompt: str
+    tokens: int
+    budget: int
+    dropped: List[str] = field(default_factory=list)
+
+
+def summarize_file_tree(files: List[str], max_depth: int) -> str:
+    """
+    Collapses a list of relative file paths into a directory summary.
+
+    Directories at `max_depth` are listed with the number of files beneath them
+    and their most common extensions; files above that depth are listed as-is.
+    """
+    entries: Dict[str, List[str]] = defaultdict(list)
+    loose_files: List[str] = []
+    for path in files:
+        parts = path.replace("\\", "/").split("/")
+        if len(parts) - 1 <= max_depth:
+            loose_files.append(path)
+        else:
+            entries["/".join(parts[:max_depth]) + "/" if max_depth else "./"].append(parts[-1])
+
+    lines = sorted(loose_files)
+    for directory in sorted(entries):
+        names = entries[directory]
+        extensions: Dict[str, int] = defaultdict(int)
+        for name in names:
+            extensions[name.rsplit(".", 1)[-1] if "." in name else "(none)"] += 1
+        top = sorted(extensions.items(), key=lambda kv: -kv[1])[:3]
+        ext_summary = ", ".join(f"{count} .{ext}" for ext, count in top)
+        lines.append(f"{directory} ({len(names)} files: {ext_summary})")
+    return "\n".join(lines)
+
+
+class ContextPacker:
+    """
+    Fills prompt templates within a per-agent token budget.
+
+    The fixed text of the template is counted first. Required sections are
+    always included; the remaining sections are filled in priority order with
+    as many of their items as fit. Oversized items may be truncated, and file
+    lists that do not fit are collapsed into a directory summary. Everything
+    that was dropped is reported on the returned `PackedPrompt`.
+    """
+    def __init__(self, token_counter: TokenCounter, budgets: Optional[Dict[str, int]] = None, default_budget: int = 8192):
+        """
+        Args:
+            token_counter: The counter used to measure prompt sections.
+            budgets: A mapping of agent name to its prompt budget in tokens.
+            default_budget: The budget used for agents without an explicit entry.
+        """
+        self.token_counter = token_counter
+        self.budgets = dict(budgets or {})
+        self.default_budget = int(default_budget)
+
+    def budget_for(self, agent: str) -> int:
+        """Returns the prompt budget of an agent, in tokens."""
+        return int(self.budgets.get(agent, self.default_budget))
+
+    def pack(self, agent: str, template: str, sections: List[PromptSection]) -> PackedPrompt:
+        """
+        Renders the template with as much of each section as fits in the agent's budget.
+
+        Args:
+            agent: The agent name used to look up the budget, e.g. "coding".
+            template: A `str.format` template with one placeholder per section.
+            sections: The sections that fill the template placeholders.
+        """
+        budget = self.budget_for(agent)
+        count = self.token_counter.count
+        remaining = budget - count(template.format(**{s.name: "" for s in sections}))
+        rendered: Dict[str, str] = {}
+        dropped: List[str] = []
+
+        for section in sorted(sections, key=lambda s: (not s.required, s.priority)):
+            if section.required:
+                rendered[section.name] = section.separator.join(section.items) or section.empty
+                remaining -= count(rendered[section.name])
+            elif section.collapsible:
+                rendered[section.name], remaining = self._pack_file_list(section, remaining, dropped)
+            else:
+                rendered[section.name], remaining = self._pack_items(section, remaining, dropped)
+
+        prompt = template.format(**rendered)
+        packed = PackedPrompt(prompt=prompt, tokens=count(prompt), budget=budget, dropped=dropped)
+        if dropped:
+            print(f"[ContextPacker] {agent}: {packed.tokens}/{budget} tokens. Dropped: {'; '.join(dropped)}")
+        return packed
+
+    def _pack_items(self, section: PromptSection, remaining: int, dropped: List[str]) -> Tuple[str, int]:
+        """Includes items in order until the remaining budget is used up."""
+        count = self.token_counter.count
+        separator_cost = count(section.separator)
+        ordered = section.items if section.keep == "first" else list(reversed(section.items))
+        chosen: List[str] = []
+        omitted = 0
+        truncated = 0
+
+        for item in ordered:
+            cost = count(item) + separator_cost
+            if cost <= remaining:
+                chosen.append(item)
+                remaining -= cost
+            elif section.truncate and remaining - separator_cost >= MIN_TRUNCATED_TOKENS:
+                chosen.append(self._truncate(item, remaining - separator_cost, section.truncate))
+                remaining = 0
+                truncated += 1
+            else:
+                omitted += 1
+
+        if section.keep != "first":
+            chosen.reverse()
+        if omitted:
+            dropped.append(f"{section.name}: {omitted} of {len(section.items)} item(s) omitted")
+        if truncated:
+            dropped.append(f"{section.name}: {truncated} item(s) truncated")
+        return (section.separator.join(chosen) or section.empty), remaining
+
+    def _pack_file_list(self, section: PromptSection, remaining: int, dropped: List[str]) -> Tuple[str, int]:
+        """Includes the full file list, or the most detailed directory summary that fits."""
+        count = self.token_counter.count
+        if not section.items:
+            return section.empty, remaining
+
+        full = section.separator.join(section.items)
+        if count(full) <= remaining:
+            return full, remaining - count(full)
+
+        for depth in (3, 2, 1, 0):
+            summary = summarize_file_tree(section.items, depth)
+            if count(summary) <= remaining:
+                dropped.append(
+                    f"{section.name}: {len(section.items)} paths collapsed into a directory summary (depth {depth})"
+                )
+                return summary, remaining - count(summary)
+
+        dropped.append(f"{section.name}: {len(section.items)} paths omitted")
+        note = f"({len(section.items)} files; listing omitted to fit the context window)"
+        return note, remaining - count(note)
+
+    def _truncate(self, text: str, tokens: int, mode: str) -> str:
+        """Cuts text down to roughly the given number of tokens, keeping its head or tail."""
+        marker = "\n... [truncated] ...\n"
+        keep_chars = max(0, self.token_counter.chars_for(tokens) - len(marker))
+        if mode == "tail":
+            return marker + text[-keep_chars:] if keep_chars else marker
+        return text[:keep_chars] + marker
@@ -0,0 +1,163 @@
+# path: aida/services/disk_cache.py
+# title: Disk Cache Service
+# role: Provides a persistent, size-bounded LRU key-value cache backed by SQLite.
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# SQLite limits the number of bound parameters per statement.
+_MAX_PARAMS = 500
+
+class DiskCache:
+    """
+    A content-addressed key-value cache stored in a single SQLite file.
+    Entries are evicted in least-recently-used order once either the entry
+    count or the total payload size exceeds its limit. Hit and miss counters
+    are kept for the lifetime of the instance.
+    """
+    def __init__(self, path: str, max_entries: int = 1000, max_size_mb: float = 64):
+        """
+        Opens (or creates) the cache database.
+
+        Args:
+            path: The path to the SQLite file. Parent directories are created if needed.
+            max_entries: The maximum number of entries kept on disk.
+            max_size_mb: The maximum total size of all stored values, in megabytes.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(float(max_size_mb) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the value stored under the key and marks it as recently used,
+        or None if the key is not cached.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            return bytes(row[0])
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """
+        Returns the cached values of the given keys in a single transaction.
+        Keys that are not cached are absent from the result.
+        """
+        found: Dict[str, bytes] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(unique), _MAX_PARAMS):
+                batch = unique[i:i + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM entries WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update((key, bytes(value)) for key, value in rows)
+            now = time.time()
+            self._conn.executemany("UPDATE entries SET last_access = ? WHERE key = ?", [(now, k) for k in found])
+            self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        """
+        Stores several values in a single transaction, evicting once at the end.
+        """
+        now = time.time()
+        rows = [(key, sqlite3.Binary(value), len(value), now) for key, value in items if len(value) <= self.max_bytes]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def put(self, key: str, value: bytes) -> None:
+        """
+        Stores a value under the key, evicting least-recently-used entries if
+        the cache grows beyond its limits.
+        """
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), size, time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Removes the oldest entries until both the count and size limits are met."""
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC LIMIT ?", (_MAX_PARAMS,)
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for key, size in rows:
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                victims.append((key,))
+                count -= 1
+                total -= size
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+            self.evictions += len(victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the hit/miss counters together with the current size of the cache.
+        """
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": count,
+            "bytes": total,
+        }
+
+    def clear(self) -> None:
+        """Removes every entry from the cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Closes the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,305 @@
+# path: aida/services/file_watcher.py
+# title: Workspace Watcher
+# role: Watches the workspace in the background and reports changed files in debounced batches.
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from aida.analysis.project_analyzer import IGNORE_DIRS
+
+MODES = ("auto", "inotify", "polling")
+
+# inotify(7) constants.
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (_IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+               | _IN_ONLYDIR | _IN_DONT_FOLLOW)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _walk_files(root: Path, start: Path) -> Iterable[Tuple[str, os.stat_result]]:
+    """Yields (relative path, stat) of the files below `start`, skipping the analyzer's ignored directories."""
+    for directory, dirs, files in os.walk(start, topdown=True):
+        dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
+        for name in files:
+            full_path = Path(directory) / name
+            try:
+                yield str(full_path.relative_to(root)), full_path.stat()
+            except (OSError, ValueError):
+                continue
+
+
+class _PollingSource:
+    """Finds changes by comparing the size and modification time of every file between scans."""
+    name = "polling"
+
+    def __init__(self, root: Path, interval: float):
+        self.root = root
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        return {path: (stat.st_mtime_ns, stat.st_size) for path, stat in _walk_files(self.root, self.root)}
+
+    def wait(self, timeout: float) -> Set[str]:
+        delay = self._next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return set()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_scan = time.monotonic() + self.interval
+        snapshot = self._scan()
+        previous, self._snapshot = self._snapshot, snapshot
+        changed = {path for path, state in snapshot.items() if previous.get(path) != state}
+        changed.update(path for path in previous if path not in snapshot)
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifySource:
+    """
+    Receives change events from the Linux kernel. Every directory of the tree is
+    watched; directories created later are watched as they appear, and their
+    files are reported, since they may have been written before the watch.
+    """
+    name = "inotify"
+
+    def __init__(self, root: Path):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.root = root
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}
+        self._files: Set[str] = set()
+        try:
+            self._watch_tree("")
+        except OSError:
+            self.close()
+            raise
+
+    def _watch_tree(self, rel_dir: str) -> Set[str]:
+        """Watches a directory and its subdirectories; returns the files found in them."""
+        found: Set[str] = set()
+        start = self.root / rel_dir
+        for directory, dirs, files in os.walk(start, topdown=True):
+            dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
+            rel = os.path.relpath(directory, self.root)
+            rel = "" if rel == "." else rel
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                if not Path(directory).is_dir():
+                    continue  # Removed while walking.
+                # ENOSPC: the fs.inotify.max_user_watches limit is reached.
+                raise OSError(errno, f"inotify_add_watch failed for {directory}: {os.strerror(errno)}")
+            self._dirs[wd] = rel
+            found.update(os.path.join(rel, name) if rel else name for name in files)
+        self._files.update(found)
+        return found
+
+    def _forget_tree(self, rel_dir: str) -> Set[str]:
+        """Stops watching a directory that was removed or moved away; returns its known files."""
+        prefix = rel_dir + os.sep
+        for wd, path in list(self._dirs.items()):
+            if path == rel_dir or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+        gone = {path for path in self._files if path.startswith(prefix)}
+        self._files -= gone
+        return gone
+
+    def wait(self, timeout: float) -> Set[str]:
+        ready, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+        if not ready:
+            return set()
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return set()
+        changed: Set[str] = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            raw_name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length]
+            offset += _EVENT_HEADER.size + length
+            if mask & _IN_Q_OVERFLOW:
+                changed.update(self._rescan())
+                continue
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            name = os.fsdecode(raw_name.rstrip(b"\0"))
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, name) if parent else name
+            if mask & _IN_ISDIR:
+                if name in IGNORE_DIRS:
+                    continue
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    changed.update(self._watch_tree(path))
+                elif mask & (_IN_DELETE | _IN_MOVED_FROM):
+                    changed.update(self._forget_tree(path))
+                continue
+            if mask & (_IN_DELETE | _IN_MOVED_FROM):
+                self._files.discard(path)
+            else:
+                self._files.add(path)
+            changed.add(path)
+        return changed
+
+    def _rescan(self) -> Set[str]:
+        """After the kernel queue overflowed, events were lost: reports every file, old and new."""
+        print("[WorkspaceWatcher] The event queue overflowed; rescanning the workspace.")
+        for wd in list(self._dirs):
+            self._libc.inotify_rm_watch(self._fd, wd)
+        self._dirs.clear()
+        previous, self._files = self._files, set()
+        return previous | self._watch_tree("")
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class WorkspaceWatcher:
+    """
+    Watches a directory tree on a background thread and calls `on_change` with
+    the files that were created, modified or deleted there, so that the index
+    and the project metadata follow edits made outside of AIDA.
+
+    Events come from inotify on Linux and from periodic scans elsewhere, or
+    when inotify cannot watch the whole tree (e.g. the watch limit is reached).
+    Changes are debounced: a batch is delivered once no event arrived for
+    `debounce` seconds, or `max_delay` seconds after its first event while
+    events keep coming, so a burst such as a `git checkout` becomes one batch.
+    `on_change` runs on the watcher thread, one batch at a time; changes made
+    meanwhile are collected into the next batch.
+    """
+    def __init__(
+        self,
+        enabled: bool = True,
+        mode: str = "auto",
+        debounce: float = 0.5,
+        max_delay: float = 5.0,
+        poll_interval: float = 2.0,
+    ):
+        """
+        Args:
+            enabled: If False, `start` does nothing.
+            mode: "auto" (inotify if available, else polling), "inotify" or "polling".
+            debounce: Seconds without events after which a batch is delivered.
+            max_delay: The longest a change waits while events keep arriving.
+            poll_interval: Seconds between scans when polling.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown watcher mode '{mode}'. Choose one of: {', '.join(MODES)}.")
+        self.enabled = bool(enabled)
+        self.mode = mode
+        self.debounce = max(0.0, float(debounce))
+        self.max_delay = max(self.debounce, float(max_delay))
+        self.poll_interval = max(0.1, float(poll_interval))
+        self.batches = 0
+        self._source: Optional[Union[_PollingSource, _InotifySource]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._pending: Set[str] = set()
+        self._first_event = 0.0
+        self._last_event = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, root: str, on_change: Callable[[List[str]], None]) -> None:
+        """
+        Starts watching `root`. Paths passed to `on_change` are relative to it.
+        Calling it while running has no effect.
+        """
+        if not self.enabled or self.running:
+            return
+        root_path = Path(root).resolve()
+        source = self._source = self._open_source(root_path)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(on_change,), name="aida-watcher", daemon=True
+        )
+        self._thread.start()
+        print(f"[WorkspaceWatcher] Watching {root_path} ({source.name}).")
+
+    def _open_source(self, root: Path) -> Union[_PollingSource, _InotifySource]:
+        if self.mode != "polling":
+            try:
+                return _InotifySource(root)
+            except (OSError, AttributeError) as e:
+                if self.mode == "inotify":
+                    raise
+                print(f"[WorkspaceWatcher] inotify is unavailable ({e}); falling back to polling.")
+        return _PollingSource(root, self.poll_interval)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stops the watcher thread; changes not yet delivered are dropped."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    def _run(self, on_change: Callable[[List[str]], None]) -> None:
+        source = self._source
+        assert source is not None, "start() opens the source before the thread runs."
+        while not self._stop.is_set():
+            try:
+                changed = source.wait(self._timeout())
+            except Exception as e:
+                print(f"[WorkspaceWatcher] Error while watching: {e}")
+                self._stop.wait(self.poll_interval)
+                continue
+            now = time.monotonic()
+            if changed:
+                if not self._pending:
+                    self._first_event = now
+                self._pending.update(changed)
+                self._last_event = now
+            if self._pending and (now - self._last_event >= self.debounce or now - self._first_event >= self.max_delay):
+                batch, self._pending = sorted(self._pending), set()
+                self.batches += 1
+                try:
+                    on_change(batch)
+                except Exception as e:
+                    print(f"[WorkspaceWatcher] Handling {len(batch)} changed file(s) failed: {e}")
+
+    def _timeout(self) -> float:
+        """How long to wait for events: until the pending batch is due, and at most half a second."""
+        if not self._pending:
+            return 0.5
+        due = min(self._last_event + self.debounce, self._first_event + self.max_delay)
+        return min(0.5, max(0.0, due - time.monotonic()))
@@ -0,0 +1,195 @@
+# path: aida/services/telemetry.py
+# title: LLM Telemetry
+# role: Records per-call LLM metrics, aggregates them per task and exports them as JSONL and Prometheus text.
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class LLMCallRecord:
+    """
+    Metrics for a single LLM call, filled in by the LLMClient as the call progresses.
+    """
+    agent: str
+    model: str
+    kind: str
+    tier: Optional[str] = None
+    task_id: Optional[str] = None
+    host: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    ttft_s: Optional[float] = None
+    latency_s: float = 0.0
+    generation_s: float = 0.0
+    tokens_per_sec: Optional[float] = None
+    attempts: int = 0
+    parse_ok: Optional[bool] = None
+    cache_hit: bool = False
+    escalated: bool = False
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+    started_at: float = field(default_factory=time.perf_counter, repr=False)
+
+    def finish(self) -> None:
+        """Stamps the total latency and derives the generation throughput."""
+        self.latency_s = time.perf_counter() - self.started_at
+        if self.generation_s > 0 and self.completion_tokens:
+            self.tokens_per_sec = self.completion_tokens / self.generation_s
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("started_at", None)
+        return data
+
+
+class Telemetry:
+    """
+    Collects LLM call records and groups them by task.
+
+    At the end of each task the records are appended to a JSONL file, the
+    cumulative counters are rewritten to a Prometheus text-format file (suitable
+    for the node_exporter textfile collector), and a summary table is printed.
+    """
+    def __init__(self, metrics_dir: str, enabled: bool = True):
+        """
+        Args:
+            metrics_dir: The directory that receives `llm_calls.jsonl` and `aida_llm.prom`.
+            enabled: If False, records are discarded and nothing is written.
+        """
+        self.enabled = bool(enabled)
+        self.metrics_dir = Path(metrics_dir)
+        self.jsonl_path = self.metrics_dir / "llm_calls.jsonl"
+        self.prometheus_path = self.metrics_dir / "aida_llm.prom"
+        self.current_task: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._pending: List[LLMCallRecord] = []
+        self._totals: Dict[tuple, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def begin_task(self) -> str:
+        """Starts a new task; subsequent calls are attributed to it."""
+        task_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self.current_task = task_id
+        return task_id
+
+    def record(self, call: LLMCallRecord) -> None:
+        """Adds a finished call to the current task and to the cumulative counters."""
+        if not self.enabled:
+            return
+        with self._lock:
+            call.task_id = call.task_id or self.current_task
+            self._pending.append(call)
+            totals = self._totals[(call.agent, call.model)]
+            totals["requests"] += 1
+            totals["cache_hits"] += 1 if call.cache_hit else 0
+            totals["parse_failures"] += 1 if call.parse_ok is False else 0
+            totals["errors"] += 1 if call.error else 0
+            totals["escalations"] += 1 if call.escalated else 0
+            totals["prompt_tokens"] += call.prompt_tokens
+            totals["completion_tokens"] += call.completion_tokens
+            totals["latency_seconds"] += call.latency_s
+            totals["generation_seconds"] += call.generation_s
+            if call.ttft_s is not None:
+                totals["ttft_seconds"] += call.ttft_s
+                totals["ttft_count"] += 1
+
+    def end_task(self) -> List[LLMCallRecord]:
+        """
+        Finishes the current task: exports its records, prints a summary and
+        returns the records.
+        """
+        with self._lock:
+            task_id = self.current_task
+            records = [r for r in self._pending if r.task_id == task_id]
+            self._pending = [r for r in self._pending if r.task_id != task_id]
+            self.current_task = None
+        if not self.enabled:
+            return records
+
+        self.flush(records)
+        self.print_summary(records)
+        return records
+
+    def flush(self, records: Optional[List[LLMCallRecord]] = None) -> None:
+        """
+        Appends records to the JSONL file and rewrites the Prometheus file.
+        Without arguments, all pending records are written.
+        """
+        if not self.enabled:
+            return
+        if records is None:
+            with self._lock:
+                records, self._pending = self._pending, []
+        try:
+            self.metrics_dir.mkdir(parents=True, exist_ok=True)
+            with self.jsonl_path.open("a", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record.to_dict()) + "\n")
+            self._write_prometheus()
+        except OSError as e:
+            print(f"[Telemetry] Error writing metrics to {self.metrics_dir}: {e}")
+
+    def _write_prometheus(self) -> None:
+        """Writes cumulative counters atomically in the Prometheus text exposition format."""
+        metrics = [
+            ("aida_llm_requests_total", "requests", "counter", "LLM calls made."),
+            ("aida_llm_cache_hits_total", "cache_hits", "counter", "LLM calls answered from the response cache."),
+            ("aida_llm_parse_failures_total", "parse_failures", "counter", "Structured calls whose output failed validation."),
+            ("aida_llm_errors_total", "errors", "counter", "LLM calls that failed with a transport or server error."),
+            ("aida_llm_escalations_total", "escalations", "counter", "Calls retried on the fallback model after failing validation."),
+            ("aida_llm_prompt_tokens_total", "prompt_tokens", "counter", "Prompt tokens evaluated by the model."),
+            ("aida_llm_completion_tokens_total", "completion_tokens", "counter", "Completion tokens generated by the model."),
+            ("aida_llm_latency_seconds_total", "latency_seconds", "counter", "Total wall-clock latency of LLM calls."),
+            ("aida_llm_generation_seconds_total", "generation_seconds", "counter", "Time the model spent generating tokens."),
+            ("aida_llm_ttft_seconds_total", "ttft_seconds", "counter", "Summed time to first token."),
+            ("aida_llm_ttft_observations_total", "ttft_count", "counter", "Calls with a measured time to first token."),
+        ]
+        with self._lock:
+            totals = {key: dict(values) for key, values in self._totals.items()}
+
+        lines: List[str] = []
+        for name, field_name, metric_type, help_text in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for (agent, model), values in sorted(totals.items()):
+                lines.append(f'{name}{{agent="{agent}",model="{model}"}} {values.get(field_name, 0.0):g}')
+
+        tmp_path = self.prometheus_path.with_suffix(".prom.tmp")
+        tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp_path, self.prometheus_path)
+
+    @staticmethod
+    def print_summary(records: List[LLMCallRecord]) -> None:
+        """Prints a per-agent summary table of the given records."""
+        if not records:
+            return
+        by_agent: Dict[str, List[LLMCallRecord]] = defaultdict(list)
+        for record in records:
+            by_agent[record.agent].append(record)
+
+        header = f"{'agent':<14}{'calls':>6}{'cached':>8}{'failed':>8}{'prompt tok':>12}{'compl tok':>11}{'avg ttft':>10}{'latency':>10}{'tok/s':>8}"
+        print("\n--- LLM Usage Summary ---")
+        print(header)
+        print("-" * len(header))
+        for agent, calls in sorted(by_agent.items()):
+            ttfts = [c.ttft_s for c in calls if c.ttft_s is not None]
+            generation = sum(c.generation_s for c in calls)
+            completion = sum(c.completion_tokens for c in calls)
+            print(
+                f"{agent:<14}{len(calls):>6}{sum(c.cache_hit for c in calls):>8}"
+                f"{sum(c.parse_ok is False or bool(c.error) for c in calls):>8}"
+                f"{sum(c.prompt_tokens for c in calls):>12}{completion:>11}"
+                f"{(sum(ttfts) / len(ttfts) if ttfts else 0.0):>9.2f}s"
+                f"{sum(c.latency_s for c in calls):>9.2f}s"
+                f"{(completion / generation if generation else 0.0):>8.1f}"
+            )
+        print("-------------------------")
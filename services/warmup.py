@@ -0,0 +1,181 @@
+# path: aida/services/warmup.py
+# title: Model Warm-up
+# role: Preloads the configured chat and embedding models in the background while the project is set up.
+
+import asyncio
+import concurrent.futures
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import httpx
+
+if TYPE_CHECKING:
+    from aida.llm_pool import OllamaHostPool
+
+
+@dataclass
+class WarmupResult:
+    """
+    The outcome of preloading one model on one host.
+    """
+    model: str
+    host: str
+    kind: str
+    ok: bool
+    seconds: float
+    error: Optional[str] = None
+
+
+class ModelWarmer:
+    """
+    Sends keep-alive warm-up requests for every configured model so that the
+    first user task does not pay the model load time.
+
+    Chat models (the model of every tier in `llm.tiers`, or `llm.model`) are
+    loaded on every host of the pool, since any host may serve a request. Ollama
+    keeps one runner per model and reloads it when the load options (e.g.
+    `num_ctx`) change, so each model is warmed once per host, with the options
+    of the tier the first task uses (the planning tier). The
+    embedding model is loaded on the host used for embeddings. The requests run
+    on the pool loop and do not block the caller; `wait` blocks until they have
+    finished and reports which models are ready.
+    """
+    def __init__(
+        self,
+        pool: "OllamaHostPool",
+        llm_config: Dict[str, Any],
+        embedding_model: Optional[str] = None,
+        embedding_host: Optional[str] = None,
+        enabled: bool = True,
+        timeout: float = 300,
+    ):
+        """
+        Args:
+            pool: The host pool whose hosts receive the chat model warm-up requests.
+            llm_config: The `llm` section of config.yml, used to find the chat models and keep_alive.
+            embedding_model: The embedding model to preload, if any.
+            embedding_host: The host that serves embeddings; defaults to the first pool host.
+            enabled: If False, `start` and `wait` do nothing.
+            timeout: The maximum number of seconds `wait` blocks for.
+        """
+        self.pool = pool
+        self.enabled = bool(enabled)
+        self.timeout = float(timeout)
+        self.chat_models = self._chat_models(llm_config)
+        self.embedding_model = embedding_model
+        self.embedding_host = (embedding_host or pool.hosts[0].url).rstrip("/")
+        self.embedding_keep_alive = llm_config.get("keep_alive")
+        self.results: List[WarmupResult] = []
+        self._future: Optional["concurrent.futures.Future[List[WarmupResult]]"] = None
+        self._reported = False
+
+    @staticmethod
+    def _chat_models(llm_config: Dict[str, Any]) -> List[Tuple[str, Any, Dict[str, Any]]]:
+        """
+        Returns one (model, keep_alive, options) per distinct model of the
+        configured tiers, resolved the same way as in `LLMClient`. A model shared
+        by several tiers takes the keep_alive and options of the planning tier if
+        it uses the model, and otherwise those of the first tier that does.
+        """
+        default_keep_alive = llm_config.get("keep_alive")
+        default_options = llm_config.get("options") or {}
+        tiers = llm_config.get("tiers") or {"default": {}}
+        first_tier = (llm_config.get("agents") or {}).get("planning")
+        names = sorted(tiers, key=lambda name: name != first_tier)
+        models: Dict[str, Tuple[str, Any, Dict[str, Any]]] = {}
+        for name in names:
+            tier = tiers[name] or {}
+            model = tier.get("model") or llm_config.get("model")
+            if not model:
+                continue
+            options = dict(tier.get("options") or default_options)
+            models.setdefault(str(model), (str(model), tier.get("keep_alive", default_keep_alive), options))
+        return list(models.values())
+
+    @property
+    def started(self) -> bool:
+        return self._future is not None
+
+    @property
+    def ready(self) -> bool:
+        """Whether all warm-up requests have finished (successfully or not)."""
+        return self._future is not None and self._future.done()
+
+    def start(self) -> None:
+        """Starts the warm-up requests in the background. Calling it again has no effect."""
+        if not self.enabled or self._future is not None:
+            return
+        names = [model for model, _, _ in self.chat_models]
+        if self.embedding_model:
+            names.append(self.embedding_model)
+        print(f"[ModelWarmer] Preloading models in the background: {', '.join(names)}")
+        self._future = self.pool.runner.submit(self._warm_all())
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Blocks until the warm-up has finished and prints a readiness report the first time.
+
+        Returns:
+            True if every model was loaded, False if any failed or the wait timed out.
+        """
+        if self._future is None:
+            return not self.enabled
+        if not self._future.done():
+            print("[ModelWarmer] Waiting for models to finish loading...")
+        try:
+            self.results = self._future.result(timeout=self.timeout if timeout is None else timeout)
+        except concurrent.futures.TimeoutError:
+            print("[ModelWarmer] Models are still loading; continuing without waiting further.")
+            return False
+        if not self._reported:
+            self._reported = True
+            self.print_report()
+        return all(r.ok for r in self.results)
+
+    def print_report(self) -> None:
+        """Prints one line per warm-up request with its load time or error."""
+        for r in self.results:
+            status = f"ready in {r.seconds:.1f}s" if r.ok else f"FAILED ({r.error})"
+            print(f"[ModelWarmer] {r.kind} model {r.model} on {r.host}: {status}")
+
+    async def _warm_all(self) -> List[WarmupResult]:
+        """Runs all warm-up requests concurrently. Runs on the pool loop."""
+        jobs = [
+            self._warm(
+                host.http, host.url, model, "chat", "/api/generate",
+                {"model": model, "keep_alive": keep_alive, "options": options or None, "stream": False},
+            )
+            for host in self.pool.hosts
+            for model, keep_alive, options in self.chat_models
+        ]
+        if self.embedding_model:
+            jobs.append(self._warm_embedding())
+        return list(await asyncio.gather(*jobs))
+
+    async def _warm_embedding(self) -> WarmupResult:
+        assert self.embedding_model is not None
+        payload = {"model": self.embedding_model, "input": "warm-up", "keep_alive": self.embedding_keep_alive}
+        host = next((h for h in self.pool.hosts if h.url == self.embedding_host), None)
+        if host is not None:
+            return await self._warm(host.http, host.url, self.embedding_model, "embedding", "/api/embed", payload)
+        async with httpx.AsyncClient(base_url=self.embedding_host, timeout=self.pool.timeout) as http:
+            return await self._warm(http, self.embedding_host, self.embedding_model, "embedding", "/api/embed", payload)
+
+    @staticmethod
+    async def _warm(
+        http: httpx.AsyncClient, url: str, model: str, kind: str, path: str, payload: Dict[str, Any]
+    ) -> WarmupResult:
+        """
+        Sends one warm-up request. A generate request without a prompt only loads
+        the model; keep_alive controls how long it stays in memory afterwards.
+        """
+        payload = {key: value for key, value in payload.items() if value is not None}
+        started = time.perf_counter()
+        try:
+            response = await http.post(path, json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}: {response.text.strip()}")
+            return WarmupResult(model, url, kind, True, time.perf_counter() - started)
+        except Exception as e:
+            return WarmupResult(model, url, kind, False, time.perf_counter() - started, error=str(e) or repr(e))
@@ -0,0 +1,42 @@
+# path: aida/tests/test_chroma_compaction.py
+# title: Chroma Compaction Tests
+# role: Checks that compacting one namespace's collection leaves the others alone.
+
+import numpy as np
+
+from aida.rag.backends import create_backend
+
+DIM = 16
+
+
+def _fill(backend, count, seed):
+    vectors = np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+    for start in range(0, count, 500):
+        rows = range(start, min(count, start + 500))
+        backend.upsert(
+            ids=[str(r) for r in rows],
+            documents=[f"chunk {r}" for r in rows],
+            metadatas=[{"source": f"file_{r % 10}.py"} for r in rows],
+            embeddings=list(vectors[start:start + len(rows)]),
+        )
+    return vectors
+
+
+def test_garbage_and_compaction_are_scoped_to_the_namespace(tmp_path):
+    first = create_backend("chroma", str(tmp_path), namespace="first")
+    second = create_backend("chroma", str(tmp_path), namespace="second")
+    _fill(first, 3000, seed=0)
+    vectors = _fill(second, 3000, seed=1)
+    first.delete([str(r) for r in range(2000)])
+
+    assert first.garbage_ratio() > 0.5
+    assert second.garbage_ratio() == 0.0
+    second_segment = second._segment_dir()
+
+    first.compact(shared_threshold=1.0)
+
+    assert first.count() == 1000
+    assert first.garbage_ratio() < 0.1
+    assert second._segment_dir() == second_segment
+    assert second.count() == 3000
+    assert second.query(vectors[42], 1)[0].id == "42"
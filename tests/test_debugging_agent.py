@@ -0,0 +1,54 @@
+# path: aida/tests/test_debugging_agent.py
+# title: Debugging Agent Tests
+# role: Checks that the debugging prompt never shows a file partially and that fixes are never replayed from the cache.
+
+from aida.agents.debugging_agent import DebuggingAgent
+from aida.schemas import ProjectMetadata
+from aida.services.context_packer import ContextPacker, TokenCounter
+
+
+class RecordingClient:
+    model = "test"
+
+    def __init__(self):
+        self.prompts = []
+        self.use_cache = []
+
+    def generate_json(self, prompt, output_schema, use_cache=True, agent=None):
+        self.prompts.append(prompt)
+        self.use_cache.append(use_cache)
+        return None
+
+
+def test_files_that_do_not_fit_are_left_out_whole(tmp_path):
+    (tmp_path / "small.py").write_text("def small():\n    return 1\n", encoding="utf-8")
+    (tmp_path / "large.py").write_text("".join(f"def f{i}():\n    return {i}\n" for i in range(200)), encoding="utf-8")
+    test_output = (
+        f'File "{tmp_path}/small.py", line 2, in small\n'
+        f'File "{tmp_path}/large.py", line 199, in f99\n'
+        "AssertionError"
+    )
+    client = RecordingClient()
+    packer = ContextPacker(TokenCounter("test", chars_per_token=4), budgets={"debugging": 1500})
+    agent = DebuggingAgent(client, context_packer=packer)
+
+    agent.run("fix it", str(tmp_path), test_output, ProjectMetadata(root_dir=str(tmp_path), files=["small.py", "large.py"]))
+
+    file_contents = client.prompts[0].split("<file_contents>")[1].split("</file_contents>")[0]
+    assert "[truncated]" not in file_contents
+    assert "def small():\n    return 1\n" in file_contents
+    assert "--- large.py ---" not in file_contents
+
+
+def test_fixes_are_requested_fresh_every_time(tmp_path):
+    (tmp_path / "app.py").write_text("def app():\n    return 1\n", encoding="utf-8")
+    test_output = f'File "{tmp_path}/app.py", line 2, in app\nAssertionError'
+    metadata = ProjectMetadata(root_dir=str(tmp_path), files=["app.py"])
+    client = RecordingClient()
+    agent = DebuggingAgent(client, context_packer=ContextPacker(TokenCounter("test", chars_per_token=4)))
+
+    agent.run("fix it", str(tmp_path), test_output, metadata)
+    agent.run("fix it", str(tmp_path), test_output, metadata)
+
+    assert client.prompts[0] == client.prompts[1]
+    assert client.use_cache == [False, False]
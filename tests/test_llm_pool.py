@@ -0,0 +1,81 @@
+# path: aida/tests/test_llm_pool.py
+# title: Ollama Host Pool Tests
+# role: Checks when a streamed request is retried on another host.
+
+import httpx
+import pytest
+
+from aida.llm_pool import HostUnavailableError, OllamaHostPool
+
+
+class _FailingStream(httpx.AsyncByteStream):
+    """A response body that sends some lines and then loses the connection."""
+    def __init__(self, lines):
+        self.lines = lines
+
+    async def __aiter__(self):
+        for line in self.lines:
+            yield line.encode("utf-8") + b"\n"
+        raise httpx.ReadError("connection reset")
+
+
+@pytest.fixture
+def pool():
+    pool = OllamaHostPool(hosts=["http://a", "http://b"], retry={"max_attempts": 3, "backoff_base": 0})
+    yield pool
+    pool.close()
+
+
+def _mock(pool, handler):
+    """Replaces every host's HTTP client with one answered by `handler`."""
+    async def swap():
+        for host in pool.hosts:
+            await host.http.aclose()
+            host.http = httpx.AsyncClient(base_url=host.url, transport=httpx.MockTransport(handler))
+    pool.runner.run(swap())
+
+
+def _collect(pool):
+    received = []
+
+    async def consume():
+        async for _, data in pool.stream("/api/chat", {}):
+            received.append(data["text"])
+    try:
+        pool.runner.run(consume())
+        error = None
+    except HostUnavailableError as e:
+        error = e
+    return received, error
+
+
+def test_stream_failing_after_output_is_not_retried(pool):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, stream=_FailingStream(['{"text": "AAA"}']))
+
+    _mock(pool, handler)
+    received, error = _collect(pool)
+
+    assert received == ["AAA"]
+    assert error is not None
+    assert len(requests) == 1
+
+
+def test_stream_failing_before_output_is_retried(pool):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if len(requests) == 1:
+            raise httpx.ConnectError("connection refused")
+        return httpx.Response(200, content=b'{"text": "BBB"}\n')
+
+    _mock(pool, handler)
+    received, error = _collect(pool)
+
+    assert received == ["BBB"]
+    assert error is None
+    assert len(requests) == 2
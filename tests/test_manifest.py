@@ -0,0 +1,60 @@
+# path: aida/tests/test_manifest.py
+# title: Index Manifest Tests
+# role: Checks that the manifest records the file state that was actually indexed.
+
+from functools import partial
+
+from aida.rag.benchmark import HashingEmbeddingFunction
+from aida.rag.indexing_agent import IndexingAgent
+from aida.rag.manifest import IndexManifest
+from aida.rag.project_registry import ProjectIndexRegistry
+from aida.rag.retrieval_agent import RetrievalAgent
+
+
+class _EditingEmbeddingFunction(HashingEmbeddingFunction):
+    """Rewrites a file the first time it embeds, as if the user saved it mid-sync."""
+    def __init__(self, path, content):
+        super().__init__()
+        self.path = path
+        self.content = content
+
+    def __call__(self, input):
+        if self.content is not None:
+            self.path.write_text(self.content, encoding="utf-8")
+            self.content = None
+        return super().__call__(input)
+
+
+def test_file_edited_while_embedding_is_indexed_again(tmp_path):
+    root = tmp_path / "project"
+    root.mkdir()
+    notes = root / "notes.md"
+    notes.write_text("The project invoices customers monthly.\n", encoding="utf-8")
+    registry = ProjectIndexRegistry(
+        str(tmp_path / "db"),
+        _EditingEmbeddingFunction(notes, "The project ships parcels to customers every week.\n"),
+        indexing_agent_factory=partial(IndexingAgent, chunk_size=500, chunk_overlap=0, compaction={"enabled": False}),
+        retrieval_agent_factory=RetrievalAgent,
+        backend="numpy",
+    )
+    try:
+        project = registry.open(str(root))
+        project.indexing_agent.sync_index(str(root), ["notes.md"])
+        assert "invoices" in project.retrieval_agent.run("customers")[0].text
+
+        project.indexing_agent.sync_index(str(root), ["notes.md"])
+        hits = project.retrieval_agent.run("customers")
+        assert [hit.text for hit in hits] == ["The project ships parcels to customers every week."]
+    finally:
+        registry.close_all()
+
+
+def test_record_drops_a_file_that_is_gone(tmp_path):
+    (tmp_path / "a.py").write_text("x = 1\n", encoding="utf-8")
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    manifest.record(str(tmp_path), "a.py", ["a"])
+    assert "a.py" in manifest.entries
+
+    (tmp_path / "a.py").unlink()
+    manifest.record(str(tmp_path), "a.py", ["b"])
+    assert "a.py" not in manifest.entries
@@ -0,0 +1,51 @@
+# path: aida/tests/test_project_registry.py
+# title: Project Index Registry Tests
+# role: Checks that reopening a project never serves results cached before it was closed.
+
+from functools import partial
+
+from aida.rag.benchmark import HashingEmbeddingFunction
+from aida.rag.indexing_agent import IndexingAgent
+from aida.rag.project_registry import ProjectIndexRegistry
+from aida.rag.query_cache import QueryCache
+from aida.rag.retrieval_agent import RetrievalAgent
+
+
+def _sync(registry, root):
+    project = registry.open(str(root))
+    files = sorted(p.name for p in root.iterdir())
+    project.indexing_agent.sync_index(str(root), files)
+    registry.trim()
+    return project
+
+
+def test_reopened_project_does_not_serve_stale_cached_results(tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    for root in (first, second):
+        root.mkdir()
+        (root / "notes.md").write_text(f"The {root.name} project invoices customers monthly.\n", encoding="utf-8")
+    registry = ProjectIndexRegistry(
+        str(tmp_path / "db"),
+        HashingEmbeddingFunction(),
+        # Without compaction, both syncs update the index once, so a generation
+        # counted per store would repeat after the project is reopened.
+        indexing_agent_factory=partial(
+            IndexingAgent, chunk_size=500, chunk_overlap=0, compaction={"enabled": False}
+        ),
+        retrieval_agent_factory=partial(RetrievalAgent, query_cache=QueryCache()),
+        backend="numpy",
+        max_loaded=1,
+    )
+    try:
+        project = _sync(registry, first)
+        assert "invoices" in project.retrieval_agent.run("invoices customers")[0].text
+
+        _sync(registry, second)
+        assert [p.root for p in registry.loaded()] == [str(second.resolve())]
+        (first / "notes.md").write_text("The first project ships parcels weekly.\n", encoding="utf-8")
+
+        project = _sync(registry, first)
+        hits = project.retrieval_agent.run("invoices customers")
+        assert all("invoices" not in hit.text for hit in hits)
+    finally:
+        registry.close_all()
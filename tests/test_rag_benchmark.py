@@ -0,0 +1,18 @@
+# path: aida/tests/test_rag_benchmark.py
+# title: RAG Benchmark Tests
+# role: Checks that the benchmark's labels point at the functions its queries ask for.
+
+from aida.rag.benchmark import build_fixture
+
+
+def test_target_lines_cover_exactly_the_function(tmp_path):
+    queries = build_fixture(tmp_path, n_files=24, n_queries=1000, seed=3)
+    assert queries
+    for query in queries:
+        target = query.target
+        lines = (tmp_path / target.path).read_text(encoding="utf-8").splitlines()
+        body = lines[target.start_line - 1:target.end_line]
+        assert body[0].startswith(f"def {target.name}(")
+        assert body[-1].startswith("    return ")
+        assert all(line.startswith("    ") for line in body[1:])
+        assert target.end_line == len(lines) or lines[target.end_line] == ""
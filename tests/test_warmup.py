@@ -0,0 +1,61 @@
+# path: aida/tests/test_warmup.py
+# title: Model Warm-up Tests
+# role: Checks that each model is preloaded once, with the options of the tier the first task uses.
+
+import json
+
+import httpx
+
+from aida.llm_pool import OllamaHostPool
+from aida.services.warmup import ModelWarmer
+
+LLM_CONFIG = {
+    "model": "gemma3:latest",
+    "keep_alive": "5m",
+    "tiers": {
+        "large": {"model": "gemma3:latest", "options": {"num_ctx": 16384}},
+        "small": {"model": "gemma3:latest", "keep_alive": "30m", "options": {"num_ctx": 8192}},
+        "review": {"model": "qwen3:8b", "options": {"num_ctx": 16384}},
+    },
+    "agents": {"planning": "small", "coding": "large"},
+}
+
+
+def test_a_shared_model_is_warmed_once_with_the_planning_tier_options():
+    assert ModelWarmer._chat_models(LLM_CONFIG) == [
+        ("gemma3:latest", "30m", {"num_ctx": 8192}),
+        ("qwen3:8b", "5m", {"num_ctx": 16384}),
+    ]
+
+
+def test_without_tiers_the_default_model_is_warmed():
+    config = {"model": "gemma3:latest", "keep_alive": "5m", "options": {"num_ctx": 4096}}
+    assert ModelWarmer._chat_models(config) == [("gemma3:latest", "5m", {"num_ctx": 4096})]
+
+
+def test_warm_up_requests_carry_the_tier_options():
+    payloads = []
+
+    def handler(request):
+        payloads.append(json.loads(request.content))
+        return httpx.Response(200, json={})
+
+    pool = OllamaHostPool(hosts=["http://a"])
+    try:
+        async def swap():
+            for host in pool.hosts:
+                await host.http.aclose()
+                host.http = httpx.AsyncClient(base_url=host.url, transport=httpx.MockTransport(handler))
+        pool.runner.run(swap())
+
+        warmer = ModelWarmer(pool, LLM_CONFIG)
+        warmer.start()
+        assert warmer.wait(timeout=10)
+    finally:
+        pool.close()
+
+    assert sorted((p["model"], p["options"]["num_ctx"]) for p in payloads) == [
+        ("gemma3:latest", 8192),
+        ("qwen3:8b", 16384),
+    ]
+    assert all(p["stream"] is False for p in payloads)
@@ -7,6 +7,7 @@ from contextlib import contextmanager
 from typing import Generator
 import shutil
 from pathlib import Path
+from aida.json_extract import best_json
 
 def clean_code(code_string: str) -> str:
     """
@@ -22,34 +23,11 @@ def clean_code(code_string: str) -> str:
 def clean_json_response(raw_response: str) -> str:
     """
     Extracts a JSON object or array from a raw string response from an LLM.
+    The largest value that decodes (after repair if needed) is returned; use
+    `aida.json_extract.extract_json` to rank the candidates against a schema.
     """
-    if "```json" in raw_response:
-        start_index = raw_response.find("```json") + len("```json")
-        end_index = raw_response.rfind("```")
-        if end_index > start_index:
-            raw_response = raw_response[start_index:end_index]
-
-    start_brace = raw_response.find('{')
-    start_bracket = raw_response.find('[')
-
-    start_index = -1
-    if start_brace == -1 and start_bracket == -1:
-        return ""
-    elif start_brace == -1:
-        start_index = start_bracket
-    elif start_bracket == -1:
-        start_index = start_brace
-    else:
-        start_index = min(start_brace, start_bracket)
-
-    end_brace = raw_response.rfind('}')
-    end_bracket = raw_response.rfind(']')
-    end_index = max(end_brace, end_bracket)
-
-    if start_index != -1 and end_index != -1 and end_index > start_index:
-        return raw_response[start_index:end_index + 1].strip()
-    
-    return ""
+    best = best_json(raw_response)
+    return best.text.strip() if best else ""
 
 @contextmanager
 def sandbox_manager(project_path: str) -> Generator[str, None, None]: